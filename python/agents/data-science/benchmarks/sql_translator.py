@@ -0,0 +1,211 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Latency benchmark of the CHASE-SQL post-processing in `SqlTranslator`.
+
+Translates a corpus of BIRD-style queries with `SqlTranslator.translate`, with
+both error checks enabled, in three modes:
+
+  cold   -- the translator contexts are dropped before each query, so the DDL
+            is parsed again, as before the contexts were cached
+  schema -- the schema is cached but each query is checked again
+  warm   -- the schema and the checks of the query are cached
+
+Queries whose checks fail would call the model to correct them; they are
+counted and left out. By default a small corpus on the `california_schools`
+database of BIRD is used. Run from the agent directory:
+
+  python -m benchmarks.sql_translator --repeats=20
+  python -m benchmarks.sql_translator --ddl_file=schema.sql \\
+      --queries_file=queries.json --db=my_dataset --catalog=my_project
+"""
+
+import contextlib
+import io
+import json
+import time
+
+from absl import app, flags
+import numpy as np
+
+from data_science.sub_agents.bigquery.chase_sql.sql_postprocessor.sql_translator import (
+    SqlTranslator,
+)
+
+FLAGS = flags.FLAGS
+
+flags.DEFINE_string("ddl_file", None, "File with the DDL of the database.")
+flags.DEFINE_string(
+    "queries_file",
+    None,
+    "JSON list of queries, as strings or as BIRD samples with a `SQL` field.",
+)
+flags.DEFINE_string("db", "california_schools", "Dataset of the tables.")
+flags.DEFINE_string("catalog", "bird-project", "Project of the tables.")
+flags.DEFINE_integer("repeats", 10, "Number of times each query is translated.")
+
+DDL_SCHEMA = """CREATE OR REPLACE TABLE `bird-project.california_schools.schools` (
+  `CDSCode` STRING,
+  `County` STRING,
+  `District` STRING,
+  `School` STRING,
+  `City` STRING,
+  `Zip` STRING,
+  `Charter` INT64,
+  `FundingType` STRING,
+  `OpenDate` DATE,
+  `ClosedDate` DATE,
+  `Virtual` STRING,
+  `Latitude` FLOAT64,
+  `Longitude` FLOAT64
+);
+
+-- Example values for table `bird-project.california_schools.schools`:
+INSERT INTO `bird-project.california_schools.schools` VALUES
+('01100170109835','Alameda','Alameda County Office of Education','FAME Public Charter','Newark','94560-5359',1,'Directly funded','2005-08-29',NULL,'P',37.521436,-121.99391);
+
+CREATE OR REPLACE TABLE `bird-project.california_schools.frpm` (
+  `CDSCode` STRING,
+  `Academic_Year` STRING,
+  `County_Name` STRING,
+  `School_Name` STRING,
+  `School_Type` STRING,
+  `Enrollment_K_12` FLOAT64,
+  `Free_Meal_Count_K_12` FLOAT64,
+  `Percent_Eligible_Free_K_12` FLOAT64,
+  `FRPM_Count_K_12` FLOAT64,
+  `Enrollment_Ages_5_17` FLOAT64
+);
+
+-- Example values for table `bird-project.california_schools.frpm`:
+INSERT INTO `bird-project.california_schools.frpm` VALUES
+('01100170109835','2014-2015','Alameda','FAME Public Charter','K-12 Schools (Public)',1087.0,565.0,0.519779208831647,715.0,1070.0);
+
+CREATE OR REPLACE TABLE `bird-project.california_schools.satscores` (
+  `cds` STRING,
+  `rtype` STRING,
+  `sname` STRING,
+  `dname` STRING,
+  `cname` STRING,
+  `enroll12` INT64,
+  `NumTstTakr` INT64,
+  `AvgScrRead` INT64,
+  `AvgScrMath` INT64,
+  `AvgScrWrite` INT64,
+  `NumGE1500` INT64
+);
+
+-- Example values for table `bird-project.california_schools.satscores`:
+INSERT INTO `bird-project.california_schools.satscores` VALUES
+('1100170000000','D',NULL,'Alameda County Office of Education','Alameda',398,88,418,418,417,14);
+"""
+
+QUERIES = [
+    "SELECT MAX(Percent_Eligible_Free_K_12) FROM `bird-project.california_schools.frpm` WHERE County_Name = 'Alameda'",
+    "SELECT School_Name FROM `bird-project.california_schools.frpm` ORDER BY Enrollment_K_12 DESC LIMIT 3",
+    "SELECT COUNT(*) FROM `bird-project.california_schools.schools` WHERE Charter = 1 AND County = 'Fresno'",
+    "SELECT T2.School FROM `bird-project.california_schools.satscores` AS T1 JOIN `bird-project.california_schools.schools` AS T2 ON T1.cds = T2.CDSCode WHERE T1.NumGE1500 > 500",
+    "SELECT T1.Zip FROM `bird-project.california_schools.schools` AS T1 JOIN `bird-project.california_schools.frpm` AS T2 ON T1.CDSCode = T2.CDSCode WHERE T2.FRPM_Count_K_12 / T2.Enrollment_K_12 > 0.8 AND T1.Charter = 1",
+    "SELECT sname, AvgScrMath FROM `bird-project.california_schools.satscores` WHERE AvgScrMath > 560 ORDER BY AvgScrMath DESC",
+    "SELECT County, COUNT(School) AS num_schools FROM `bird-project.california_schools.schools` WHERE Virtual = 'F' GROUP BY County ORDER BY num_schools DESC LIMIT 5",
+    "SELECT AVG(T1.AvgScrWrite) FROM `bird-project.california_schools.satscores` AS T1 JOIN `bird-project.california_schools.schools` AS T2 ON T1.cds = T2.CDSCode WHERE T2.FundingType = 'Directly funded'",
+    "SELECT School FROM `bird-project.california_schools.schools` WHERE EXTRACT(YEAR FROM OpenDate) = 1980 AND ClosedDate IS NOT NULL",
+    "SELECT T2.City FROM `bird-project.california_schools.frpm` AS T1 JOIN `bird-project.california_schools.schools` AS T2 ON T1.CDSCode = T2.CDSCode GROUP BY T2.City ORDER BY SUM(T1.Enrollment_K_12) ASC LIMIT 5",
+    "SELECT cname FROM `bird-project.california_schools.satscores` WHERE NumTstTakr = (SELECT MAX(NumTstTakr) FROM `bird-project.california_schools.satscores`)",
+    "SELECT Latitude, Longitude FROM `bird-project.california_schools.schools` WHERE District LIKE '%Unified%' ORDER BY Latitude DESC LIMIT 1",
+    "WITH ratios AS (SELECT CDSCode, Free_Meal_Count_K_12 / Enrollment_K_12 AS ratio FROM `bird-project.california_schools.frpm`) SELECT T2.School, T1.ratio FROM ratios AS T1 JOIN `bird-project.california_schools.schools` AS T2 ON T1.CDSCode = T2.CDSCode ORDER BY T1.ratio DESC LIMIT 10",
+    "SELECT dname, SUM(enroll12) FROM `bird-project.california_schools.satscores` WHERE rtype = 'S' GROUP BY dname HAVING SUM(enroll12) > 1000",
+]
+PERCENTILES = (50, 95)
+
+
+class NoModel:
+    """Model that is never called, as the corpus queries have no errors."""
+
+    def call_parallel(self, prompts, parser_func=None):
+        raise RuntimeError("Query needs an LLM correction.")
+
+
+def load_queries(queries_file):
+    """Queries of the corpus, from a JSON list of queries or BIRD samples."""
+    with open(queries_file) as f:
+        samples = json.load(f)
+    return [s["SQL"] if isinstance(s, dict) else s for s in samples]
+
+
+def time_translate(translator, query, ddl_schema, before=None):
+    """Seconds to translate the query, or None if it needs an LLM correction."""
+    if before:
+        before()
+    start = time.perf_counter()
+    try:
+        # The translator prints the query after each step.
+        with contextlib.redirect_stdout(io.StringIO()):
+            translator.translate(
+                query, db=FLAGS.db, catalog=FLAGS.catalog, ddl_schema=ddl_schema
+            )
+    except RuntimeError:
+        return None
+    return time.perf_counter() - start
+
+
+def main(argv: list[str]) -> None:  # pylint: disable=unused-argument
+    ddl_schema = DDL_SCHEMA
+    if FLAGS.ddl_file:
+        with open(FLAGS.ddl_file) as f:
+            ddl_schema = f.read()
+    queries = load_queries(FLAGS.queries_file) if FLAGS.queries_file else QUERIES
+    translator = SqlTranslator(
+        model=NoModel(), process_input_errors=True, process_tool_output_errors=True
+    )
+
+    def clear_checks():
+        SqlTranslator.get_context(
+            ddl_schema
+        )._checked.clear()  # pylint: disable=protected-access
+
+    modes = {
+        "cold": SqlTranslator.clear_contexts,
+        "schema": clear_checks,
+        "warm": None,
+    }
+    samples = {mode: [] for mode in modes}
+    skipped = 0
+    for query in queries:
+        if time_translate(translator, query, ddl_schema) is None:
+            skipped += 1
+            continue
+        for _ in range(FLAGS.repeats):
+            for mode, before in modes.items():
+                samples[mode].append(
+                    time_translate(translator, query, ddl_schema, before)
+                )
+
+    print(
+        f"Queries: {len(queries) - skipped} translated, {skipped} skipped,"
+        f" {FLAGS.repeats} repeats"
+    )
+    for mode, values in samples.items():
+        if not values:
+            continue
+        values = np.array(values) * 1000
+        print(
+            f"  {mode:8s}"
+            + "".join(f"  p{p} {np.percentile(values, p):9.3f} ms" for p in PERCENTILES)
+            + f"  mean {values.mean():9.3f} ms"
+        )
+
+
+if __name__ == "__main__":
+    app.run(main)
@@ -75,6 +75,8 @@ def return_instructions_ds() -> str:
 
   **Available files:** Only use the files that are available as specified in the list of available files.
 
+  **Data in files:** Query results are given to you as a Parquet file together with their schema, a summary of each column and the first rows. ALWAYS load the full data from the file into a pandas DataFrame, e.g. `df = pd.read_parquet("query_result.parquet")`. NEVER retype the data from the prompt and NEVER edit the data that are given to you.
+
   **Data in prompt:** Some queries contain the input data directly in the prompt. You have to parse that data into a pandas DataFrame. ALWAYS parse all the data. NEVER edit the data that are given to you.
 
   **Answerability:** Some queries may not be answerable with the available data. In those cases, inform the user why you cannot process their query and suggest what type of data would be needed to fulfill their request.
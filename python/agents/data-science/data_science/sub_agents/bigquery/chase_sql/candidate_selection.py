@@ -0,0 +1,178 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Selection of the SQL candidates generated by the CHASE-SQL agent.
+
+Candidates are checked locally with SQLGlot. To vote, the candidates are run on
+an in-memory SQLite database holding the example rows of the DDL schema, and
+the candidate whose result most candidates agree on is selected.
+"""
+
+import collections
+import sqlite3
+import time
+
+import sqlglot
+
+# pylint: disable=g-importing-member
+from .sql_postprocessor.sql_translator import SqlTranslator, TranslatorContext
+
+# pylint: enable=g-importing-member
+
+# Dialect of the generated SQL candidates.
+CANDIDATE_DIALECT = "bigquery"
+# Maximum time in seconds to run a candidate on the example rows.
+MAX_CANDIDATE_SECONDS = 2.0
+
+
+def is_valid_candidate(
+    sql_query: str | None,
+    context: TranslatorContext,
+    db: str | None = None,
+    catalog: str | None = None,
+) -> bool:
+    """Returns True if the SQL candidate parses and resolves against the schema.
+
+    Args:
+        sql_query (str): The SQL candidate.
+        context (TranslatorContext): The translator context of the schema.
+        db (str, optional): The dataset of the tables.
+        catalog (str, optional): The project of the tables.
+
+    Returns:
+        bool: Whether the candidate is valid.
+    """
+    if not sql_query:
+        return False
+    errors, _ = context.check_for_errors(
+        sql_query, sql_dialect=CANDIDATE_DIALECT, db=db, catalog=catalog
+    )
+    return errors is None
+
+
+def to_sqlite(sql_query: str) -> str:
+    """Transpiles a SQL statement to SQLite, dropping the project and dataset."""
+    sql_query_ast = sqlglot.parse_one(
+        sql_query, read=CANDIDATE_DIALECT, error_level=sqlglot.ErrorLevel.IMMEDIATE
+    )
+    for table in sql_query_ast.find_all(sqlglot.exp.Table):
+        table.set("catalog", None)
+        table.set("db", None)
+    return sql_query_ast.sql("sqlite")
+
+
+def build_sample_database(ddl_schema: str) -> sqlite3.Connection:
+    """Creates an in-memory SQLite database with the example rows of the schema.
+
+    Args:
+        ddl_schema (str): The DDL statements and example INSERT statements.
+
+    Returns:
+        sqlite3.Connection: The connection to the database.
+    """
+    connection = sqlite3.connect(":memory:", check_same_thread=False)
+    for table_name, columns in SqlTranslator.extract_schema_from_ddls(ddl_schema):
+        # The candidates are run without their project and dataset.
+        table_name = table_name.split(".")[-1]
+        column_list = ", ".join(f'"{column_name}"' for column_name, _ in columns)
+        connection.execute(f'CREATE TABLE IF NOT EXISTS "{table_name}" ({column_list})')
+    for statement in ddl_schema.split(";\n"):
+        lines = [
+            line for line in statement.splitlines() if not line.strip().startswith("--")
+        ]
+        statement = "\n".join(lines).strip()
+        if not statement.upper().startswith("INSERT"):
+            continue
+        try:
+            connection.execute(to_sqlite(statement))
+        except (sqlglot.errors.SqlglotError, sqlite3.Error) as e:
+            print(f"Skipping example row: {e}")
+    connection.commit()
+    return connection
+
+
+def execute_candidate(
+    connection: sqlite3.Connection,
+    sql_query: str,
+    timeout: float = MAX_CANDIDATE_SECONDS,
+) -> tuple | None:
+    """Runs a SQL candidate on the sample database.
+
+    Args:
+        connection (sqlite3.Connection): The sample database.
+        sql_query (str): The SQL candidate.
+        timeout (float): The maximum time in seconds to run the candidate.
+
+    Returns:
+        tuple | None: The result rows in a canonical order, or None if the
+        candidate failed.
+    """
+    deadline = time.monotonic() + timeout
+    connection.set_progress_handler(lambda: time.monotonic() > deadline, 10000)
+    try:
+        rows = connection.execute(to_sqlite(sql_query)).fetchall()
+    except (sqlglot.errors.SqlglotError, sqlite3.Error) as e:
+        print(f"Candidate failed on the example rows: {e}")
+        return None
+    finally:
+        connection.set_progress_handler(None, 0)
+    return tuple(sorted(rows, key=repr))
+
+
+def vote_candidates(
+    candidates: list[str | None],
+    ddl_schema: str,
+    validate_func=None,
+) -> str | None:
+    """Selects the SQL candidate whose result most candidates agree on.
+
+    Candidates are grouped by their result on the example rows of the schema.
+    The largest group wins, preferring non-empty results and then the earliest
+    candidate. Candidates that fail `validate_func` or fail to run do not vote.
+
+    Args:
+        candidates (list[str | None]): The SQL candidates.
+        ddl_schema (str): The DDL statements and example INSERT statements.
+        validate_func (callable, optional): A function that returns True if a
+          candidate is valid.
+
+    Returns:
+        str | None: The selected candidate. If no candidate could run, the first
+        valid candidate, else the first candidate, or None if there is none.
+    """
+    candidates = [candidate for candidate in candidates if candidate]
+    if not candidates:
+        return None
+    valid = [
+        candidate
+        for candidate in candidates
+        if validate_func is None or validate_func(candidate)
+    ]
+    if len(valid) <= 1:
+        return valid[0] if valid else candidates[0]
+
+    connection = build_sample_database(ddl_schema)
+    groups = collections.defaultdict(list)
+    try:
+        for candidate in valid:
+            result = execute_candidate(connection, candidate)
+            if result is not None:
+                groups[result].append(candidate)
+    finally:
+        connection.close()
+    if not groups:
+        return valid[0]
+    # max() keeps the first of equal groups, which holds the earliest candidate.
+    _, group = max(groups.items(), key=lambda item: (len(item[1]), bool(item[0])))
+    return group[0]
@@ -13,11 +13,11 @@
 # limitations under the License.
 
 """Constants used by the ChaseSQL algorithm."""
+
 import os
 from typing import Any
 import immutabledict
 
-
 # Parameters for ChaseSQL.
 chase_sql_constants_dict: immutabledict.immutabledict[str, Any] = (
     immutabledict.immutabledict(
@@ -36,6 +36,18 @@ chase_sql_constants_dict: immutabledict.immutabledict[str, Any] = (
             "temperature": 0.5,
             # Type of SQL generation method.
             "generate_sql_type": "dc",
+            # How to select among the candidates: "first_valid" returns the first
+            # candidate that passes the local SQLGlot checks, "vote" runs all
+            # candidates on the example rows and picks the majority result.
+            "candidate_selection": "first_valid",
+            # Maximum number of attempts of each model call.
+            "max_attempts": 6,
+            # Base delay in seconds of the exponential backoff between attempts.
+            "base_delay": 1,
+            # Factor of the exponential backoff between attempts.
+            "backoff_factor": 2,
+            # Maximum delay in seconds between attempts.
+            "max_delay": 30,
         }
     )
 )
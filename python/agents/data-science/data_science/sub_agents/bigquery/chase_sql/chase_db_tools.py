@@ -20,8 +20,10 @@ import os
 from google.adk.tools import ToolContext
 
 # pylint: disable=g-importing-member
+from ..schema_index import select_schema
+from .candidate_selection import is_valid_candidate, vote_candidates
 from .dc_prompt_template import DC_PROMPT_TEMPLATE
-from .llm_utils import GeminiModel
+from .llm_utils import GeminiModel, RetryPolicy
 from .qp_prompt_template import QP_PROMPT_TEMPLATE
 from .sql_postprocessor import sql_translator
 
@@ -41,6 +43,17 @@ class GenerateSQLType(enum.Enum):
     QP = "qp"
 
 
+class CandidateSelection(enum.Enum):
+    """Enum for the different methods to select among the SQL candidates.
+
+    FIRST_VALID: The first candidate that passes the local SQLGlot checks.
+    VOTE: The candidate with the majority result on the example rows.
+    """
+
+    FIRST_VALID = "first_valid"
+    VOTE = "vote"
+
+
 def exception_wrapper(func):
     """A decorator to catch exceptions in a function and return the exception as a string.
 
@@ -111,23 +124,52 @@ def initial_bq_nl2sql(
     model = tool_context.state["database_settings"]["model"]
     temperature = tool_context.state["database_settings"]["temperature"]
     generate_sql_type = tool_context.state["database_settings"]["generate_sql_type"]
-
+    candidate_selection = tool_context.state["database_settings"]["candidate_selection"]
+    retry_policy = RetryPolicy(
+        max_attempts=tool_context.state["database_settings"]["max_attempts"],
+        base_delay=tool_context.state["database_settings"]["base_delay"],
+        backoff_factor=tool_context.state["database_settings"]["backoff_factor"],
+        max_delay=tool_context.state["database_settings"]["max_delay"],
+    )
+
+    # Only the tables relevant to the question go into the prompt. The full
+    # schema is still used to check and translate the SQL.
+    prompt_schema = select_schema(ddl_schema, question)
     if generate_sql_type == GenerateSQLType.DC.value:
         prompt = DC_PROMPT_TEMPLATE.format(
-            SCHEMA=ddl_schema, QUESTION=question, BQ_PROJECT_ID=BQ_PROJECT_ID
+            SCHEMA=prompt_schema, QUESTION=question, BQ_PROJECT_ID=BQ_PROJECT_ID
         )
     elif generate_sql_type == GenerateSQLType.QP.value:
         prompt = QP_PROMPT_TEMPLATE.format(
-            SCHEMA=ddl_schema, QUESTION=question, BQ_PROJECT_ID=BQ_PROJECT_ID
+            SCHEMA=prompt_schema, QUESTION=question, BQ_PROJECT_ID=BQ_PROJECT_ID
         )
     else:
         raise ValueError(f"Unsupported generate_sql_type: {generate_sql_type}")
 
-    model = GeminiModel(model_name=model, temperature=temperature)
+    model = GeminiModel(
+        model_name=model, temperature=temperature, retry_policy=retry_policy
+    )
     requests = [prompt for _ in range(number_of_candidates)]
-    responses = model.call_parallel(requests, parser_func=parse_response)
-    # Take just the first response.
-    responses = responses[0]
+    # The schema is parsed once and shared with the translator below.
+    context = sql_translator.SqlTranslator.get_context(ddl_schema)
+
+    def validate_func(sql_query: str) -> bool:
+        return is_valid_candidate(sql_query, context, db=db, catalog=project)
+
+    if candidate_selection == CandidateSelection.FIRST_VALID.value:
+        # Return as soon as one candidate is valid, cancelling the others.
+        responses = model.call_first(
+            requests, parser_func=parse_response, validate_func=validate_func
+        )
+    elif candidate_selection == CandidateSelection.VOTE.value:
+        # Requests that failed after all retries or timed out are None, and
+        # do not vote.
+        responses = model.call_parallel(requests, parser_func=parse_response)
+        responses = vote_candidates(responses, ddl_schema, validate_func)
+    else:
+        raise ValueError(f"Unsupported candidate_selection: {candidate_selection}")
+    if responses is None:
+        return "Error: no SQL candidate was generated."
 
     # If postprocessing of the SQL to transpile it to BigQuery is required,
     # then do it here.
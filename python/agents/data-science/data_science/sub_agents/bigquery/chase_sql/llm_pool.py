@@ -0,0 +1,278 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Asyncio client pool shared by all LLM calls of the CHASE-SQL agent.
+
+One pool serves every session of the process. Its requests run on a single
+background event loop, so concurrent sessions share one thread and the
+connections of the backend instead of creating threads per call. The pool
+limits the number of requests in flight, rate limits them with a token bucket
+and sends each request to the region with the lowest observed latency.
+"""
+
+import asyncio
+import collections
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Protocol, Sequence
+
+
+class LLMBackend(Protocol):
+    """Backend that sends a single request to the model."""
+
+    async def generate(
+        self,
+        prompt: str,
+        model_name: str,
+        region: str | None,
+        generation_config: dict[str, Any],
+        cache_name: str | None = None,
+    ) -> str:
+        """Returns the text of the model response to `prompt`."""
+
+
+class FakeBackend:
+    """Local backend for tests, answering without calling a model.
+
+    Attributes:
+        responses (callable): Returns the response text of a prompt.
+        latency (float | dict[str, float] | callable): Seconds to wait before
+          answering, seconds per region, or a function returning the seconds
+          for a prompt.
+        errors (int): Number of requests that fail before the first success.
+        requests (list): The (prompt, model name, region) of each request.
+    """
+
+    def __init__(
+        self,
+        responses: Callable[[str], str] | None = None,
+        latency: float | dict[str, float] | Callable[[str], float] = 0.0,
+        errors: int = 0,
+    ):
+        self.responses = responses or (lambda prompt: prompt)
+        self.latency = latency
+        self.errors = errors
+        self.requests = []
+
+    async def generate(
+        self,
+        prompt: str,
+        model_name: str,
+        region: str | None,
+        generation_config: dict[str, Any],
+        cache_name: str | None = None,
+    ) -> str:
+        self.requests.append((prompt, model_name, region))
+        latency = self.latency
+        if isinstance(latency, dict):
+            latency = latency.get(region, 0.0)
+        elif callable(latency):
+            latency = latency(prompt)
+        await asyncio.sleep(latency)
+        if self.errors > 0:
+            self.errors -= 1
+            raise RuntimeError("Fake backend error.")
+        return self.responses(prompt)
+
+
+class TokenBucket:
+    """Token bucket rate limiter for coroutines of one event loop.
+
+    Attributes:
+        rate (float): Tokens added per second.
+        capacity (float): Maximum number of tokens, i.e. the allowed burst.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self) -> None:
+        """Waits until a token is available and takes it."""
+        # The lock makes waiters take tokens in order of arrival.
+        async with self._lock:
+            self._refill()
+            if self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+
+class RegionBalancer:
+    """Picks regions by their latency, as observed by the requests of the pool.
+
+    Each region keeps an exponentially weighted moving average of the latency
+    of its requests. Errors count as `error_latency` seconds. A request goes to
+    the region with the lowest average latency scaled by its requests in flight.
+    Regions without requests are tried first, and with probability `explore` a
+    random region is picked so that averages of slow regions recover.
+    """
+
+    def __init__(
+        self,
+        regions: Sequence[str],
+        alpha: float = 0.2,
+        error_latency: float = 30.0,
+        explore: float = 0.05,
+    ):
+        self.regions = list(regions)
+        self.alpha = alpha
+        self.error_latency = error_latency
+        self.explore = explore
+        self.latency = {}
+        self.in_flight = collections.Counter()
+
+    def choose(self) -> str:
+        """Returns the region for the next request and counts it in flight."""
+        unobserved = [r for r in self.regions if r not in self.latency]
+        if unobserved:
+            region = random.choice(unobserved)
+        elif random.random() < self.explore:
+            region = random.choice(self.regions)
+        else:
+            region = min(
+                self.regions,
+                key=lambda r: self.latency[r] * (1 + self.in_flight[r]),
+            )
+        self.in_flight[region] += 1
+        return region
+
+    def release(self, region: str) -> None:
+        """Stops counting a cancelled request in flight."""
+        self.in_flight[region] -= 1
+
+    def record(self, region: str, latency: float | None) -> None:
+        """Records the latency of a request, or None if it failed."""
+        self.release(region)
+        if latency is None:
+            latency = self.error_latency
+        if region in self.latency:
+            latency = (1 - self.alpha) * self.latency[region] + self.alpha * latency
+        self.latency[region] = latency
+
+
+class LLMClientPool:
+    """Pool of model requests running on a shared background event loop.
+
+    Attributes:
+        backend (LLMBackend): The backend that sends the requests.
+        max_concurrency (int): Maximum number of requests in flight.
+        requests_per_second (float): Rate limit of the requests.
+        burst (int): Number of requests that may exceed the rate limit at once.
+        balancer (RegionBalancer | None): Picks the region of the requests that
+          may be distributed across regions.
+    """
+
+    def __init__(
+        self,
+        backend: LLMBackend,
+        max_concurrency: int = 16,
+        requests_per_second: float = 10.0,
+        burst: int = 16,
+        regions: Sequence[str] | None = None,
+    ):
+        self.backend = backend
+        self.max_concurrency = max_concurrency
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.balancer = RegionBalancer(regions) if regions else None
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self.loop.run_forever, name="llm-client-pool", daemon=True
+        )
+        self._thread.start()
+        self._semaphore = None
+        self._bucket = None
+        # The primitives must be created on the loop of the pool.
+        self.run(self._init_primitives())
+
+    async def _init_primitives(self) -> None:
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._bucket = TokenBucket(self.requests_per_second, self.burst)
+
+    def run(self, coro: Awaitable[Any], timeout: float | None = None) -> Any:
+        """Runs a coroutine on the loop of the pool and waits for its result.
+
+        Args:
+            coro (awaitable): The coroutine to run.
+            timeout (float, optional): The maximum time in seconds to wait. The
+              coroutine is cancelled if it takes longer.
+
+        Returns:
+            Any: The result of the coroutine.
+        """
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    async def generate(
+        self,
+        prompt: str,
+        model_name: str,
+        generation_config: dict[str, Any],
+        distribute_requests: bool = False,
+        cache_name: str | None = None,
+    ) -> str:
+        """Sends one request to the model, within the limits of the pool.
+
+        Args:
+            prompt (str): The prompt of the request.
+            model_name (str): The model to call.
+            generation_config (dict): The generation parameters of the model.
+            distribute_requests (bool): Whether the request may go to any region.
+              Otherwise it goes to the default region of the backend.
+            cache_name (str, optional): The cached content to call the model with.
+
+        Returns:
+            str: The text of the model response.
+        """
+        async with self._semaphore:
+            await self._bucket.acquire()
+            region = None
+            if distribute_requests and self.balancer is not None:
+                region = self.balancer.choose()
+            start = time.monotonic()
+            try:
+                response = await self.backend.generate(
+                    prompt, model_name, region, generation_config, cache_name
+                )
+            except asyncio.CancelledError:
+                if region is not None:
+                    self.balancer.release(region)
+                raise
+            except Exception:
+                if region is not None:
+                    self.balancer.record(region, None)
+                raise
+            if region is not None:
+                self.balancer.record(region, time.monotonic() - start)
+            return response
+
+    def close(self) -> None:
+        """Stops the event loop of the pool."""
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
@@ -14,12 +14,14 @@
 
 """This code contains the LLM utils for the CHASE-SQL Agent."""
 
+import asyncio
+import dataclasses
 import functools
 import os
 import random
+import threading
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Callable, List, Optional
+from typing import Any, Awaitable, Callable, List, Optional
 
 import dotenv
 import vertexai
@@ -29,6 +31,8 @@ from vertexai.generative_models import (GenerationConfig, HarmBlockThreshold,
 from vertexai.preview import caching
 from vertexai.preview.generative_models import GenerativeModel
 
+from .llm_pool import LLMClientPool  # pylint: disable=g-importing-member
+
 dotenv.load_dotenv(override=True)
 
 SAFETY_FILTER_CONFIG = {
@@ -79,6 +83,81 @@ aiplatform.init(
 )
 vertexai.init(project=GCP_PROJECT, location=GCP_LOCATION)
 
+# Limits of the LLM client pool shared by all sessions of the process.
+LLM_MAX_CONCURRENCY = int(os.getenv("CHASE_LLM_MAX_CONCURRENCY", "16"))
+LLM_REQUESTS_PER_SECOND = float(os.getenv("CHASE_LLM_REQUESTS_PER_SECOND", "10"))
+LLM_BURST = int(os.getenv("CHASE_LLM_BURST", str(LLM_MAX_CONCURRENCY)))
+
+_llm_pool = None
+_llm_pool_lock = threading.Lock()
+
+
+@dataclasses.dataclass(frozen=True)
+class RetryPolicy:
+    """Retry policy with exponential backoff and jitter.
+
+    Attributes:
+        max_attempts (int): The maximum number of attempts.
+        base_delay (float): The base delay in seconds for the exponential backoff.
+        backoff_factor (float): The factor by which to multiply the delay for each
+          subsequent attempt.
+        max_delay (float): The maximum delay in seconds between two attempts.
+    """
+
+    max_attempts: int = 6
+    base_delay: float = 1
+    backoff_factor: float = 2
+    max_delay: float = 30
+
+    def get_delay(self, attempts: int) -> float:
+        """Returns the delay in seconds after the given number of failed attempts."""
+        delay = min(self.base_delay * (self.backoff_factor**attempts), self.max_delay)
+        return delay + random.uniform(0, 0.1 * delay)
+
+    def call(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Calls `func` until it succeeds or `max_attempts` attempts failed.
+
+        Args:
+            func (callable): The function to call.
+            *args: The positional arguments of `func`.
+            **kwargs: The keyword arguments of `func`.
+
+        Returns:
+            Any: The return value of `func`.
+        """
+        attempts = 0
+        while True:
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                print(f"Attempt {attempts + 1} failed with error: {e}")
+                attempts += 1
+                if attempts >= self.max_attempts:
+                    raise e
+                time.sleep(self.get_delay(attempts))
+
+    async def acall(self, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """Awaits `func` until it succeeds or `max_attempts` attempts failed.
+
+        Args:
+            func (callable): The coroutine function to call.
+            *args: The positional arguments of `func`.
+            **kwargs: The keyword arguments of `func`.
+
+        Returns:
+            Any: The return value of `func`.
+        """
+        attempts = 0
+        while True:
+            try:
+                return await func(*args, **kwargs)
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                print(f"Attempt {attempts + 1} failed with error: {e}")
+                attempts += 1
+                if attempts >= self.max_attempts:
+                    raise e
+                await asyncio.sleep(self.get_delay(attempts))
+
 
 def retry(max_attempts=8, base_delay=1, backoff_factor=2):
     """Decorator to add retry logic to a function.
@@ -92,30 +171,102 @@ def retry(max_attempts=8, base_delay=1, backoff_factor=2):
     Returns:
         Callable: The decorator function.
     """
+    policy = RetryPolicy(
+        max_attempts=max_attempts,
+        base_delay=base_delay,
+        backoff_factor=backoff_factor,
+        max_delay=float("inf"),
+    )
 
     def decorator(func):
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            attempts = 0
-            while attempts < max_attempts:
-                try:
-                    return func(*args, **kwargs)
-                except Exception as e:  # pylint: disable=broad-exception-caught
-                    print(f"Attempt {attempts + 1} failed with error: {e}")
-                    attempts += 1
-                    if attempts >= max_attempts:
-                        raise e
-                    delay = base_delay * (backoff_factor**attempts)
-                    delay = delay + random.uniform(0, 0.1 * delay)
-                    time.sleep(delay)
+            return policy.call(func, *args, **kwargs)
 
         return wrapper
 
     return decorator
 
 
+class GeminiBackend:
+    """Backend of the LLM client pool that calls Gemini on Vertex AI.
+
+    The model objects are created once per model, region and cache, so their
+    connections are reused by all requests of the pool.
+    """
+
+    def __init__(self):
+        self._models = {}
+
+    def get_model(
+        self, model_name: str, region: str | None, cache_name: str | None
+    ) -> GenerativeModel:
+        """Returns the model object of the given model, region and cache."""
+        key = (model_name, region, cache_name)
+        if key not in self._models:
+            if cache_name is not None:
+                cached_content = caching.CachedContent(cached_content_name=cache_name)
+                model = GenerativeModel.from_cached_content(
+                    cached_content=cached_content
+                )
+            elif region is not None:
+                model = GenerativeModel(
+                    model_name=GEMINI_URL.format(
+                        GCP_PROJECT=GCP_PROJECT, region=region, model_name=model_name
+                    )
+                )
+            else:
+                model = GenerativeModel(model_name=model_name)
+            self._models[key] = model
+        return self._models[key]
+
+    async def generate(
+        self,
+        prompt: str,
+        model_name: str,
+        region: str | None,
+        generation_config: dict[str, Any],
+        cache_name: str | None = None,
+    ) -> str:
+        """Returns the text of the Gemini response to `prompt`."""
+        model = self.get_model(model_name, region, cache_name)
+        response = await model.generate_content_async(
+            prompt,
+            generation_config=GenerationConfig(**generation_config),
+            safety_settings=SAFETY_FILTER_CONFIG,
+        )
+        return response.text
+
+
+def get_llm_pool() -> LLMClientPool:
+    """Returns the LLM client pool shared by all sessions of the process."""
+    global _llm_pool
+    if _llm_pool is None:
+        with _llm_pool_lock:
+            if _llm_pool is None:
+                _llm_pool = LLMClientPool(
+                    GeminiBackend(),
+                    max_concurrency=LLM_MAX_CONCURRENCY,
+                    requests_per_second=LLM_REQUESTS_PER_SECOND,
+                    burst=LLM_BURST,
+                    regions=GEMINI_AVAILABLE_REGIONS,
+                )
+    return _llm_pool
+
+
+def set_llm_pool(pool: LLMClientPool | None) -> None:
+    """Replaces the shared LLM client pool, e.g. by one with a fake backend."""
+    global _llm_pool
+    with _llm_pool_lock:
+        _llm_pool = pool
+
+
 class GeminiModel:
-    """Class for the Gemini model."""
+    """Class for the Gemini model.
+
+    Requests go through the shared LLM client pool, so models are cheap to
+    create and their calls share the limits of the pool.
+    """
 
     def __init__(
         self,
@@ -124,32 +275,49 @@ class GeminiModel:
         distribute_requests: bool = False,
         cache_name: str | None = None,
         temperature: float = 0.01,
+        retry_policy: RetryPolicy | None = None,
+        pool: LLMClientPool | None = None,
         **kwargs,
     ):
         self.model_name = model_name
+        self.retry_policy = retry_policy or RetryPolicy()
         self.finetuned_model = finetuned_model
         self.arguments = kwargs
         self.distribute_requests = distribute_requests
+        self.cache_name = cache_name
         self.temperature = temperature
-        model_name = self.model_name
-        if not self.finetuned_model and self.distribute_requests:
-            random_region = random.choice(GEMINI_AVAILABLE_REGIONS)
-            model_name = GEMINI_URL.format(
-                GCP_PROJECT=GCP_PROJECT,
-                region=random_region,
-                model_name=self.model_name,
-            )
-        if cache_name is not None:
-            cached_content = caching.CachedContent(cached_content_name=cache_name)
-            self.model = GenerativeModel.from_cached_content(
-                cached_content=cached_content
-            )
-        else:
-            self.model = GenerativeModel(model_name=model_name)
+        self.pool = pool or get_llm_pool()
+
+    async def _generate_once(self, prompt: str, parser_func=None) -> str:
+        """Calls the Gemini model once with the given prompt."""
+        response = await self.pool.generate(
+            prompt,
+            self.model_name,
+            generation_config=dict(temperature=self.temperature, **self.arguments),
+            distribute_requests=self.distribute_requests and not self.finetuned_model,
+            cache_name=self.cache_name,
+        )
+        if parser_func:
+            # Parsers may be slow, keep them off the event loop of the pool.
+            return await asyncio.to_thread(parser_func, response)
+        return response
+
+    async def acall(self, prompt: str, parser_func=None) -> str:
+        """Calls the Gemini model with the given prompt, retrying on errors.
+
+        Args:
+            prompt (str): The prompt to call the model with.
+            parser_func (callable, optional): A function that processes the LLM
+              output. It takes the model"s response as input and returns the
+              processed result.
+
+        Returns:
+            str: The processed response from the model.
+        """
+        return await self.retry_policy.acall(self._generate_once, prompt, parser_func)
 
-    @retry(max_attempts=12, base_delay=2, backoff_factor=2)
     def call(self, prompt: str, parser_func=None) -> str:
-        """Calls the Gemini model with the given prompt.
+        """Calls the Gemini model with the given prompt, retrying on errors.
 
         Args:
             prompt (str): The prompt to call the model with.
@@ -160,74 +328,162 @@ class GeminiModel:
         Returns:
             str: The processed response from the model.
         """
-        response = self.model.generate_content(
-            prompt,
-            generation_config=GenerationConfig(
-                temperature=self.temperature,
-                **self.arguments,
-            ),
-            safety_settings=SAFETY_FILTER_CONFIG,
-        ).text
-        if parser_func:
-            return parser_func(response)
-        return response
+        return self.pool.run(self.acall(prompt, parser_func))
 
-    def call_parallel(
+    async def acall_parallel(
         self,
         prompts: List[str],
         parser_func: Optional[Callable[[str], str]] = None,
         timeout: int = 60,
-        max_retries: int = 5,
+        max_retries: int | None = None,
     ) -> List[Optional[str]]:
-        """Calls the Gemini model for multiple prompts in parallel using threads with retry logic.
+        """Calls the Gemini model for multiple prompts concurrently with retry logic.
 
         Args:
             prompts (List[str]): A list of prompts to call the model with.
             parser_func (callable, optional): A function to process each response.
-            timeout (int): The maximum time (in seconds) to wait for each thread.
-            max_retries (int): The maximum number of retries for timed-out threads.
+            timeout (int): The maximum time (in seconds) to wait for the responses.
+            max_retries (int, optional): The maximum number of retries of each
+              prompt. Defaults to the retries of `retry_policy`.
 
         Returns:
             List[Optional[str]]:
-            A list of responses, or None for threads that failed.
+            A list of responses, with None for prompts that failed or timed out.
         """
-        results = [None] * len(prompts)
-
-        def worker(index: int, prompt: str):
-            """Thread worker function to call the model and store the result with retries."""
-            retries = 0
-            while retries <= max_retries:
-                try:
-                    return self.call(prompt, parser_func)
-                except Exception as e:  # pylint: disable=broad-exception-caught
-                    print(f"Error for prompt {index}: {str(e)}")
-                    retries += 1
-                    if retries <= max_retries:
-                        print(f"Retrying ({retries}/{max_retries}) for prompt {index}")
-                        time.sleep(1)  # Small delay before retrying
-                    else:
-                        return f"Error after retries: {str(e)}"
-
-        # Create and start one thread for each prompt
-        with ThreadPoolExecutor(max_workers=len(prompts)) as executor:
-            future_to_index = {
-                executor.submit(worker, i, prompt): i
-                for i, prompt in enumerate(prompts)
-            }
-
-            for future in as_completed(future_to_index, timeout=timeout):
-                index = future_to_index[future]
-                try:
-                    results[index] = future.result()
-                except Exception as e:  # pylint: disable=broad-exception-caught
-                    print(f"Unhandled error for prompt {index}: {e}")
-                    results[index] = "Unhandled Error"
-
-        # Handle remaining unfinished tasks after the timeout
-        for future in future_to_index:
-            index = future_to_index[future]
-            if not future.done():
-                print(f"Timeout occurred for prompt {index}")
-                results[index] = "Timeout"
+        retry_policy = self.retry_policy
+        if max_retries is not None:
+            retry_policy = dataclasses.replace(
+                retry_policy, max_attempts=max_retries + 1
+            )
+
+        async def worker(index: int, prompt: str):
+            """Calls the model and returns the result, or None after retries."""
+            try:
+                return await retry_policy.acall(
+                    self._generate_once, prompt, parser_func
+                )
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                print(f"Error for prompt {index}: {str(e)}")
+                return None
 
+        tasks = [
+            asyncio.create_task(worker(i, prompt)) for i, prompt in enumerate(prompts)
+        ]
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        results = []
+        for index, task in enumerate(tasks):
+            if task in pending:
+                print(f"Timeout occurred for prompt {index}")
+                task.cancel()
+                results.append(None)
+            else:
+                results.append(task.result())
         return results
+
+    def call_parallel(
+        self,
+        prompts: List[str],
+        parser_func: Optional[Callable[[str], str]] = None,
+        timeout: int = 60,
+        max_retries: int | None = None,
+    ) -> List[Optional[str]]:
+        """Calls the Gemini model for multiple prompts concurrently with retry logic.
+
+        Args:
+            prompts (List[str]): A list of prompts to call the model with.
+            parser_func (callable, optional): A function to process each response.
+            timeout (int): The maximum time (in seconds) to wait for the responses.
+            max_retries (int, optional): The maximum number of retries of each
+              prompt. Defaults to the retries of `retry_policy`.
+
+        Returns:
+            List[Optional[str]]:
+            A list of responses, with None for prompts that failed or timed out.
+        """
+        return self.pool.run(
+            self.acall_parallel(prompts, parser_func, timeout, max_retries)
+        )
+
+    async def acall_first(
+        self,
+        prompts: List[str],
+        parser_func: Optional[Callable[[str], str]] = None,
+        validate_func: Optional[Callable[[str], bool]] = None,
+        timeout: int = 60,
+    ) -> Optional[str]:
+        """Calls the Gemini model for multiple prompts and returns the first valid response.
+
+        The prompts are sent concurrently. As soon as one response is parsed and
+        passes `validate_func`, it is returned and the other calls are cancelled.
+
+        Args:
+            prompts (List[str]): A list of prompts to call the model with.
+            parser_func (callable, optional): A function to process each response.
+            validate_func (callable, optional): A function that returns True if a
+              processed response is valid. By default, any response is valid.
+            timeout (int): The maximum time (in seconds) to wait for a response.
+
+        Returns:
+            Optional[str]: The first valid response. If no response is valid, the
+            first response that was received, or None if all calls failed.
+        """
+        tasks = [
+            asyncio.create_task(self.acall(prompt, parser_func)) for prompt in prompts
+        ]
+        pending = set(tasks)
+        deadline = time.monotonic() + timeout
+        first_response = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=max(deadline - time.monotonic(), 0),
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    print("Timeout occurred while waiting for candidates")
+                    break
+                for task in (task for task in tasks if task in done):
+                    try:
+                        response = task.result()
+                    except Exception as e:  # pylint: disable=broad-exception-caught
+                        print(f"Error for candidate: {e}")
+                        continue
+                    if response is None:
+                        continue
+                    if validate_func is None or await asyncio.to_thread(
+                        validate_func, response
+                    ):
+                        return response
+                    if first_response is None:
+                        first_response = response
+        finally:
+            for task in pending:
+                task.cancel()
+        return first_response
+
+    def call_first(
+        self,
+        prompts: List[str],
+        parser_func: Optional[Callable[[str], str]] = None,
+        validate_func: Optional[Callable[[str], bool]] = None,
+        timeout: int = 60,
+    ) -> Optional[str]:
+        """Calls the Gemini model for multiple prompts and returns the first valid response.
+
+        See `acall_first`.
+
+        Args:
+            prompts (List[str]): A list of prompts to call the model with.
+            parser_func (callable, optional): A function to process each response.
+            validate_func (callable, optional): A function that returns True if a
+              processed response is valid. By default, any response is valid.
+            timeout (int): The maximum time (in seconds) to wait for a response.
+
+        Returns:
+            Optional[str]: The first valid response. If no response is valid, the
+            first response that was received, or None if all calls failed.
+        """
+        return self.pool.run(
+            self.acall_first(prompts, parser_func, validate_func, timeout)
+        )
@@ -14,12 +14,18 @@
 
 """Translator from SQLite to BigQuery."""
 
+import collections
+import dataclasses
+import hashlib
+import json
 import re
+import threading
 from typing import Any, Final
 
 import regex
 import sqlglot
 import sqlglot.optimizer
+import sqlglot.schema
 
 from ..llm_utils import GeminiModel  # pylint: disable=g-importing-member
 from .correction_prompt_template import (
@@ -37,6 +43,9 @@ SQLGlotSchemaType = dict[str, Any]
 
 BirdSampleType = dict[str, Any]
 
+# Number of checked queries whose results a translator context keeps.
+MAX_CHECKED_QUERIES: Final[int] = 256
+
 
 def _isinstance_list_of_str_tuples_lists(obj: Any) -> bool:
     """Checks if the object is a list of tuples or listsof strings."""
@@ -87,6 +96,75 @@ def _isinstance_bird_sample_type(obj: Any) -> bool:
     return isinstance(obj, dict) and not _isinstance_sqlglot_schema_type(obj)
 
 
+def get_schema_hash(schema: Any) -> str:
+    """Returns a hash of the DDL schema, in any of the supported formats."""
+    if not isinstance(schema, str):
+        schema = json.dumps(schema, sort_keys=True, default=str)
+    return hashlib.sha256(schema.encode("utf-8")).hexdigest()
+
+
+def _get_table_columns(schema_dict: SQLGlotSchemaType | None) -> dict[str, dict]:
+    """Returns the columns of each table of a nested SQLGlot schema."""
+    table_columns = {}
+    for name, value in (schema_dict or {}).items():
+        if all(isinstance(v, str) for v in value.values()):
+            table_columns[name] = value
+        else:
+            table_columns.update(_get_table_columns(value))
+    return table_columns
+
+
+@dataclasses.dataclass
+class TranslatorContext:
+    """Schema of a DDL, parsed once for all the translations that use it.
+
+    Attributes:
+      schema_hash: The hash of the DDL schema.
+      schema_dict: The schema in the SQLGlot format.
+      table_columns: The columns and their types of each table, by table name.
+      mapping_schema: The SQLGlot schema of the output dialect, or None if there
+        is no schema.
+    """
+
+    schema_hash: str
+    schema_dict: SQLGlotSchemaType | None
+    table_columns: dict[str, SQLGlotColumnsDictType]
+    mapping_schema: sqlglot.schema.MappingSchema | None
+    _checked: collections.OrderedDict = dataclasses.field(
+        default_factory=collections.OrderedDict, repr=False
+    )
+    _lock: threading.Lock = dataclasses.field(
+        default_factory=threading.Lock, repr=False
+    )
+
+    def check_for_errors(
+        self,
+        sql_query: str,
+        sql_dialect: str,
+        db: str | None = None,
+        catalog: str | None = None,
+    ) -> tuple[str | None, str]:
+        """`SqlTranslator._check_for_errors` against this schema, memoized."""
+        key = (sql_query, sql_dialect, db, catalog)
+        with self._lock:
+            if key in self._checked:
+                self._checked.move_to_end(key)
+                return self._checked[key]
+        # pylint: disable-next=protected-access
+        errors_and_sql = SqlTranslator._check_for_errors(
+            sql_query=sql_query,
+            sql_dialect=sql_dialect,
+            db=db,
+            catalog=catalog,
+            schema_dict=self.mapping_schema,
+        )
+        with self._lock:
+            self._checked[key] = errors_and_sql
+            if len(self._checked) > MAX_CHECKED_QUERIES:
+                self._checked.popitem(last=False)
+        return errors_and_sql
+
+
 class SqlTranslator:
     """Translator from SQLite to BigQuery.
 
@@ -118,6 +196,12 @@ class SqlTranslator:
 
     INPUT_DIALECT: Final[str] = "sqlite"
     OUTPUT_DIALECT: Final[str] = "bigquery"
+    MAX_CONTEXTS: Final[int] = 16
+
+    _contexts: collections.OrderedDict[str, TranslatorContext] = (
+        collections.OrderedDict()
+    )
+    _contexts_lock: threading.Lock = threading.Lock()
 
     def __init__(
         self,
@@ -296,6 +380,49 @@ class SqlTranslator:
                 raise TypeError(f"Unsupported schema type: {type(schema)}")
         return schema_dict
 
+    @classmethod
+    def get_context(
+        cls, schema: str | SQLGlotSchemaType | BirdSampleType | None
+    ) -> TranslatorContext:
+        """Returns the translator context of the schema, parsing it only once.
+
+        Contexts are kept for the `MAX_CONTEXTS` most recently used schemas and
+        are shared by all translators.
+
+        Args:
+          schema: The DDL schema, in any format of `rewrite_schema_for_sqlglot`.
+
+        Returns:
+          The translator context of the schema.
+        """
+        schema_hash = get_schema_hash(schema)
+        with cls._contexts_lock:
+            if schema_hash in cls._contexts:
+                cls._contexts.move_to_end(schema_hash)
+                return cls._contexts[schema_hash]
+        schema_dict = cls.rewrite_schema_for_sqlglot(schema)
+        context = TranslatorContext(
+            schema_hash=schema_hash,
+            schema_dict=schema_dict,
+            table_columns=_get_table_columns(schema_dict),
+            mapping_schema=(
+                sqlglot.schema.MappingSchema(schema_dict, dialect=cls.OUTPUT_DIALECT)
+                if schema_dict
+                else None
+            ),
+        )
+        with cls._contexts_lock:
+            context = cls._contexts.setdefault(schema_hash, context)
+            if len(cls._contexts) > cls.MAX_CONTEXTS:
+                cls._contexts.popitem(last=False)
+        return context
+
+    @classmethod
+    def clear_contexts(cls) -> None:
+        """Drops the translator contexts of all schemas."""
+        with cls._contexts_lock:
+            cls._contexts.clear()
+
     @classmethod
     def _check_for_errors(
         cls,
@@ -303,7 +430,7 @@ class SqlTranslator:
         sql_dialect: str,
         db: str | None = None,
         catalog: str | None = None,
-        schema_dict: SQLGlotSchemaType | None = None,
+        schema_dict: SQLGlotSchemaType | sqlglot.schema.Schema | None = None,
     ) -> tuple[str | None, str]:
         """Checks for errors in the SQL query.
 
@@ -314,7 +441,8 @@ class SqlTranslator:
           catalog: The catalog to use for the translation. `catalog` is the SQLGlot
             term for the project ID. This field is optional.
           schema_dict: The DDL schema to use for the translation. The DDL format is
-            in the SQLGlot format. This field is optional.
+            in the SQLGlot format, or a prebuilt SQLGlot schema. This field is
+            optional.
 
         Returns:
           tuple of the errors in the SQL query, or None if there are no errors, and
@@ -327,8 +455,14 @@ class SqlTranslator:
                 read=sql_dialect.lower(),
                 error_level=sqlglot.ErrorLevel.IMMEDIATE,
             )
-            # Then add the database and catalog information for each table to the AST.
+            # Then add the database and catalog information for each table to the AST,
+            # except for references to common table expressions.
+            cte_names = {
+                cte.alias_or_name for cte in sql_query_ast.find_all(sqlglot.exp.CTE)
+            }
             for table in sql_query_ast.find_all(sqlglot.exp.Table):
+                if not table.db and table.name in cte_names:
+                    continue
                 table.set("catalog", sqlglot.exp.Identifier(this=catalog, quoted=True))
                 table.set("db", sqlglot.exp.Identifier(this=db, quoted=True))
             # Then, try to optimize the SQL query.
@@ -375,14 +509,14 @@ class SqlTranslator:
         if apply_heuristics:
             sql_query = self._apply_heuristics(sql_query)
         # Reformat the schema if provided. This will remove any comments and
-        # `INSERT INTO` statements.
-        schema_dict = self.rewrite_schema_for_sqlglot(ddl_schema)
-        errors_and_sql: tuple[str | None, str] = self._check_for_errors(
+        # `INSERT INTO` statements. The schema is only parsed on its first use.
+        context = self.get_context(ddl_schema)
+        schema_dict = context.schema_dict
+        errors_and_sql: tuple[str | None, str] = context.check_for_errors(
             sql_query=sql_query,
             sql_dialect=self.OUTPUT_DIALECT,
             db=db,
             catalog=catalog,
-            schema_dict=schema_dict,
         )
         errors, sql_query = errors_and_sql
         responses = sql_query  # Default to the input SQL query after error check.
@@ -0,0 +1,174 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Hand-off of query results from the database agent to the analytics agent.
+
+The Arrow table of a query result is saved as a Parquet artifact. Session
+state only keeps a reference to the artifact with the schema, a statistical
+summary of each column and a few sample rows, which is all that goes into
+prompts. The analytics code executor gets the Parquet file itself.
+"""
+
+import base64
+import datetime
+import decimal
+import json
+import logging
+
+from google.genai import types
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+RESULT_FILE_NAME = "query_result.parquet"
+PARQUET_MIME_TYPE = "application/vnd.apache.parquet"
+# Number of rows of the result put into prompts as a sample.
+SAMPLE_ROWS = 5
+# Number of most frequent values in the summary of a string column.
+TOP_VALUES = 3
+
+
+def to_json_value(value):
+    """Converts an Arrow scalar value to a JSON-friendly value."""
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, datetime.timedelta):
+        return value.total_seconds()
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode()
+    if isinstance(value, list):
+        return [to_json_value(v) for v in value]
+    if isinstance(value, dict):
+        return {k: to_json_value(v) for k, v in value.items()}
+    return value
+
+
+def table_to_parquet(table):
+    """Serializes an Arrow table to Parquet bytes."""
+    sink = pa.BufferOutputStream()
+    pq.write_table(table, sink)
+    return sink.getvalue().to_pybytes()
+
+
+def summarize_column(name, column):
+    """Returns the type and summary statistics of a column.
+
+    Args:
+        name (str): The column name.
+        column (pyarrow.ChunkedArray): The column values.
+
+    Returns:
+        dict: The column name, type and null count, with the min, max and mean
+          of numeric columns, the min and max of temporal columns, and the
+          number of distinct values and most frequent values of string columns.
+    """
+    summary = {"name": name, "type": str(column.type), "null_count": column.null_count}
+    if len(column) == column.null_count:
+        return summary
+    column_type = column.type
+    if pa.types.is_integer(column_type) or pa.types.is_floating(column_type):
+        min_max = pc.min_max(column).as_py()
+        summary.update(
+            min=min_max["min"], max=min_max["max"], mean=pc.mean(column).as_py()
+        )
+    elif pa.types.is_decimal(column_type) or pa.types.is_temporal(column_type):
+        min_max = pc.min_max(column).as_py()
+        summary.update(min=min_max["min"], max=min_max["max"])
+    elif pa.types.is_string(column_type) or pa.types.is_large_string(column_type):
+        counts = pc.value_counts(column.drop_null()).to_pylist()
+        counts.sort(key=lambda c: -c["counts"])
+        summary.update(
+            distinct_count=len(counts),
+            top_values=[
+                {"value": c["values"], "count": c["counts"]}
+                for c in counts[:TOP_VALUES]
+            ],
+        )
+    return to_json_value(summary)
+
+
+def summarize_table(table):
+    """Returns the summary of each column of an Arrow table."""
+    return [
+        summarize_column(name, column)
+        for name, column in zip(table.column_names, table.columns)
+    ]
+
+
+async def save_query_result(tool_context, table, truncated=False):
+    """Saves a query result as a Parquet artifact.
+
+    If the runner has no artifact service, the Parquet file is kept in the
+    reference instead.
+
+    Args:
+        tool_context (ToolContext): The tool context of the query.
+        table (pyarrow.Table): The query result.
+        truncated (bool): Whether rows of the result were left out.
+
+    Returns:
+        dict: The reference to the result to keep in session state, with the
+          artifact name and version, the number of rows, the column summaries
+          and the first rows of the result.
+    """
+    data = table_to_parquet(table)
+    reference = {
+        "artifact": RESULT_FILE_NAME,
+        "version": None,
+        "num_rows": table.num_rows,
+        "truncated": truncated,
+        "columns": summarize_table(table),
+        "sample": to_json_value(table.slice(0, SAMPLE_ROWS).to_pylist()),
+    }
+    try:
+        reference["version"] = await tool_context.save_artifact(
+            RESULT_FILE_NAME,
+            types.Part.from_bytes(data=data, mime_type=PARQUET_MIME_TYPE),
+        )
+    except ValueError as e:
+        # Raised when the runner has no artifact service.
+        logging.warning("Keeping the query result in session state: %s", e)
+        reference["artifact"] = None
+        reference["data"] = base64.b64encode(data).decode()
+    return reference
+
+
+async def load_query_result(tool_context, reference):
+    """Loads the Parquet bytes of a saved query result.
+
+    Args:
+        tool_context (ToolContext): The tool context.
+        reference (dict): The reference returned by `save_query_result`.
+
+    Returns:
+        bytes: The Parquet file of the result, or None if it was not found.
+    """
+    if reference.get("data") is not None:
+        return base64.b64decode(reference["data"])
+    artifact = await tool_context.load_artifact(
+        reference["artifact"], version=reference["version"]
+    )
+    if artifact is None or artifact.inline_data is None:
+        return None
+    return artifact.inline_data.data
+
+
+def describe_query_result(reference):
+    """Describes a saved query result for a prompt, without its full data."""
+    return json.dumps(
+        {key: reference[key] for key in ("num_rows", "truncated", "columns", "sample")},
+        indent=1,
+    )
@@ -0,0 +1,184 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Relevance-based pruning of the DDL schema put into prompts.
+
+`SchemaIndex` splits the DDL from `get_bigquery_schema` into tables and keeps
+a lexical signature of each: the words of its name, column names, column
+descriptions and example values. `select_schema` ranks the tables by their
+BM25 score for the question and keeps the most relevant ones that fit in a
+token budget. Schemas that fit in the budget are used unchanged, and the
+names of the tables left out are listed in the selected schema.
+"""
+
+import collections
+import functools
+import math
+import os
+import re
+
+# Approximate number of schema tokens put into a prompt, or 0 to disable pruning.
+SCHEMA_TOKEN_BUDGET = int(os.getenv("BQ_SCHEMA_TOKEN_BUDGET", "30000"))
+# Approximate number of characters per token.
+CHARS_PER_TOKEN = 4
+
+# Weights of the words of each part of a table signature.
+NAME_WEIGHT = 3.0
+COLUMN_WEIGHT = 2.0
+DESCRIPTION_WEIGHT = 1.0
+EXAMPLE_WEIGHT = 0.5
+# BM25 parameters.
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from how in is it of on or per show the to"
+    " what when where which who with".split()
+)
+
+_TABLE_START = re.compile(r"(?=^CREATE\s+(?:OR\s+REPLACE\s+)?TABLE\s)", re.M)
+_TABLE_NAME = re.compile(r"TABLE\s+`?([\w.\-]+)`?")
+_COLUMN = re.compile(r"^\s*`?(\w+)`?\s+\w+.*?(?:COMMENT\s+'(.*)')?,?$", re.M)
+_WORD = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+
+
+def estimate_tokens(text):
+    """Returns the approximate number of tokens of a text."""
+    return len(text) // CHARS_PER_TOKEN
+
+
+def tokenize(text):
+    """Splits text and identifiers into lowercase, singular words."""
+    words = []
+    for word in _WORD.findall(text):
+        word = word.lower()
+        if word in STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        words.append(word)
+    return words
+
+
+class TableEntry:
+    """DDL and lexical signature of a table."""
+
+    def __init__(self, block):
+        self.ddl = block
+        create, _, examples = block.partition("\n-- Example values")
+        self.compact_ddl = create.rstrip() + "\n\n"
+        match = _TABLE_NAME.search(create)
+        self.name = match.group(1) if match else ""
+        self.signature = collections.Counter()
+        self._add(self.name.split(".")[-1], NAME_WEIGHT)
+        for column, description in _COLUMN.findall(create.partition("(")[2]):
+            self._add(column, COLUMN_WEIGHT)
+            self._add(description, DESCRIPTION_WEIGHT)
+        self._add(examples.partition("\n")[2], EXAMPLE_WEIGHT)
+        self.length = sum(self.signature.values())
+
+    def _add(self, text, weight):
+        for word in tokenize(text):
+            self.signature[word] += weight
+
+
+class SchemaIndex:
+    """Lexical index of the tables of a DDL schema.
+
+    Attributes:
+        preamble (str): Text of the schema before the first table.
+        tables (list[TableEntry]): The tables, in the order of the schema.
+        idf (dict): Inverse document frequency of each word.
+    """
+
+    def __init__(self, ddl_schema):
+        blocks = _TABLE_START.split(ddl_schema)
+        self.preamble = blocks[0]
+        self.tables = [TableEntry(block) for block in blocks[1:] if block.strip()]
+        num_tables = len(self.tables)
+        self.avg_length = (
+            sum(t.length for t in self.tables) / num_tables if num_tables else 0.0
+        )
+        doc_freq = collections.Counter(
+            word for table in self.tables for word in table.signature
+        )
+        self.idf = {
+            word: math.log(1 + (num_tables - df + 0.5) / (df + 0.5))
+            for word, df in doc_freq.items()
+        }
+
+    def score(self, table, words):
+        """Returns the BM25 score of a table for the words of a question."""
+        score = 0.0
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * table.length / (self.avg_length or 1))
+        for word in words:
+            tf = table.signature.get(word)
+            if tf:
+                score += self.idf[word] * tf * (BM25_K1 + 1) / (tf + norm)
+        return score
+
+    def rank(self, question):
+        """Returns the table positions, most relevant to the question first."""
+        words = set(tokenize(question or ""))
+        scores = [self.score(table, words) for table in self.tables]
+        return sorted(range(len(self.tables)), key=lambda i: (-scores[i], i))
+
+
+@functools.lru_cache(maxsize=8)
+def get_schema_index(ddl_schema):
+    """Returns the index of a DDL schema, building it on first use."""
+    return SchemaIndex(ddl_schema)
+
+
+def select_schema(ddl_schema, question=None, token_budget=SCHEMA_TOKEN_BUDGET):
+    """Selects the part of the DDL schema to put into a prompt.
+
+    Tables are taken in order of relevance to the question, with their example
+    rows, while they fit in the token budget. A table that does not fit with
+    its example rows is taken without them. Without a question, all tables are
+    taken without example rows while they fit. The selected tables keep their
+    order in the schema, and the names of the other tables are listed in a
+    comment after the preamble.
+
+    Args:
+        ddl_schema (str): The DDL schema from `get_bigquery_schema`.
+        question (str, optional): The natural language question.
+        token_budget (int): Approximate maximum number of tokens, or 0 to keep
+          the whole schema.
+
+    Returns:
+        str: The selected DDL statements.
+    """
+    if token_budget <= 0 or estimate_tokens(ddl_schema) <= token_budget:
+        return ddl_schema
+    index = get_schema_index(ddl_schema)
+    remaining = token_budget - estimate_tokens(index.preamble)
+    selected = {}
+    for i in index.rank(question):
+        table = index.tables[i]
+        texts = (table.ddl, table.compact_ddl) if question else (table.compact_ddl,)
+        text = next((t for t in texts if estimate_tokens(t) <= remaining), None)
+        if text is None and not selected:
+            # Always keep the most relevant table.
+            text = texts[-1]
+        if text is not None:
+            selected[i] = text
+            remaining -= estimate_tokens(text)
+    dropped = [t.name for i, t in enumerate(index.tables) if i not in selected]
+    note = (
+        f"-- Tables left out to fit the prompt: {', '.join(dropped)}\n\n"
+        if dropped
+        else ""
+    )
+    return index.preamble + note + "".join(selected[i] for i in sorted(selected))
@@ -0,0 +1,220 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Local validation of SQL queries before they are sent to BigQuery.
+
+The query is parsed once with SQLGlot. Only a single read-only query is
+allowed, which is decided from the statement types of the parsed tree rather
+than from keywords in the query text. If all tables of the query are in the
+cached schema, its tables and columns are also resolved against the schema.
+"""
+
+import logging
+
+import sqlglot
+from sqlglot import exp
+
+from .chase_sql.sql_postprocessor.sql_translator import SqlTranslator
+
+SQL_DIALECT = "bigquery"
+
+# Statement types that write data, change the schema or run other statements.
+DISALLOWED_EXPRESSIONS = tuple(
+    getattr(exp, name)
+    for name in (
+        "Insert",
+        "Update",
+        "Delete",
+        "Merge",
+        "Create",
+        "Drop",
+        "Alter",
+        "TruncateTable",
+        "Grant",
+        "Copy",
+        "LoadData",
+        "Export",
+        "Command",
+    )
+    if hasattr(exp, name)
+)
+# Column types whose fields are read like columns, which SQLGlot cannot resolve.
+NESTED_COLUMN_TYPES = ("RECORD", "STRUCT", "JSON")
+
+
+def validation_error(error_type, message):
+    """Returns a structured validation error."""
+    return {"type": error_type, "message": message}
+
+
+def format_errors(errors):
+    """Formats validation errors as a single message."""
+    return "; ".join(f"{e['type']} error: {e['message']}" for e in errors)
+
+
+def parse_sql(sql_query):
+    """Parses a SQL query into SQLGlot statements.
+
+    Args:
+        sql_query (str): The SQL query.
+
+    Returns:
+        tuple: The parsed statements, or None if the query does not parse, and a
+          list of validation errors.
+    """
+    try:
+        statements = sqlglot.parse(
+            sql_query, read=SQL_DIALECT, error_level=sqlglot.ErrorLevel.IMMEDIATE
+        )
+    except sqlglot.errors.ParseError as e:
+        errors = [
+            validation_error(
+                "syntax",
+                f"{error['description']} (line {error['line']}, column"
+                f" {error['col']})",
+            )
+            for error in e.errors
+        ] or [validation_error("syntax", str(e))]
+        return None, errors
+    except sqlglot.errors.SqlglotError as e:
+        return None, [validation_error("syntax", str(e))]
+    return [statement for statement in statements if statement is not None], []
+
+
+def check_read_only(statements):
+    """Returns errors unless the statements are a single read-only query."""
+    if len(statements) != 1:
+        return [
+            validation_error(
+                "statement",
+                f"Expected a single query, found {len(statements)} statements.",
+            )
+        ]
+    statement = statements[0]
+    disallowed = next(iter(statement.find_all(*DISALLOWED_EXPRESSIONS)), None)
+    if disallowed is not None or not isinstance(statement, exp.Query):
+        statement_type = type(disallowed or statement).__name__.upper()
+        return [
+            validation_error(
+                "statement",
+                f"{statement_type} statements are not allowed, only read-only"
+                " SELECT queries.",
+            )
+        ]
+    return []
+
+
+def is_model_argument(table):
+    """Whether a table node is the MODEL argument of a function like ML.PREDICT."""
+    return isinstance(table.parent, exp.Func) and table.arg_key == "this"
+
+
+def check_schema(
+    statement, sql_query, ddl_schema, db=None, catalog=None, other_tables=()
+):
+    """Resolves the tables and columns of a query against the cached schema.
+
+    Tables of the dataset must be in the schema. Queries that read tables
+    outside the dataset, wildcard tables, models, views or nested columns are
+    left to BigQuery.
+
+    Args:
+        statement (sqlglot.exp.Expression): The parsed query.
+        sql_query (str): The SQL query.
+        ddl_schema (str): The DDL schema of the dataset.
+        db (str, optional): The dataset of the tables.
+        catalog (str, optional): The project of the tables.
+        other_tables (Iterable[str], optional): Names of the views, materialized
+          views and external tables of the dataset, which have no DDL.
+
+    Returns:
+        list: The validation errors.
+    """
+    context = SqlTranslator.get_context(ddl_schema)
+    if not context.table_columns:
+        return []
+    cte_names = {cte.alias_or_name for cte in statement.find_all(exp.CTE)}
+    tables = [
+        table
+        for table in statement.find_all(exp.Table)
+        if table.db or table.name not in cte_names
+    ]
+    # Only plain table names of the dataset are looked up in the schema.
+    in_dataset = [
+        table
+        for table in tables
+        if table.db == db
+        and (not table.catalog or table.catalog == catalog)
+        and isinstance(table.this, exp.Identifier)
+        and "*" not in table.name
+        and "INFORMATION_SCHEMA" not in table.name.upper()
+        and not is_model_argument(table)
+        and table.name not in other_tables
+    ]
+    unknown = [t.name for t in in_dataset if t.name not in context.table_columns]
+    if unknown:
+        return [
+            validation_error(
+                "schema",
+                f"Table `{name}` does not exist in dataset `{db}`. Available"
+                f" tables: {', '.join(context.table_columns)}.",
+            )
+            for name in unknown
+        ]
+    if len(in_dataset) < len(tables):
+        return []
+    for table in in_dataset:
+        columns = context.table_columns[table.name]
+        if any(t.upper() in NESTED_COLUMN_TYPES for t in columns.values()):
+            return []
+    try:
+        errors, _ = context.check_for_errors(
+            sql_query, sql_dialect=SQL_DIALECT, db=db, catalog=catalog
+        )
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        # Leave queries that the optimizer cannot handle to BigQuery.
+        logging.warning("Skipping local schema check: %s", e)
+        return []
+    return [validation_error("schema", errors)] if errors else []
+
+
+def validate_sql(sql_query, ddl_schema=None, db=None, catalog=None, other_tables=()):
+    """Validates a SQL query locally before it is sent to BigQuery.
+
+    Args:
+        sql_query (str): The SQL query.
+        ddl_schema (str, optional): The DDL schema to resolve the query against.
+        db (str, optional): The dataset of the tables.
+        catalog (str, optional): The project of the tables.
+        other_tables (Iterable[str], optional): Names of the views, materialized
+          views and external tables of the dataset.
+
+    Returns:
+        list: The validation errors, as dicts with a `type` of "syntax",
+          "statement" or "schema" and a `message`. Empty if the query is valid.
+    """
+    statements, errors = parse_sql(sql_query)
+    if errors:
+        return errors
+    errors = check_read_only(statements)
+    if errors or not ddl_schema:
+        return errors
+    return check_schema(
+        statements[0],
+        sql_query,
+        ddl_schema,
+        db=db,
+        catalog=catalog,
+        other_tables=other_tables,
+    )
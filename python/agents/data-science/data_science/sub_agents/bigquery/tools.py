@@ -14,17 +14,23 @@
 
 """This file contains the tools used by the database agent."""
 
+import concurrent.futures
 import datetime
+import json
 import logging
 import os
-import re
+import tempfile
 
 from data_science.utils.utils import get_env_var
 from google.adk.tools import ToolContext
 from google.cloud import bigquery
 from google.genai import Client
+import pyarrow as pa
 
 from .chase_sql import chase_constants
+from .result_handoff import save_query_result
+from .schema_index import get_schema_index, select_schema
+from .sql_validation import format_errors, validate_sql
 
 # Assume that `BQ_PROJECT_ID` is set in the environment. See the
 # `data_agent` README for more details.
@@ -33,6 +39,20 @@ location = os.getenv("GOOGLE_CLOUD_LOCATION", "us-central1")
 llm_client = Client(vertexai=True, project=project, location=location)
 
 MAX_NUM_ROWS = 80
+# Results are fetched page by page into the Parquet artifact until this many
+# rows or bytes. Only the first MAX_NUM_ROWS rows are returned to the model.
+MAX_ARTIFACT_ROWS = int(os.getenv("BQ_MAX_ARTIFACT_ROWS", "100000"))
+MAX_RESULT_BYTES = int(os.getenv("BQ_MAX_RESULT_BYTES", str(64 * 1024**2)))
+# Queries that a dry run estimates to scan more bytes than this are rejected.
+MAX_BYTES_SCANNED = int(os.getenv("BQ_MAX_BYTES_SCANNED", str(10 * 1024**3)))
+
+# DDL of each table is cached here, keyed by dataset and table `modified` time.
+SCHEMA_CACHE_DIR = os.getenv(
+    "BQ_SCHEMA_CACHE_DIR", os.path.join(tempfile.gettempdir(), "data_science_schema")
+)
+SCHEMA_CACHE_VERSION = 2
+# Number of tables whose metadata and example rows are fetched concurrently.
+SCHEMA_MAX_WORKERS = 16
 
 
 database_settings = None
@@ -58,32 +78,159 @@ def get_database_settings():
 def update_database_settings():
     """Update database settings."""
     global database_settings
-    ddl_schema = get_bigquery_schema(
+    tables = get_bigquery_tables(
         get_env_var("BQ_DATASET_ID"),
         client=get_bq_client(),
         project_id=get_env_var("BQ_PROJECT_ID"),
     )
+    ddl_schema = tables_to_ddl(tables)
+    # Index the tables for the schema selection of the prompts.
+    get_schema_index(ddl_schema)
     database_settings = {
         "bq_project_id": get_env_var("BQ_PROJECT_ID"),
         "bq_dataset_id": get_env_var("BQ_DATASET_ID"),
         "bq_ddl_schema": ddl_schema,
+        # Views and external tables have no DDL, queries on them are left to
+        # BigQuery.
+        "bq_other_tables": sorted(
+            table_id
+            for table_id, entry in tables.items()
+            if entry["table_type"] != "TABLE"
+        ),
         # Include ChaseSQL-specific constants.
         **chase_constants.chase_sql_constants_dict,
     }
     return database_settings
 
 
-def get_bigquery_schema(dataset_id, client=None, project_id=None):
+def get_table_ddl(client, table_obj):
+    """Generates the DDL with example values for a BigQuery table.
+
+    Args:
+        client (bigquery.Client): A BigQuery client.
+        table_obj (bigquery.Table): The table, as returned by `get_table`.
+
+    Returns:
+        str: The DDL statement, followed by INSERT statements of example rows.
+    """
+    table_ref = table_obj.reference
+    columns = []
+    for field in table_obj.schema:
+        column = f"  `{field.name}` {field.field_type}"
+        if field.mode == "REPEATED":
+            column += " ARRAY"
+        if field.description:
+            column += f" COMMENT '{field.description}'"
+        columns.append(column)
+    parts = [
+        f"CREATE OR REPLACE TABLE `{table_ref}` (\n" + ",\n".join(columns) + "\n);\n\n"
+    ]
+
+    # Add example values if available
+    rows = client.list_rows(table_ref, max_results=5).to_dataframe()
+    if not rows.empty:
+        parts.append(f"-- Example values for table `{table_ref}`:\n")
+        for row in rows.itertuples(index=False, name=None):
+            values = []
+            for value in row:
+                if isinstance(value, str):
+                    values.append(f"'{value}'")
+                elif value is None:
+                    values.append("NULL")
+                else:
+                    values.append(f"{value}")
+            parts.append(
+                f"INSERT INTO `{table_ref}` VALUES\n(" + ",".join(values) + ");\n\n"
+            )
+    return "".join(parts)
+
+
+def get_schema_cache_path(project_id, dataset_id, cache_dir=SCHEMA_CACHE_DIR):
+    """Returns the path of the schema cache file of a dataset."""
+    return os.path.join(cache_dir, f"{project_id}.{dataset_id}.json")
+
+
+def load_schema_cache(cache_path):
+    """Loads the cached DDL of each table, keyed by table ID."""
+    try:
+        with open(cache_path) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if cache.get("version") != SCHEMA_CACHE_VERSION:
+        return {}
+    return cache["tables"]
+
+
+def save_schema_cache(cache_path, tables):
+    """Saves the DDL of each table, replacing the cache file atomically."""
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"version": SCHEMA_CACHE_VERSION, "tables": tables}, f)
+    os.replace(tmp_path, cache_path)
+
+
+def tables_to_ddl(tables):
+    """Joins the DDL of the tables returned by `get_bigquery_tables`."""
+    return "".join(entry["ddl"] for entry in tables.values())
+
+
+def get_bigquery_schema(
+    dataset_id,
+    client=None,
+    project_id=None,
+    cache_dir=SCHEMA_CACHE_DIR,
+    max_workers=SCHEMA_MAX_WORKERS,
+):
     """Retrieves schema and generates DDL with example values for a BigQuery dataset.
 
     Args:
         dataset_id (str): The ID of the BigQuery dataset (e.g., 'my_dataset').
         client (bigquery.Client): A BigQuery client.
         project_id (str): The ID of your Google Cloud Project.
+        cache_dir (str): Directory of the schema cache, or None to disable it.
+        max_workers (int): Number of tables fetched concurrently.
 
     Returns:
         str: A string containing the generated DDL statements.
     """
+    return tables_to_ddl(
+        get_bigquery_tables(
+            dataset_id,
+            client=client,
+            project_id=project_id,
+            cache_dir=cache_dir,
+            max_workers=max_workers,
+        )
+    )
+
+
+def get_bigquery_tables(
+    dataset_id,
+    client=None,
+    project_id=None,
+    cache_dir=SCHEMA_CACHE_DIR,
+    max_workers=SCHEMA_MAX_WORKERS,
+):
+    """Retrieves the type and DDL with example values of each table of a dataset.
+
+    Table metadata and example rows are fetched concurrently. The DDL of each
+    table is cached on disk with the table's `modified` timestamp, so later
+    calls only fetch example rows of the tables that changed. Views,
+    materialized views and external tables are kept without DDL.
+
+    Args:
+        dataset_id (str): The ID of the BigQuery dataset (e.g., 'my_dataset').
+        client (bigquery.Client): A BigQuery client.
+        project_id (str): The ID of your Google Cloud Project.
+        cache_dir (str): Directory of the schema cache, or None to disable it.
+        max_workers (int): Number of tables fetched concurrently.
+
+    Returns:
+        dict: The `table_type`, `modified` timestamp and `ddl` of each table,
+          by table ID. The DDL is empty for objects other than tables.
+    """
 
     if client is None:
         client = bigquery.Client(project=project_id)
@@ -91,50 +238,41 @@ def get_bigquery_schema(dataset_id, client=None, project_id=None):
     # dataset_ref = client.dataset(dataset_id)
     dataset_ref = bigquery.DatasetReference(project_id, dataset_id)
 
-    ddl_statements = ""
+    cache_path = None
+    cached_tables = {}
+    if cache_dir is not None:
+        cache_path = get_schema_cache_path(project_id, dataset_id, cache_dir)
+        cached_tables = load_schema_cache(cache_path)
 
-    for table in client.list_tables(dataset_ref):
-        table_ref = dataset_ref.table(table.table_id)
-        table_obj = client.get_table(table_ref)
+    def get_table_entry(table):
+        table_obj = client.get_table(dataset_ref.table(table.table_id))
+        modified = table_obj.modified.isoformat() if table_obj.modified else None
+        entry = {"table_type": table_obj.table_type, "modified": modified, "ddl": ""}
 
-        # Check if table is a view
+        # Only the schema of tables goes into the prompts.
         if table_obj.table_type != "TABLE":
-            continue
-
-        ddl_statement = f"CREATE OR REPLACE TABLE `{table_ref}` (\n"
-
-        for field in table_obj.schema:
-            ddl_statement += f"  `{field.name}` {field.field_type}"
-            if field.mode == "REPEATED":
-                ddl_statement += " ARRAY"
-            if field.description:
-                ddl_statement += f" COMMENT '{field.description}'"
-            ddl_statement += ",\n"
-
-        ddl_statement = ddl_statement[:-2] + "\n);\n\n"
-
-        # Add example values if available (limited to first row)
-        rows = client.list_rows(table_ref, max_results=5).to_dataframe()
-        if not rows.empty:
-            ddl_statement += f"-- Example values for table `{table_ref}`:\n"
-            for _, row in rows.iterrows():  # Iterate over DataFrame rows
-                ddl_statement += f"INSERT INTO `{table_ref}` VALUES\n"
-                example_row_str = "("
-                for value in row.values:  # Now row is a pandas Series and has values
-                    if isinstance(value, str):
-                        example_row_str += f"'{value}',"
-                    elif value is None:
-                        example_row_str += "NULL,"
-                    else:
-                        example_row_str += f"{value},"
-                example_row_str = (
-                    example_row_str[:-1] + ");\n\n"
-                )  # remove trailing comma
-                ddl_statement += example_row_str
-
-        ddl_statements += ddl_statement
-
-    return ddl_statements
+            return entry
+
+        cached = cached_tables.get(table.table_id)
+        if modified is not None and cached and cached["modified"] == modified:
+            return cached
+        entry["ddl"] = get_table_ddl(client, table_obj)
+        return entry
+
+    tables = list(client.list_tables(dataset_ref))
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=max(1, min(max_workers, len(tables)))
+    ) as executor:
+        entries = list(executor.map(get_table_entry, tables))
+
+    table_entries = {table.table_id: entry for table, entry in zip(tables, entries)}
+    if cache_path is not None and table_entries != cached_tables:
+        try:
+            save_schema_cache(cache_path, table_entries)
+        except OSError as e:
+            logging.warning("Could not save the schema cache: %s", e)
+
+    return table_entries
 
 
 def initial_bq_nl2sql(
@@ -183,7 +321,9 @@ The database structure is defined by the following table schemas (possibly with
 
    """
 
-    ddl_schema = tool_context.state["database_settings"]["bq_ddl_schema"]
+    ddl_schema = select_schema(
+        tool_context.state["database_settings"]["bq_ddl_schema"], question
+    )
 
     prompt = prompt_template.format(
         MAX_NUM_ROWS=MAX_NUM_ROWS, SCHEMA=ddl_schema, QUESTION=question
@@ -206,7 +346,93 @@ The database structure is defined by the following table schemas (possibly with
     return sql
 
 
-def run_bigquery_validation(
+# Arrow types of BigQuery column types, as in the result pages of BigQuery.
+ARROW_TYPES = {
+    "STRING": pa.string(),
+    "BYTES": pa.binary(),
+    "INTEGER": pa.int64(),
+    "INT64": pa.int64(),
+    "FLOAT": pa.float64(),
+    "FLOAT64": pa.float64(),
+    "NUMERIC": pa.decimal128(38, 9),
+    "BIGNUMERIC": pa.decimal256(76, 38),
+    "BOOLEAN": pa.bool_(),
+    "BOOL": pa.bool_(),
+    "TIMESTAMP": pa.timestamp("us", tz="UTC"),
+    "DATE": pa.date32(),
+    "TIME": pa.time64("us"),
+    "DATETIME": pa.timestamp("us"),
+}
+
+
+def to_arrow_field(field):
+    """Converts a BigQuery schema field to an Arrow field."""
+    if field.field_type in ("RECORD", "STRUCT"):
+        arrow_type = pa.struct([to_arrow_field(f) for f in field.fields])
+    else:
+        # GEOGRAPHY, JSON and other types are read as strings.
+        arrow_type = ARROW_TYPES.get(field.field_type, pa.string())
+    if field.mode == "REPEATED":
+        arrow_type = pa.list_(arrow_type)
+    return pa.field(field.name, arrow_type)
+
+
+def fetch_query_result(
+    query_job, max_rows=MAX_ARTIFACT_ROWS, max_bytes=MAX_RESULT_BYTES
+):
+    """Fetches the first rows of a query result as an Arrow table.
+
+    Result pages are downloaded one at a time, and fetching stops as soon as
+    `max_rows` rows or `max_bytes` bytes have been read.
+
+    Args:
+        query_job (bigquery.QueryJob): The query job to fetch results of.
+        max_rows (int): Maximum number of rows to fetch.
+        max_bytes (int): Approximate maximum number of bytes to fetch.
+
+    Returns:
+        tuple: The Arrow table, or None if the query returned no data, and
+          whether rows were left out.
+    """
+    results = query_job.result(page_size=max_rows)
+    if not results.schema:
+        return None, False
+
+    batches = []
+    num_rows = 0
+    num_bytes = 0
+    for batch in results.to_arrow_iterable():
+        batch = batch.slice(0, max_rows - num_rows)
+        batches.append(batch)
+        num_rows += batch.num_rows
+        num_bytes += batch.nbytes
+        if num_rows >= max_rows or num_bytes >= max_bytes:
+            break
+    if batches:
+        table = pa.Table.from_batches(batches)
+    else:
+        # The query returned no rows, and the iterator is already consumed.
+        table = pa.schema([to_arrow_field(f) for f in results.schema]).empty_table()
+    truncated = results.total_rows is not None and results.total_rows > num_rows
+    return table, truncated
+
+
+def to_columns(table):
+    """Converts an Arrow table to a dict of JSON-friendly column value lists."""
+    return {
+        name: [
+            (
+                value
+                if not isinstance(value, datetime.date)
+                else value.strftime("%Y-%m-%d")
+            )
+            for value in values
+        ]
+        for name, values in table.to_pydict().items()
+    }
+
+
+async def run_bigquery_validation(
     sql_string: str,
     tool_context: ToolContext,
 ) -> str:
@@ -217,14 +443,21 @@ def run_bigquery_validation(
 
     1. **SQL Cleanup:**  Preprocesses the SQL string using a `cleanup_sql`
     function
-    2. **DML/DDL Restriction:**  Rejects any SQL queries containing DML or DDL
-       statements (e.g., UPDATE, DELETE, INSERT, CREATE, ALTER) to ensure
-       read-only operations.
-    3. **Syntax and Execution:** Sends the cleaned SQL to BigQuery for validation.
+    2. **Local Validation:**  Parses the query with SQLGlot and rejects it
+       unless it is a single read-only query, based on the statement types in
+       its syntax tree. Tables and columns are resolved against the cached
+       schema. Invalid queries are rejected without a BigQuery round-trip.
+    3. **Cost Check:** Runs the query in dry-run mode and rejects it if it
+       would scan more than `MAX_BYTES_SCANNED` bytes.
+    4. **Syntax and Execution:** Sends the cleaned SQL to BigQuery for validation.
        If the query is syntactically correct and executable, it retrieves the
-       results.
-    4. **Result Analysis:**  Checks if the query produced any results. If so, it
-       formats the first few rows of the result set for inspection.
+       results, page by page, up to `MAX_ARTIFACT_ROWS` rows or
+       `MAX_RESULT_BYTES` bytes.
+    5. **Result Analysis:**  Checks if the query produced any results. If so, it
+       formats the first `MAX_NUM_ROWS` rows of the result set for inspection.
+       All fetched rows are saved as a Parquet artifact, and a reference to it
+       with a summary of its columns is kept in
+       `tool_context.state["query_result"]`.
 
     Args:
         sql_string (str): The SQL query string to validate.
@@ -236,7 +469,8 @@ def run_bigquery_validation(
              - "Valid SQL. Query executed successfully (no results)." if the query
                 is valid but returns no data.
              - "Invalid SQL: ..." if the query is invalid, along with the error
-                message from BigQuery.
+                message from the local validation or from BigQuery. Errors of
+                the local validation are also listed in `validation_errors`.
     """
 
     def cleanup_sql(sql_string):
@@ -256,7 +490,7 @@ def run_bigquery_validation(
 
         # 5. Add limit clause if not present
         if "limit" not in sql_string.lower():
-            sql_string = sql_string + " limit " + str(MAX_NUM_ROWS)
+            sql_string = sql_string + " limit " + str(MAX_ARTIFACT_ROWS)
 
         return sql_string
 
@@ -266,37 +500,56 @@ def run_bigquery_validation(
 
     final_result = {"query_result": None, "error_message": None}
 
-    # More restrictive check for BigQuery - disallow DML and DDL
-    if re.search(
-        r"(?i)(update|delete|drop|insert|create|alter|truncate|merge)", sql_string
-    ):
-        final_result["error_message"] = (
-            "Invalid SQL: Contains disallowed DML/DDL operations."
-        )
+    # Only send valid, read-only queries to BigQuery.
+    database_settings = tool_context.state["database_settings"]
+    errors = validate_sql(
+        sql_string,
+        ddl_schema=database_settings["bq_ddl_schema"],
+        db=database_settings["bq_dataset_id"],
+        catalog=database_settings["bq_project_id"],
+        other_tables=database_settings.get("bq_other_tables", ()),
+    )
+    if errors:
+        final_result["error_message"] = f"Invalid SQL: {format_errors(errors)}"
+        final_result["validation_errors"] = errors
         return final_result
 
     try:
-        query_job = get_bq_client().query(sql_string)
-        results = query_job.result()  # Get the query results
-
-        if results.schema:  # Check if query returned data
-            rows = [
-                {
-                    key: (
-                        value
-                        if not isinstance(value, datetime.date)
-                        else value.strftime("%Y-%m-%d")
-                    )
-                    for (key, value) in row.items()
-                }
-                for row in results
-            ][
-                :MAX_NUM_ROWS
-            ]  # Convert BigQuery RowIterator to list of dicts
+        # Estimate the cost before running the query.
+        dry_run_job = get_bq_client().query(
+            sql_string,
+            job_config=bigquery.QueryJobConfig(dry_run=True, use_query_cache=False),
+        )
+        if (dry_run_job.total_bytes_processed or 0) > MAX_BYTES_SCANNED:
+            final_result["error_message"] = (
+                "Invalid SQL: Query would scan"
+                f" {dry_run_job.total_bytes_processed} bytes, more than the limit"
+                f" of {MAX_BYTES_SCANNED} bytes. Add filters or select fewer"
+                " columns."
+            )
+            return final_result
+
+        query_job = get_bq_client().query(
+            sql_string,
+            job_config=bigquery.QueryJobConfig(maximum_bytes_billed=MAX_BYTES_SCANNED),
+        )
+        table, truncated = fetch_query_result(query_job)
+
+        if table is not None:  # Check if query returned data
+            columns = to_columns(table.slice(0, MAX_NUM_ROWS))
+            rows = [dict(zip(columns, values)) for values in zip(*columns.values())]
             # return f"Valid SQL. Results: {rows}"
             final_result["query_result"] = rows
-
-            tool_context.state["query_result"] = rows
+            if truncated or table.num_rows > len(rows):
+                final_result["error_message"] = (
+                    f"Valid SQL. Results truncated to the first {len(rows)} rows."
+                )
+
+            # Keep the fetched rows as an artifact, referenced from state. It
+            # holds fewer rows than the result if `truncated` is set.
+            tool_context.state["query_result"] = await save_query_result(
+                tool_context, table, truncated
+            )
 
         else:
             final_result["error_message"] = (
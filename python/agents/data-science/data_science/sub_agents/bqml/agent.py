@@ -21,7 +21,9 @@ from google.adk.agents.callback_context import CallbackContext
 
 
 from data_science.sub_agents.bqml.tools import (
+    cancel_bqml_job,
     check_bq_models,
+    check_bqml_job,
     execute_bqml_code,
     rag_response,
 )
@@ -29,6 +31,7 @@ from .prompts import return_instructions_bqml
 
 
 from data_science.sub_agents.bigquery.agent import database_agent as bq_db_agent
+from data_science.sub_agents.bigquery.schema_index import select_schema
 from data_science.sub_agents.bigquery.tools import (
     get_database_settings as get_bq_database_settings,
 )
@@ -46,7 +49,11 @@ def setup_before_agent_call(callback_context: CallbackContext):
     # setting up schema in instruction
     if callback_context.state["all_db_settings"]["use_database"] == "BigQuery":
         callback_context.state["database_settings"] = get_bq_database_settings()
-        schema = callback_context.state["database_settings"]["bq_ddl_schema"]
+        # Large schemas are shortened to the tables that fit without example
+        # rows; the names of the other tables are listed.
+        schema = select_schema(
+            callback_context.state["database_settings"]["bq_ddl_schema"]
+        )
 
         callback_context._invocation_context.agent.instruction = (
             return_instructions_bqml()
@@ -89,5 +96,12 @@ root_agent = Agent(
     name="bq_ml_agent",
     instruction=return_instructions_bqml(),
     before_agent_callback=setup_before_agent_call,
-    tools=[execute_bqml_code, check_bq_models, call_db_agent, rag_response],
+    tools=[
+        execute_bqml_code,
+        check_bqml_job,
+        cancel_bqml_job,
+        check_bq_models,
+        call_db_agent,
+        rag_response,
+    ],
 )
@@ -0,0 +1,358 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Manager of the BigQuery ML jobs started by the BQML agent.
+
+One manager supervises the jobs of every session of the process. A job is
+started on a shared BigQuery client and its handle is returned right away.
+The job is then polled on a background event loop, with a delay that grows
+while the job runs, so quick statements finish with little lag and long
+training jobs cost few requests. Jobs that run longer than their timeout are
+cancelled, and the first rows of their results are kept on the handle.
+"""
+
+import asyncio
+import concurrent.futures
+import dataclasses
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable
+
+from google.cloud import bigquery
+
+# Jobs running longer than this many seconds are cancelled, or 0 for no limit.
+JOB_TIMEOUT_SECONDS = float(os.getenv("BQML_JOB_TIMEOUT_SECONDS", "1500"))
+# Maximum number of result rows kept on a job handle.
+MAX_RESULT_ROWS = 100
+# Maximum number of finished jobs kept by the manager.
+MAX_FINISHED_JOBS = 256
+
+RUNNING = "RUNNING"
+DONE = "DONE"
+FAILED = "FAILED"
+CANCELLED = "CANCELLED"
+TIMED_OUT = "TIMED_OUT"
+
+
+@dataclasses.dataclass(frozen=True)
+class PollPolicy:
+    """Delays between the status checks of a running job.
+
+    Attributes:
+        initial_delay (float): Seconds before the first status check.
+        backoff_factor (float): Factor by which the delay grows after each
+          check.
+        max_delay (float): Maximum seconds between two checks.
+    """
+
+    initial_delay: float = 0.5
+    backoff_factor: float = 1.5
+    max_delay: float = 30.0
+
+    def get_delay(self, attempt: int) -> float:
+        """Returns the delay in seconds after the given number of checks."""
+        return min(self.max_delay, self.initial_delay * self.backoff_factor**attempt)
+
+
+@dataclasses.dataclass
+class BqmlJob:
+    """Handle of a BigQuery ML job.
+
+    Attributes:
+        job_id (str): The BigQuery job ID.
+        query_job (bigquery.QueryJob): The BigQuery job.
+        timeout (float): Seconds after which the job is cancelled, or 0.
+        started_at (float): Monotonic time at which the job started.
+        status (str): RUNNING, DONE, FAILED, CANCELLED or TIMED_OUT.
+        result (list[dict] | None): The first rows of the result.
+        total_rows (int | None): The number of rows of the result.
+        error (str | None): The error of a job that did not finish.
+        finished_at (float | None): Monotonic time at which the job stopped.
+        future (concurrent.futures.Future): Done when the job stops running.
+    """
+
+    job_id: str
+    query_job: Any
+    timeout: float = 0.0
+    started_at: float = dataclasses.field(default_factory=time.monotonic)
+    status: str = RUNNING
+    result: list[dict] | None = None
+    total_rows: int | None = None
+    error: str | None = None
+    finished_at: float | None = None
+    future: concurrent.futures.Future | None = dataclasses.field(
+        default=None, repr=False
+    )
+
+    @property
+    def elapsed_seconds(self) -> float:
+        """Seconds the job ran for, or has been running for."""
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    def to_dict(self) -> dict[str, Any]:
+        """Returns a JSON-friendly summary of the job."""
+        summary = {
+            "job_id": self.job_id,
+            "status": self.status,
+            "elapsed_seconds": round(self.elapsed_seconds, 1),
+        }
+        if self.result is not None:
+            summary["result"] = self.result
+            summary["total_rows"] = self.total_rows
+        if self.error is not None:
+            summary["error"] = self.error
+        return summary
+
+
+def to_json_row(row: Any) -> dict[str, Any]:
+    """Converts a BigQuery row to a dict of JSON-friendly values."""
+    return {
+        key: (
+            value
+            if value is None or isinstance(value, (str, int, float, bool))
+            else str(value)
+        )
+        for key, value in row.items()
+    }
+
+
+class BqmlJobManager:
+    """Starts BigQuery ML jobs and watches them on a background event loop.
+
+    Attributes:
+        client_factory (callable): Creates the BigQuery client of a project.
+        poll_policy (PollPolicy): The delays between status checks of a job.
+        timeout (float): Default seconds after which jobs are cancelled, or 0.
+        jobs (dict[str, BqmlJob]): The jobs, by job ID.
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[[str], Any] | None = None,
+        poll_policy: PollPolicy = PollPolicy(),
+        timeout: float = JOB_TIMEOUT_SECONDS,
+    ):
+        self.client_factory = client_factory or (
+            lambda project_id: bigquery.Client(project=project_id)
+        )
+        self.poll_policy = poll_policy
+        self.timeout = timeout
+        self.jobs = {}
+        self._clients = {}
+        self._lock = threading.Lock()
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self.loop.run_forever, name="bqml-job-manager", daemon=True
+        )
+        self._thread.start()
+
+    def get_client(self, project_id: str) -> Any:
+        """Returns the shared BigQuery client of a project."""
+        with self._lock:
+            if project_id not in self._clients:
+                self._clients[project_id] = self.client_factory(project_id)
+            return self._clients[project_id]
+
+    def start(
+        self, bqml_code: str, project_id: str, timeout: float | None = None
+    ) -> BqmlJob:
+        """Starts a BigQuery ML job without waiting for it to finish.
+
+        Args:
+            bqml_code (str): The BigQuery ML statements to run.
+            project_id (str): The project to run the job in.
+            timeout (float, optional): Seconds after which the job is
+              cancelled, or 0 for no limit. Defaults to the manager timeout.
+
+        Returns:
+            BqmlJob: The handle of the running job.
+        """
+        query_job = self.get_client(project_id).query(bqml_code)
+        return self._add(query_job, timeout)
+
+    def get(self, job_id: str) -> BqmlJob | None:
+        """Returns the handle of a job, or None if the job is unknown."""
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def load(self, job_id: str, project_id: str) -> BqmlJob:
+        """Returns the handle of a job, watching jobs the manager did not start.
+
+        Jobs started before the process restarted are fetched from BigQuery.
+
+        Args:
+            job_id (str): The ID of the job.
+            project_id (str): The project the job runs in.
+
+        Returns:
+            BqmlJob: The handle of the job.
+
+        Raises:
+            google.api_core.exceptions.NotFound: If BigQuery has no such job.
+        """
+        job = self.get(job_id)
+        if job is not None:
+            return job
+        return self._add(self.get_client(project_id).get_job(job_id))
+
+    def _add(self, query_job: Any, timeout: float | None = None) -> BqmlJob:
+        job = BqmlJob(
+            job_id=query_job.job_id,
+            query_job=query_job,
+            timeout=self.timeout if timeout is None else timeout,
+        )
+        with self._lock:
+            # The job may have been added by a concurrent `load`.
+            if job.job_id in self.jobs:
+                return self.jobs[job.job_id]
+            finished = [j for j in self.jobs.values() if j.status != RUNNING]
+            for old_job in finished[: max(0, len(finished) - MAX_FINISHED_JOBS)]:
+                del self.jobs[old_job.job_id]
+            self.jobs[job.job_id] = job
+            job.future = asyncio.run_coroutine_threadsafe(self._watch(job), self.loop)
+        return job
+
+    async def wait(self, job: BqmlJob, timeout: float | None = None) -> BqmlJob:
+        """Waits for a job to stop running, without blocking the event loop.
+
+        Args:
+            job (BqmlJob): The job to wait for.
+            timeout (float, optional): The maximum time in seconds to wait. The
+              job keeps running if it takes longer.
+
+        Returns:
+            BqmlJob: The job, which may still be running.
+        """
+        if not job.future.done():
+            await asyncio.wait([asyncio.wrap_future(job.future)], timeout=timeout)
+        return job
+
+    def cancel(self, job_id: str, project_id: str | None = None) -> BqmlJob | None:
+        """Cancels a running job.
+
+        Args:
+            job_id (str): The ID of the job.
+            project_id (str, optional): The project the job runs in. If given,
+              jobs the manager did not start are fetched from BigQuery, as in
+              `load`.
+
+        Returns:
+            BqmlJob | None: The job, or None if the job is unknown.
+
+        Raises:
+            google.api_core.exceptions.NotFound: If a project is given and
+              BigQuery has no such job.
+        """
+        if project_id is None:
+            job = self.get(job_id)
+        else:
+            job = self.load(job_id, project_id)
+        if job is None or job.status != RUNNING:
+            return job
+        job.query_job.cancel()
+        # The job may have finished meanwhile, then it keeps its result.
+        if self._stop(job, CANCELLED, "The job was cancelled."):
+            job.future.cancel()
+        return job
+
+    def _stop(
+        self,
+        job: BqmlJob,
+        status: str,
+        error: str | None = None,
+        result: list[dict] | None = None,
+        total_rows: int | None = None,
+    ) -> bool:
+        """Moves a running job to a final status, returning False if it stopped."""
+        with self._lock:
+            if job.status != RUNNING:
+                return False
+            job.status = status
+            job.error = error
+            job.result = result
+            job.total_rows = total_rows
+            job.finished_at = time.monotonic()
+            return True
+
+    async def _watch(self, job: BqmlJob) -> None:
+        attempt = 0
+        try:
+            # `done` reloads the state of the job, which blocks.
+            while not await asyncio.to_thread(job.query_job.done):
+                if job.timeout and job.elapsed_seconds > job.timeout:
+                    await asyncio.to_thread(job.query_job.cancel)
+                    self._stop(
+                        job,
+                        TIMED_OUT,
+                        f"The job did not complete within {job.timeout:g} seconds"
+                        " and was cancelled.",
+                    )
+                    return
+                await asyncio.sleep(self.poll_policy.get_delay(attempt))
+                attempt += 1
+            await asyncio.to_thread(self._fetch_result, job)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logging.warning("BigQuery ML job %s failed: %s", job.job_id, e)
+            self._stop(job, FAILED, str(e))
+
+    def _fetch_result(self, job: BqmlJob) -> None:
+        query_job = job.query_job
+        if query_job.error_result:
+            self._stop(job, FAILED, str(query_job.error_result))
+            return
+        results = query_job.result(max_results=MAX_RESULT_ROWS)
+        self._stop(
+            job,
+            DONE,
+            result=[to_json_row(row) for row in results],
+            total_rows=results.total_rows,
+        )
+
+    async def _cancel_tasks(self) -> None:
+        tasks = asyncio.all_tasks() - {asyncio.current_task()}
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def close(self) -> None:
+        """Stops watching the jobs and stops the event loop of the manager."""
+        asyncio.run_coroutine_threadsafe(self._cancel_tasks(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+
+
+_job_manager = None
+_job_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> BqmlJobManager:
+    """Returns the job manager shared by all sessions of the process."""
+    global _job_manager
+    if _job_manager is None:
+        with _job_manager_lock:
+            if _job_manager is None:
+                _job_manager = BqmlJobManager()
+    return _job_manager
+
+
+def set_job_manager(manager: BqmlJobManager | None) -> None:
+    """Replaces the shared job manager, e.g. by one with a fake client."""
+    global _job_manager
+    with _job_manager_lock:
+        _job_manager = manager
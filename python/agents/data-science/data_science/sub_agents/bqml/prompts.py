@@ -37,6 +37,7 @@ def return_instructions_bqml() -> str:
                 d.  Populate the BQML code with the correct `dataset_id` and `project_id` from the session context.
                 e.  If the user approves, execute the BQML code using the `execute_bqml_code` tool. If the user requests changes, revise the code and repeat steps b-d.
                 f. **Inform the user:** Before executing the BQML code, inform the user that some BQML operations, especially model training, can take a significant amount of time to complete, potentially several minutes or even hours.
+                g.  `execute_bqml_code` returns a job ID and status. If the status is `RUNNING`, tell the user the job ID and that the job is still running. Use `check_bqml_job` to get its results once it is `DONE`, and `cancel_bqml_job` if the user asks to stop it.
             4.  **Data Exploration:** If the user asks for data exploration or analysis, use the `call_db_agent` tool to execute SQL queries against BigQuery.
 
             **Tool Usage:**
@@ -44,6 +45,8 @@ def return_instructions_bqml() -> str:
             *   `rag_response`: Use this tool to get information from the BQML Reference Guide. Formulate your query carefully to get the most relevant results.
             *   `check_bq_models`: Use this tool to list existing BQML models in the specified dataset.
             *   `execute_bqml_code`: Use this tool to run BQML code. **Only use this tool AFTER the user has approved the code.**
+            *   `check_bqml_job`: Use this tool to check the status and results of a job started by `execute_bqml_code`, optionally waiting up to 60 seconds for it to finish.
+            *   `cancel_bqml_job`: Use this tool to cancel a running job, only when the user asks for it.
             *   `call_db_agent`: Use this tool to execute SQL queries for data exploration and analysis.
 
             **IMPORTANT:**
@@ -54,7 +57,7 @@ def return_instructions_bqml() -> str:
             *   **No Parent Agent Routing:** Do not route back to the parent agent unless the user explicitly requests it.
             *   **Prioritize `rag_response`:** Always use `rag_response` first to gather information.
             *   **Long Run Times:** Be aware that certain BQML operations, such as model training, can take a significant amount of time to complete. Inform the user about this possibility before executing such operations.
-            * **No "process is running"**: Never use the phrase "process is running" or similar, as your response indicates that the process has finished.
+            * **Job Status:** Only say that a BQML job has finished when its status is `DONE`. Report `FAILED`, `CANCELLED` and `TIMED_OUT` jobs with their error.
 
         </TASK>
     </CONTEXT>
@@ -12,11 +12,18 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import time
+import asyncio
 import os
+from google.adk.tools import ToolContext
+from google.api_core.exceptions import NotFound
 from google.cloud import bigquery
 from vertexai import rag
 
+from .job_manager import BqmlJob, get_job_manager
+
+# Seconds `execute_bqml_code` waits for a job before returning its handle.
+JOB_WAIT_SECONDS = float(os.getenv("BQML_JOB_WAIT_SECONDS", "10"))
+
 
 def check_bq_models(dataset_id: str) -> str:
     """Lists models in a BigQuery dataset and returns them as a string.
@@ -48,50 +55,105 @@ def check_bq_models(dataset_id: str) -> str:
         return f"An error occurred: {str(e)}"
 
 
-def execute_bqml_code(bqml_code: str, project_id: str, dataset_id: str) -> str:
-    """
-    Executes BigQuery ML code.
-    """
+async def execute_bqml_code(
+    bqml_code: str, project_id: str, dataset_id: str, tool_context: ToolContext
+) -> dict:
+    """Starts BigQuery ML code as a background job.
 
-    # timeout_seconds = 1500
+    The job keeps running after the tool returns. Its status and results are
+    kept in `tool_context.state["bqml_jobs"]` and can be checked with
+    `check_bqml_job`.
 
-    client = bigquery.Client(project=project_id)
+    Args:
+        bqml_code (str): The BigQuery ML code to execute.
+        project_id (str): The project to run the job in.
+        dataset_id (str): The dataset of the job.
+        tool_context (ToolContext): The tool context.
 
+    Returns:
+        dict: The job ID and status, with the results if the job finished
+          within a few seconds, or the error if it failed.
+    """
+    manager = get_job_manager()
     try:
-        query_job = client.query(bqml_code)
-        start_time = time.time()
-
-        while not query_job.done():
-            elapsed_time = time.time() - start_time
-            # if elapsed_time > timeout_seconds:
-            #     return (
-            #         "Timeout: BigQuery job did not complete within"
-            #         f" {timeout_seconds} seconds. Job ID: {query_job.job_id}"
-            #     )
-
-            print(
-                f"Query Job Status: {query_job.state}, Elapsed Time:"
-                f" {elapsed_time:.2f} seconds. Job ID: {query_job.job_id}"
+        job = await asyncio.to_thread(manager.start, bqml_code, project_id)
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        return {"status": "FAILED", "error": f"An error occurred: {str(e)}"}
+    print(f"Started BigQuery ML job {job.job_id} in dataset {dataset_id}.")
+    job = await manager.wait(job, timeout=JOB_WAIT_SECONDS)
+    return record_job(tool_context, job)
+
+
+async def check_bqml_job(
+    job_id: str, wait_seconds: int, tool_context: ToolContext
+) -> dict:
+    """Checks the status of a BigQuery ML job started by `execute_bqml_code`.
+
+    Jobs started before the agent restarted are looked up in BigQuery.
+
+    Args:
+        job_id (str): The ID of the job.
+        wait_seconds (int): Seconds to wait for the job to finish before
+          returning its status, at most 60.
+        tool_context (ToolContext): The tool context.
+
+    Returns:
+        dict: The job ID and status, with the results once the job is done, or
+          the error if it failed.
+    """
+    manager = get_job_manager()
+    job = manager.get(job_id)
+    if job is None:
+        try:
+            job = await asyncio.to_thread(
+                manager.load, job_id, get_project_id(tool_context)
             )
-            time.sleep(5)
+        except NotFound:
+            return {"job_id": job_id, "error": "Unknown BigQuery ML job."}
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            return {"job_id": job_id, "error": f"An error occurred: {str(e)}"}
+    job = await manager.wait(job, timeout=min(max(wait_seconds, 0), 60))
+    return record_job(tool_context, job)
 
-        if query_job.error_result:
-            return f"Error executing BigQuery ML code: {query_job.error_result}"
 
-        if query_job.exception():
-            return f"Exception during BigQuery ML execution: {query_job.exception()}"
+async def cancel_bqml_job(job_id: str, tool_context: ToolContext) -> dict:
+    """Cancels a running BigQuery ML job started by `execute_bqml_code`.
 
-        results = query_job.result()
-        if results.total_rows > 0:
-            result_string = ""
-            for row in results:
-                result_string += str(dict(row.items())) + "\n"
-            return f"BigQuery ML code executed successfully. Results:\n{result_string}"
-        else:
-            return "BigQuery ML code executed successfully."
+    Jobs started before the agent restarted are looked up in BigQuery.
 
-    except Exception as e:
-        return f"An error occurred: {str(e)}"
+    Args:
+        job_id (str): The ID of the job.
+        tool_context (ToolContext): The tool context.
+
+    Returns:
+        dict: The job ID and status.
+    """
+    manager = get_job_manager()
+    try:
+        job = await asyncio.to_thread(
+            manager.cancel, job_id, get_project_id(tool_context)
+        )
+    except NotFound:
+        return {"job_id": job_id, "error": "Unknown BigQuery ML job."}
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        return {"job_id": job_id, "error": f"An error occurred: {str(e)}"}
+    if job is None:
+        return {"job_id": job_id, "error": "Unknown BigQuery ML job."}
+    return record_job(tool_context, job)
+
+
+def get_project_id(tool_context: ToolContext) -> str | None:
+    """Returns the BigQuery project of the session."""
+    return tool_context.state.get("database_settings", {}).get("bq_project_id")
+
+
+def record_job(tool_context: ToolContext, job: BqmlJob) -> dict:
+    """Keeps the status of a job in session state and returns it."""
+    summary = job.to_dict()
+    jobs = dict(tool_context.state.get("bqml_jobs") or {})
+    jobs[job.job_id] = summary
+    tool_context.state["bqml_jobs"] = jobs
+    return summary
 
 
 def rag_response(query: str) -> str:
@@ -18,10 +18,20 @@
 -- then, it use NL2Py to do further data analysis as needed
 """
 
+import base64
+
+from google.adk.code_executors.code_execution_utils import File
+from google.adk.code_executors.code_executor_context import CodeExecutorContext
 from google.adk.tools import ToolContext
 from google.adk.tools.agent_tool import AgentTool
 
 from .sub_agents import ds_agent, db_agent
+from .sub_agents.bigquery.result_handoff import (
+    PARQUET_MIME_TYPE,
+    RESULT_FILE_NAME,
+    describe_query_result,
+    load_query_result,
+)
 
 
 async def call_db_agent(
@@ -36,10 +46,10 @@ async def call_db_agent(
 
     agent_tool = AgentTool(agent=db_agent)
 
+    # The query result itself is referenced from `state["query_result"]`.
     db_agent_output = await agent_tool.run_async(
         args={"request": question}, tool_context=tool_context
     )
-    tool_context.state["db_agent_output"] = db_agent_output
     return db_agent_output
 
 
@@ -49,23 +59,45 @@ async def call_ds_agent(
 ):
     """Tool to call data science (nl2py) agent."""
 
+    reference = tool_context.state.get("query_result")
+    if not reference:
+        return "Error: no query result to analyze, call the database agent first."
     if question == "N/A":
-        return tool_context.state["db_agent_output"]
-
-    input_data = tool_context.state["query_result"]
+        return describe_query_result(reference)
+    data = await load_query_result(tool_context, reference)
+    if data is None:
+        return "Error: the query result could not be loaded."
 
     question_with_data = f"""
   Question to answer: {question}
 
-  Actual data to analyze prevoius quesiton is already in the following:
-  {input_data}
+  The data to analyze is the result of the previous query. It is available to
+  the code executor as the Parquet file `{RESULT_FILE_NAME}`; load it with
+  `pd.read_parquet("{RESULT_FILE_NAME}")`. Its schema, a summary of each column
+  and the first rows are:
+  {describe_query_result(reference)}
 
   """
 
+    # Hand the file to the code executor for this call only, so that the data
+    # does not stay in session state.
+    code_executor_context = CodeExecutorContext(tool_context.state)
+    code_executor_context.add_input_files(
+        [
+            File(
+                name=RESULT_FILE_NAME,
+                content=base64.b64encode(data).decode(),
+                mime_type=PARQUET_MIME_TYPE,
+            )
+        ]
+    )
+
     agent_tool = AgentTool(agent=ds_agent)
 
-    ds_agent_output = await agent_tool.run_async(
-        args={"request": question_with_data}, tool_context=tool_context
-    )
-    tool_context.state["ds_agent_output"] = ds_agent_output
+    try:
+        ds_agent_output = await agent_tool.run_async(
+            args={"request": question_with_data}, tool_context=tool_context
+        )
+    finally:
+        code_executor_context.clear_input_files()
     return ds_agent_output
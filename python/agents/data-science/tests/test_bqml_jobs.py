@@ -0,0 +1,179 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the manager of BigQuery ML jobs."""
+
+import asyncio
+import os
+import sys
+import time
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data_science.sub_agents.bqml.job_manager import (
+    CANCELLED,
+    DONE,
+    FAILED,
+    TIMED_OUT,
+    BqmlJobManager,
+    PollPolicy,
+)
+
+
+class FakeResults(list):
+    """Rows of a finished fake job."""
+
+    @property
+    def total_rows(self):
+        return len(self)
+
+
+class FakeQueryJob:
+    """BigQuery job that finishes after a given number of seconds."""
+
+    def __init__(self, job_id, duration, rows=(), error_result=None):
+        self.job_id = job_id
+        self.done_at = time.monotonic() + duration
+        self.rows = rows
+        self.error_result = error_result
+        self.cancelled = False
+        self.reloads = 0
+
+    def done(self):
+        self.reloads += 1
+        return self.cancelled or time.monotonic() >= self.done_at
+
+    def cancel(self):
+        self.cancelled = True
+
+    def result(self, max_results=None):
+        return FakeResults(self.rows[:max_results])
+
+
+class FakeClient:
+    """BigQuery client whose jobs are defined by their code."""
+
+    def __init__(self):
+        self.jobs = []
+
+    def query(self, bqml_code):
+        duration, *rows = bqml_code
+        error_result = {"reason": "invalidQuery"} if duration < 0 else None
+        job = FakeQueryJob(
+            f"job_{len(self.jobs)}", abs(duration), list(rows), error_result
+        )
+        self.jobs.append(job)
+        return job
+
+    def get_job(self, job_id):
+        return next(job for job in self.jobs if job.job_id == job_id)
+
+
+class TestBqmlJobManager(unittest.TestCase):
+    """Test cases for the job manager, using a fake BigQuery client."""
+
+    def setUp(self):
+        self.client = FakeClient()
+        self.manager = self._manager()
+
+    def _manager(self):
+        manager = BqmlJobManager(
+            client_factory=lambda project_id: self.client,
+            poll_policy=PollPolicy(initial_delay=0.01, max_delay=0.05),
+        )
+        self.addCleanup(manager.close)
+        return manager
+
+    def _wait(self, job, timeout=None):
+        return asyncio.run(self.manager.wait(job, timeout=timeout))
+
+    def test_start_returns_handle(self):
+        start = time.monotonic()
+        job = self.manager.start([0.3, {"loss": 0.5}], "project")
+        self.assertLess(time.monotonic() - start, 0.1)
+        self.assertIs(self.manager.get(job.job_id), job)
+        self._wait(job)
+        self.assertEqual(job.status, DONE)
+        self.assertEqual(job.to_dict()["result"], [{"loss": 0.5}])
+
+    def test_concurrent_jobs(self):
+        start = time.monotonic()
+        jobs = [self.manager.start([0.3], "project") for _ in range(20)]
+        for job in jobs:
+            self._wait(job)
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertEqual({job.status for job in jobs}, {DONE})
+
+    def test_backoff(self):
+        job = self.manager.start([0.5], "project")
+        self._wait(job)
+        # A fixed delay of 0.01 seconds would check about 50 times.
+        self.assertLess(job.query_job.reloads, 20)
+
+    def test_wait_timeout(self):
+        job = self.manager.start([0.5], "project")
+        self._wait(job, timeout=0.05)
+        self.assertEqual(job.to_dict()["status"], "RUNNING")
+
+    def test_job_timeout(self):
+        job = self.manager.start([10], "project", timeout=0.1)
+        self._wait(job)
+        self.assertEqual(job.status, TIMED_OUT)
+        self.assertTrue(job.query_job.cancelled)
+
+    def test_cancel(self):
+        job = self.manager.start([10], "project")
+        self.manager.cancel(job.job_id)
+        self._wait(job)
+        self.assertEqual(job.status, CANCELLED)
+        self.assertTrue(job.query_job.cancelled)
+
+    def test_cancel_after_result(self):
+        job = self.manager.start([0.1, {"loss": 0.5}], "project")
+        # The job finishes while it is being cancelled.
+        job.query_job.cancel = lambda: self._wait(job)
+        self.manager.cancel(job.job_id)
+        self.assertEqual(job.status, DONE)
+        self.assertEqual(job.result, [{"loss": 0.5}])
+
+    def test_load_job_after_restart(self):
+        job_id = self.manager.start([0.1, {"loss": 0.5}], "project").job_id
+        restarted = self._manager()
+        self.assertIsNone(restarted.get(job_id))
+        job = restarted.load(job_id, "project")
+        self.assertIs(restarted.load(job_id, "project"), job)
+        asyncio.run(restarted.wait(job))
+        self.assertEqual(job.status, DONE)
+        self.assertEqual(job.result, [{"loss": 0.5}])
+
+    def test_cancel_job_after_restart(self):
+        job_id = self.manager.start([10], "project").job_id
+        restarted = self._manager()
+        self.assertIsNone(restarted.cancel(job_id))
+        job = restarted.cancel(job_id, "project")
+        self.assertIs(restarted.get(job_id), job)
+        asyncio.run(restarted.wait(job))
+        self.assertEqual(job.status, CANCELLED)
+        self.assertTrue(job.query_job.cancelled)
+
+    def test_failed_job(self):
+        job = self.manager.start([-0.01], "project")
+        self._wait(job)
+        self.assertEqual(job.status, FAILED)
+        self.assertIn("invalidQuery", job.to_dict()["error"])
+
+
+if __name__ == "__main__":
+    unittest.main()
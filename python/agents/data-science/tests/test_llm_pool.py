@@ -0,0 +1,126 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the LLM client pool of the CHASE-SQL agent."""
+
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data_science.sub_agents.bigquery.chase_sql.llm_pool import (
+    FakeBackend,
+    LLMClientPool,
+)
+from data_science.sub_agents.bigquery.chase_sql.llm_utils import (
+    GeminiModel,
+    RetryPolicy,
+)
+
+
+class TestLLMClientPool(unittest.TestCase):
+    """Test cases for the LLM client pool, using a fake backend."""
+
+    def _model(self, backend, **kwargs):
+        pool = LLMClientPool(backend, **kwargs)
+        self.addCleanup(pool.close)
+        return GeminiModel(pool=pool, retry_policy=RetryPolicy(base_delay=0.01))
+
+    def test_call_parallel_keeps_order(self):
+        model = self._model(FakeBackend(responses=str.upper))
+        responses = model.call_parallel(["a", "b", "c"], parser_func=str.strip)
+        self.assertEqual(responses, ["A", "B", "C"])
+
+    def test_call_retries_errors(self):
+        backend = FakeBackend(errors=2)
+        model = self._model(backend)
+        self.assertEqual(model.call("ok"), "ok")
+        self.assertEqual(len(backend.requests), 3)
+
+    def test_call_parallel_failures_are_none(self):
+        model = self._model(FakeBackend(errors=10))
+        model.retry_policy = RetryPolicy(max_attempts=1)
+        self.assertEqual(model.call_parallel(["a", "b"]), [None, None])
+        model = self._model(FakeBackend(latency=1.0))
+        self.assertEqual(model.call_parallel(["a"], timeout=0.05), [None])
+
+    def test_max_concurrency(self):
+        model = self._model(
+            FakeBackend(latency=0.1), max_concurrency=2, requests_per_second=1000
+        )
+        start = time.monotonic()
+        model.call_parallel(["a"] * 6)
+        self.assertGreaterEqual(time.monotonic() - start, 0.3)
+
+    def test_rate_limit(self):
+        model = self._model(FakeBackend(), requests_per_second=20, burst=5)
+        start = time.monotonic()
+        model.call_parallel(["a"] * 25)
+        self.assertGreaterEqual(time.monotonic() - start, 0.9)
+
+    def test_prefers_fast_region(self):
+        backend = FakeBackend(latency={"fast": 0.01, "slow": 0.1})
+        pool = LLMClientPool(backend, regions=["fast", "slow"])
+        self.addCleanup(pool.close)
+        pool.balancer.explore = 0
+        model = GeminiModel(pool=pool, distribute_requests=True)
+        for _ in range(10):
+            model.call("a")
+        regions = [region for _, _, region in backend.requests]
+        self.assertEqual(regions[2:], ["fast"] * 8)
+
+    def test_call_first_returns_first_valid(self):
+        backend = FakeBackend(latency=0.01)
+        model = self._model(backend)
+        response = model.call_first(
+            ["invalid", "valid"], validate_func=lambda r: r == "valid"
+        )
+        self.assertEqual(response, "valid")
+
+    def test_call_first_cancels_slower_calls(self):
+        completed = []
+
+        def respond(prompt):
+            completed.append(prompt)
+            return prompt
+
+        backend = FakeBackend(
+            responses=respond, latency=lambda prompt: 1.0 if prompt == "slow" else 0.01
+        )
+        model = self._model(backend)
+        start = time.monotonic()
+        response = model.call_first(["slow", "fast"])
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(response, "fast")
+        time.sleep(1.2)
+        self.assertEqual(completed, ["fast"])
+
+    def test_callbacks_run_off_the_pool_loop(self):
+        model = self._model(FakeBackend())
+        threads = []
+
+        def record_thread(response):
+            threads.append(threading.current_thread())
+            return response
+
+        model.call_first(["a"], parser_func=record_thread, validate_func=record_thread)
+        self.assertEqual(len(threads), 2)
+        self.assertNotIn(model.pool._thread, threads)
+
+
+if __name__ == "__main__":
+    unittest.main()
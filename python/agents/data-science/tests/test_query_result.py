@@ -0,0 +1,107 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for fetching the results of BigQuery queries."""
+
+import os
+import sys
+import unittest
+
+from google.cloud import bigquery
+import pyarrow as pa
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data_science.sub_agents.bigquery.tools import fetch_query_result
+
+SCHEMA = [
+    bigquery.SchemaField("id", "INTEGER"),
+    bigquery.SchemaField("opened", "DATE"),
+    bigquery.SchemaField("tags", "STRING", mode="REPEATED"),
+]
+
+
+class FakeRowIterator:
+    """Result of a query, read in pages of `page_size` rows."""
+
+    def __init__(self, num_rows, page_size, schema=SCHEMA):
+        self.num_rows = num_rows
+        self.page_size = page_size
+        self.schema = schema
+        self.total_rows = num_rows
+        self.pages_read = 0
+
+    def to_arrow_iterable(self):
+        for start in range(0, self.num_rows, self.page_size):
+            self.pages_read += 1
+            ids = list(range(start, min(start + self.page_size, self.num_rows)))
+            yield pa.record_batch({"id": ids})
+
+    def to_arrow(self, **kwargs):
+        raise AssertionError("The result was fetched a second time.")
+
+
+class FakeQueryJob:
+    """Query job whose result is a `FakeRowIterator`."""
+
+    def __init__(self, results):
+        self.results = results
+
+    def result(self, page_size=None):
+        return self.results
+
+
+class TestFetchQueryResult(unittest.TestCase):
+    """Test cases for `fetch_query_result`, using a fake row iterator."""
+
+    def test_row_cap(self):
+        results = FakeRowIterator(1000, page_size=50)
+        table, truncated = fetch_query_result(FakeQueryJob(results), max_rows=80)
+        self.assertEqual(table.num_rows, 80)
+        self.assertEqual(table.column("id").to_pylist(), list(range(80)))
+        self.assertTrue(truncated)
+        self.assertEqual(results.pages_read, 2)
+
+    def test_byte_cap(self):
+        results = FakeRowIterator(1000, page_size=10)
+        table, truncated = fetch_query_result(
+            FakeQueryJob(results), max_rows=100, max_bytes=100
+        )
+        self.assertEqual(table.num_rows, 20)
+        self.assertTrue(truncated)
+        self.assertEqual(results.pages_read, 2)
+
+    def test_whole_result(self):
+        table, truncated = fetch_query_result(
+            FakeQueryJob(FakeRowIterator(30, page_size=10))
+        )
+        self.assertEqual(table.num_rows, 30)
+        self.assertFalse(truncated)
+
+    def test_empty_result(self):
+        table, truncated = fetch_query_result(
+            FakeQueryJob(FakeRowIterator(0, page_size=10))
+        )
+        self.assertEqual(table.num_rows, 0)
+        self.assertEqual(table.column_names, ["id", "opened", "tags"])
+        self.assertEqual(table.schema.field("tags").type, pa.list_(pa.string()))
+        self.assertFalse(truncated)
+
+    def test_no_result(self):
+        results = FakeRowIterator(0, page_size=10, schema=[])
+        self.assertEqual(fetch_query_result(FakeQueryJob(results)), (None, False))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the hand-off of query results to the analytics agent."""
+
+import datetime
+import json
+import os
+import sys
+import unittest
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data_science.sub_agents.bigquery.result_handoff import (
+    PARQUET_MIME_TYPE,
+    describe_query_result,
+    load_query_result,
+    save_query_result,
+)
+
+TABLE = pa.table(
+    {
+        "city": ["Newark", "Fresno", None, "Newark"],
+        "enrollment": [1087, 398, 12, 565],
+        "opened": [datetime.date(2005, 8, 29)] * 4,
+    }
+)
+
+
+class FakeToolContext:
+    """Tool context with an in-memory artifact service."""
+
+    def __init__(self, has_artifact_service=True):
+        self.has_artifact_service = has_artifact_service
+        self.artifacts = {}
+
+    async def save_artifact(self, filename, artifact):
+        if not self.has_artifact_service:
+            raise ValueError("Artifact service is not initialized.")
+        versions = self.artifacts.setdefault(filename, [])
+        versions.append(artifact)
+        return len(versions) - 1
+
+    async def load_artifact(self, filename, version=None):
+        versions = self.artifacts.get(filename)
+        if not versions:
+            return None
+        return versions[-1 if version is None else version]
+
+
+class TestResultHandoff(unittest.IsolatedAsyncioTestCase):
+    """Test cases for saving and loading query results."""
+
+    async def test_save_and_load(self):
+        tool_context = FakeToolContext()
+        reference = await save_query_result(tool_context, TABLE, truncated=True)
+        json.dumps(reference)
+        self.assertEqual(reference["version"], 0)
+        self.assertEqual(reference["num_rows"], 4)
+        self.assertNotIn("data", reference)
+        artifact = tool_context.artifacts[reference["artifact"]][0]
+        self.assertEqual(artifact.inline_data.mime_type, PARQUET_MIME_TYPE)
+        data = await load_query_result(tool_context, reference)
+        self.assertTrue(pq.read_table(pa.BufferReader(data)).equals(TABLE))
+
+    async def test_summary(self):
+        reference = await save_query_result(FakeToolContext(), TABLE)
+        city, enrollment, opened = reference["columns"]
+        self.assertEqual(city["null_count"], 1)
+        self.assertEqual(city["distinct_count"], 2)
+        self.assertEqual(city["top_values"][0], {"value": "Newark", "count": 2})
+        self.assertEqual(
+            (enrollment["min"], enrollment["max"], enrollment["mean"]),
+            (12, 1087, 515.5),
+        )
+        self.assertEqual(opened["min"], "2005-08-29")
+        self.assertIn('"num_rows": 4', describe_query_result(reference))
+
+    async def test_without_artifact_service(self):
+        tool_context = FakeToolContext(has_artifact_service=False)
+        reference = await save_query_result(tool_context, TABLE)
+        json.dumps(reference)
+        self.assertIsNone(reference["artifact"])
+        data = await load_query_result(tool_context, reference)
+        self.assertTrue(pq.read_table(pa.BufferReader(data)).equals(TABLE))
+
+
+if __name__ == "__main__":
+    unittest.main()
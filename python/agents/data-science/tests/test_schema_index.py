@@ -0,0 +1,91 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the selection of the schema put into prompts."""
+
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data_science.sub_agents.bigquery.schema_index import (
+    SchemaIndex,
+    estimate_tokens,
+    select_schema,
+)
+
+
+def table_ddl(name, columns, example):
+    """Returns the DDL of a table with one example row."""
+    column_lines = ",\n".join(f"  `{column}` STRING" for column in columns)
+    return (
+        f"CREATE OR REPLACE TABLE `my-project.my_dataset.{name}` (\n"
+        f"{column_lines}\n);\n\n"
+        f"-- Example values for table `my-project.my_dataset.{name}`:\n"
+        f"INSERT INTO `my-project.my_dataset.{name}` VALUES\n({example});\n\n"
+    )
+
+
+DDL_SCHEMA = "".join(
+    [
+        table_ddl("schools", ["school_name", "county", "district"], "'Lincoln'"),
+        table_ddl("satscores", ["school_name", "avg_math", "avg_read"], "'510'"),
+        table_ddl("enrollment", ["school_name", "grade", "enrolled"], "'1087'"),
+        table_ddl("weather", ["station", "temperature", "rainfall"], "'12.5'"),
+    ]
+)
+TABLE_TOKENS = estimate_tokens(DDL_SCHEMA) // 4
+
+
+class TestSchemaIndex(unittest.TestCase):
+    """Test cases for `SchemaIndex` and `select_schema`."""
+
+    def test_rank(self):
+        index = SchemaIndex(DDL_SCHEMA)
+        names = [t.name.split(".")[-1] for t in index.tables]
+        ranked = [names[i] for i in index.rank("average math SAT scores")]
+        self.assertEqual(ranked[0], "satscores")
+        ranked = [names[i] for i in index.rank("how much rainfall per station")]
+        self.assertEqual(ranked[0], "weather")
+
+    def test_within_budget(self):
+        self.assertIs(select_schema(DDL_SCHEMA, "math scores"), DDL_SCHEMA)
+        self.assertIs(select_schema(DDL_SCHEMA, token_budget=0), DDL_SCHEMA)
+
+    def test_budget(self):
+        schema = select_schema(
+            DDL_SCHEMA, "average math SAT scores", token_budget=TABLE_TOKENS * 2
+        )
+        self.assertLessEqual(estimate_tokens(schema), TABLE_TOKENS * 2 + 30)
+        self.assertIn("INSERT INTO `my-project.my_dataset.satscores`", schema)
+        self.assertNotIn("TABLE `my-project.my_dataset.weather`", schema)
+        self.assertIn("left out to fit the prompt:", schema)
+        self.assertIn("my-project.my_dataset.weather", schema)
+
+    def test_budget_without_question(self):
+        # Two tables fit without their example rows.
+        schema = select_schema(DDL_SCHEMA, token_budget=TABLE_TOKENS)
+        self.assertNotIn("INSERT INTO", schema)
+        self.assertIn("TABLE `my-project.my_dataset.schools`", schema)
+        self.assertIn("TABLE `my-project.my_dataset.satscores`", schema)
+        self.assertIn(
+            "-- Tables left out to fit the prompt: my-project.my_dataset.enrollment,"
+            " my-project.my_dataset.weather\n",
+            schema,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
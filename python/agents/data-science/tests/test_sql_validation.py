@@ -0,0 +1,94 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the local validation of SQL queries."""
+
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data_science.sub_agents.bigquery.sql_validation import validate_sql
+
+DDL_SCHEMA = """CREATE OR REPLACE TABLE `my-project.my_dataset.orders` (
+  `order_id` INT64,
+  `created_at` TIMESTAMP,
+  `update_ts` TIMESTAMP,
+  `amount` FLOAT64
+);
+
+-- Example values for table `my-project.my_dataset.orders`:
+INSERT INTO `my-project.my_dataset.orders` VALUES
+(1,'2024-01-01 00:00:00','2024-01-02 00:00:00',12.5);
+
+"""
+
+
+class TestSqlValidation(unittest.TestCase):
+    """Test cases for `validate_sql`."""
+
+    def _error_types(self, sql_query):
+        errors = validate_sql(
+            sql_query,
+            ddl_schema=DDL_SCHEMA,
+            db="my_dataset",
+            catalog="my-project",
+            other_tables=["orders_view"],
+        )
+        return [error["type"] for error in errors]
+
+    def test_valid_queries(self):
+        for sql_query in [
+            "SELECT created_at, update_ts FROM `my-project.my_dataset.orders`",
+            "WITH o AS (SELECT amount FROM `my-project.my_dataset.orders`)"
+            " SELECT SUM(amount) FROM o",
+            "SELECT * FROM `bigquery-public-data.samples.shakespeare` LIMIT 5",
+        ]:
+            self.assertEqual(self._error_types(sql_query), [], sql_query)
+
+    def test_defers_other_objects_to_bigquery(self):
+        for sql_query in [
+            "SELECT * FROM `my-project.my_dataset.events_*`"
+            " WHERE _TABLE_SUFFIX BETWEEN '20240101' AND '20240131'",
+            "SELECT * FROM ML.PREDICT(MODEL `my-project.my_dataset.model`,"
+            " (SELECT amount FROM `my-project.my_dataset.orders`))",
+            "SELECT total FROM `my-project.my_dataset.orders_view`",
+        ]:
+            self.assertEqual(self._error_types(sql_query), [], sql_query)
+
+    def test_rejects_writes(self):
+        for sql_query in [
+            "DELETE FROM `my-project.my_dataset.orders` WHERE TRUE",
+            "CREATE TABLE `my-project.my_dataset.t` AS SELECT 1",
+            "SELECT 1; DROP TABLE `my-project.my_dataset.orders`",
+        ]:
+            self.assertEqual(self._error_types(sql_query), ["statement"], sql_query)
+
+    def test_rejects_syntax_errors(self):
+        self.assertEqual(self._error_types("SELEC 1 FROM"), ["syntax"])
+
+    def test_rejects_unknown_tables_and_columns(self):
+        self.assertEqual(
+            self._error_types("SELECT * FROM `my-project.my_dataset.missing`"),
+            ["schema"],
+        )
+        self.assertEqual(
+            self._error_types("SELECT missing FROM `my-project.my_dataset.orders`"),
+            ["schema"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Micro-benchmark of weighted goal subsampling for `limit_goals`.
+
+Compares drawing goals one at a time and rejecting repeats, as `SimServer` used
+to, with `weighted_sample` across goal-set sizes. Run from the agent directory:
+
+  python -m benchmarks.goal_sampling --size=10000 --size=100000 --fraction=0.5
+"""
+
+import random
+import time
+
+from absl import app, flags
+import numpy as np
+
+from personalized_shopping.shared_libraries.web_agent_site.utils import (
+    random_idx,
+    weighted_sample,
+)
+
+FLAGS = flags.FLAGS
+
+flags.DEFINE_multi_integer(
+    "size", [1000, 10000, 100000, 1000000], "Number of goals; may be repeated."
+)
+flags.DEFINE_float("fraction", 0.5, "Fraction of the goals to keep.")
+flags.DEFINE_integer(
+    "max_rejection_size",
+    10000,
+    "Largest number of goals that rejection sampling is timed on.",
+)
+
+
+def rejection_sample(cum_weights, k):
+    """Draw goals one at a time, skipping those already drawn."""
+    idxs = []
+    while len(idxs) < k:
+        idx = random_idx(cum_weights)
+        if idx not in idxs:
+            idxs.append(idx)
+    return idxs
+
+
+def main(argv: list[str]) -> None:  # pylint: disable=unused-argument
+    rng = np.random.default_rng(0)
+    print(f"Fraction kept: {FLAGS.fraction}")
+    for size in FLAGS.size:
+        # Synthetic goal weights are means of inverse attribute counts
+        weights = 1.0 / rng.integers(1, 1000, size)
+        k = int(size * FLAGS.fraction)
+
+        start = time.perf_counter()
+        idxs = weighted_sample(weights, k, seed=0)
+        sample_s = time.perf_counter() - start
+        assert len(set(idxs.tolist())) == k
+        assert (weighted_sample(weights, k, seed=0) == idxs).all()
+
+        if size <= FLAGS.max_rejection_size:
+            cum_weights = np.concatenate([[0.0], np.cumsum(weights)])
+            random.seed(0)
+            start = time.perf_counter()
+            rejection_sample(cum_weights, k)
+            rejection = f"{time.perf_counter() - start:10.4f} s"
+        else:
+            rejection = "   skipped"
+        print(
+            f"Goals: {size:8d}, kept: {k:8d}  weighted_sample {sample_s:10.4f} s"
+            f"  rejection {rejection}"
+        )
+
+
+if __name__ == "__main__":
+    app.run(main)
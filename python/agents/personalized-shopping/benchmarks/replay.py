@@ -0,0 +1,243 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Latency benchmark of the `search` and `click` tools.
+
+Replays the tool calls of the recorded sessions in `tests/example_interactions`
+and random action traces against `WebAgentTextEnv`, doing the same environment
+work as the tools. Each tool call is split into phases:
+
+  step        -- `env.step`, which includes the phases below it
+  search      -- ranking products for keywords (`server.search_time`)
+  render      -- rendering Jinja templates (`server.render_time`)
+  reward      -- scoring a purchase (`server.reward_time`)
+  parse       -- parsing HTML with BeautifulSoup (`env.parse_time`)
+  observation -- reading `env.observation`
+  artifact    -- building the HTML that the tools pass to `save_artifact`
+  total       -- the whole tool call
+
+Uploading the artifact goes through the ADK artifact service and is not
+measured. Each session and trace is replayed twice: `cold` with the server's
+search result cache cleared first, then `warm` with the results of the cold
+replay cached. The p50/p95/p99 latencies of each phase, catalog size and cache
+state are printed and saved as JSON, so runs of different releases can be
+compared. Run from the agent directory:
+
+  python -m benchmarks.replay --num_products=1000 --num_products=50000 \\
+      --output=replay.json
+"""
+
+import glob
+import json
+import os
+import platform
+import random
+import time
+
+from absl import app, flags
+import numpy as np
+
+from personalized_shopping.shared_libraries.web_agent_site.envs.web_agent_text_env import (
+    WebAgentTextEnv,
+)
+
+FLAGS = flags.FLAGS
+
+flags.DEFINE_multi_integer(
+    "num_products", [100, 1000, 10000, 50000], "Catalog size; may be repeated."
+)
+flags.DEFINE_string(
+    "observation_mode", "structured", "Observation mode, as used by the tools."
+)
+flags.DEFINE_string(
+    "interactions_dir",
+    os.path.join(os.path.dirname(__file__), "..", "tests", "example_interactions"),
+    "Directory of recorded `*.session.json` sessions.",
+)
+flags.DEFINE_integer("num_replays", 5, "Number of times each session is replayed.")
+flags.DEFINE_integer("num_traces", 20, "Number of random action traces.")
+flags.DEFINE_integer("trace_length", 15, "Number of tool calls per random trace.")
+flags.DEFINE_integer("seed", 0, "Seed of the random action traces.")
+flags.DEFINE_string("output", None, "JSON file to save the results to.")
+
+PHASES = (
+    "step",
+    "search",
+    "render",
+    "reward",
+    "parse",
+    "observation",
+    "artifact",
+    "total",
+)
+PERCENTILES = (50, 95, 99)
+CACHE_STATES = ("cold", "warm")
+
+
+def load_sessions(interactions_dir):
+    """Tool calls of each recorded session, as (tool name, argument) pairs."""
+    sessions = {}
+    for path in sorted(glob.glob(os.path.join(interactions_dir, "*.session.json"))):
+        with open(path) as f:
+            events = json.load(f)["events"]
+        calls = []
+        for event in events:
+            for part in (event.get("content") or {}).get("parts", []):
+                function_call = part.get("function_call")
+                if function_call and function_call["name"] == "search":
+                    calls.append(("search", function_call["args"]["keywords"]))
+                elif function_call and function_call["name"] == "click":
+                    calls.append(("click", function_call["args"]["button_name"]))
+        sessions[os.path.basename(path).split(".")[0]] = calls
+    return sessions
+
+
+def get_counters(env):
+    """Accumulated seconds of the phases timed inside `env.step`."""
+    server = env.server
+    return dict(
+        search=server.search_time,
+        render=server.render_time,
+        reward=server.reward_time,
+        parse=env.parse_time,
+    )
+
+
+def call_tool(env, tool_name, arg):
+    """Do the environment work of a tool call and return the seconds per phase."""
+    counters = get_counters(env)
+    times = {}
+    start = time.perf_counter()
+    if tool_name == "search":
+        env.server.set_instruction_text(env.session, f"Find me {arg}.")
+        step_start = time.perf_counter()
+        _, _, done, _ = env.step(f"search[{arg}]")
+    else:
+        step_start = time.perf_counter()
+        _, _, done, _ = env.step(f"click[{arg}]")
+    times["step"] = time.perf_counter() - step_start
+
+    phase_start = time.perf_counter()
+    ob = env.observation
+    index = ob.find("Back to Search")
+    if index >= 0:
+        ob = ob[index:]
+    times["observation"] = time.perf_counter() - phase_start
+    if tool_name == "click" and arg == "Back to Search":
+        env.server.set_instruction_text(env.session, "Back to Search")
+
+    phase_start = time.perf_counter()
+    env.state["html"]  # pylint: disable=expression-not-assigned
+    times["artifact"] = time.perf_counter() - phase_start
+    times["total"] = time.perf_counter() - start
+
+    for phase, value in get_counters(env).items():
+        times[phase] = value - counters[phase]
+    return times, done
+
+
+def random_trace(env, rng):
+    """Random tool calls: search words of the instruction or click a clickable."""
+    calls = []
+    env.reset()
+    for _ in range(FLAGS.trace_length):
+        available_actions = env.get_available_actions()
+        if available_actions["has_search_bar"]:
+            words = env.instruction_text.split()
+            keywords = " ".join(rng.sample(words, min(3, len(words))))
+            calls.append(("search", keywords))
+            _, done = call_tool(env, "search", keywords)
+        else:
+            button_name = rng.choice(available_actions["clickables"])
+            calls.append(("click", button_name))
+            _, done = call_tool(env, "click", button_name)
+        if done:
+            break
+    return calls
+
+
+def summarize(samples):
+    """Percentiles and mean of each phase, in milliseconds."""
+    summary = {}
+    for phase in PHASES:
+        values = np.array([times[phase] for times in samples]) * 1000
+        summary[phase] = {f"p{p}": float(np.percentile(values, p)) for p in PERCENTILES}
+        summary[phase]["mean"] = float(values.mean())
+    return summary
+
+
+def run(num_products, sessions):
+    """Latency samples of all tool calls at one catalog size, by cache state."""
+    env = WebAgentTextEnv(
+        observation_mode=FLAGS.observation_mode, num_products=num_products
+    )
+    rng = random.Random(FLAGS.seed)
+    # Record the random traces once, so that they are not timed while sampled
+    traces = [random_trace(env, rng) for _ in range(FLAGS.num_traces)]
+    all_calls = [calls for calls in sessions.values() for _ in range(FLAGS.num_replays)]
+
+    samples = {cache_state: [] for cache_state in CACHE_STATES}
+    for calls in all_calls + traces:
+        for cache_state in CACHE_STATES:
+            if cache_state == "cold":
+                env.server.search_cache.clear()
+            env.reset()
+            for tool_name, arg in calls:
+                times, done = call_tool(env, tool_name, arg)
+                samples[cache_state].append(times)
+                if done:
+                    break
+    return samples
+
+
+def main(argv: list[str]) -> None:  # pylint: disable=unused-argument
+    sessions = load_sessions(FLAGS.interactions_dir)
+    results = {
+        "observation_mode": FLAGS.observation_mode,
+        "sessions": sorted(sessions),
+        "num_replays": FLAGS.num_replays,
+        "num_traces": FLAGS.num_traces,
+        "trace_length": FLAGS.trace_length,
+        "seed": FLAGS.seed,
+        "python": platform.python_version(),
+        "timestamp": time.time(),
+        "catalogs": {},
+    }
+    for num_products in FLAGS.num_products:
+        samples = run(num_products, sessions)
+        catalog = results["catalogs"][str(num_products)] = {}
+        for cache_state, cache_samples in samples.items():
+            summary = summarize(cache_samples)
+            catalog[cache_state] = {
+                "num_calls": len(cache_samples),
+                "phases": summary,
+            }
+            print(
+                f"Products: {num_products}, search cache: {cache_state}, tool"
+                f" calls: {len(cache_samples)}"
+            )
+            for phase, stats in summary.items():
+                print(
+                    f"  {phase:12s}"
+                    + "".join(f"  p{p} {stats[f'p{p}']:9.3f} ms" for p in PERCENTILES)
+                )
+
+    if FLAGS.output:
+        with open(FLAGS.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved results to {FLAGS.output}")
+
+
+if __name__ == "__main__":
+    app.run(main)
@@ -0,0 +1,97 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Micro-benchmark of mapping WebShop search hits to ASINs.
+
+Compares fetching and decoding the stored document of every hit with reading
+the ASIN from the hit's docid, as keyword search does now. Run from the agent
+directory:
+
+  python -m benchmarks.search_hits --num_products=50000
+"""
+
+import json
+import time
+
+from absl import app, flags
+
+from personalized_shopping.shared_libraries.web_agent_site.engine.engine import (
+    SEARCH_RETURN_N,
+    init_search_engine,
+)
+
+FLAGS = flags.FLAGS
+
+flags.DEFINE_integer("num_products", 50000, "Size of the search index to load.")
+flags.DEFINE_integer("repeats", 20, "Number of times each query is timed.")
+flags.DEFINE_multi_string(
+    "query",
+    [
+        "long sleeve shirt",
+        "women's running shoes size 8",
+        "wireless bluetooth headphones",
+        "gluten free snacks",
+        "high waisted jeans for men",
+        "hair growth serum",
+        "queen size bed sheets",
+        "easy to clean shower curtain",
+    ],
+    "Query to search for; may be repeated.",
+)
+
+
+def asins_from_documents(search_engine, hits):
+    """Fetch and decode the stored document of each hit."""
+    docs = [search_engine.doc(hit.docid) for hit in hits]
+    return [json.loads(doc.raw())["id"] for doc in docs]
+
+
+def asins_from_docids(search_engine, hits):  # pylint: disable=unused-argument
+    """Read the ASIN from the docid of each hit."""
+    return [hit.docid for hit in hits]
+
+
+def time_per_query(search_engine, all_hits, get_asins):
+    """Mean milliseconds to map the hits of one query to ASINs."""
+    start = time.perf_counter()
+    for _ in range(FLAGS.repeats):
+        for hits in all_hits:
+            get_asins(search_engine, hits)
+    return (time.perf_counter() - start) * 1000 / (FLAGS.repeats * len(all_hits))
+
+
+def main(argv: list[str]) -> None:  # pylint: disable=unused-argument
+    search_engine = init_search_engine(num_products=FLAGS.num_products)
+    all_hits = [search_engine.search(q, k=SEARCH_RETURN_N) for q in FLAGS.query]
+    for hits in all_hits:
+        assert asins_from_documents(search_engine, hits) == asins_from_docids(
+            search_engine, hits
+        ), "Docids do not match the ids of the indexed documents."
+
+    search_ms = time_per_query(
+        search_engine,
+        FLAGS.query,
+        lambda search_engine, q: search_engine.search(q, k=SEARCH_RETURN_N),
+    )
+    documents_ms = time_per_query(search_engine, all_hits, asins_from_documents)
+    docids_ms = time_per_query(search_engine, all_hits, asins_from_docids)
+    print(f"Queries: {len(FLAGS.query)}, hits per query: {SEARCH_RETURN_N}")
+    print(f"Lucene search:        {search_ms:8.3f} ms/query")
+    print(f"Stored documents:     {documents_ms:8.3f} ms/query")
+    print(f"Docids:               {docids_ms:8.3f} ms/query")
+    print(f"Saved per query:      {documents_ms - docids_ms:8.3f} ms")
+
+
+if __name__ == "__main__":
+    app.run(main)
@@ -0,0 +1,95 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Startup benchmark of the personalized shopping agent.
+
+Imports the agent module in fresh interpreters, as the deployment scripts do,
+and reports the import time and peak RSS. With --with_env, also times building
+the WebShop environment on first use. Run from the agent directory:
+
+  python -m benchmarks.startup --num_runs=3 --with_env
+"""
+
+import json
+import statistics
+import subprocess
+import sys
+
+from absl import app, flags
+
+FLAGS = flags.FLAGS
+
+flags.DEFINE_integer("num_runs", 3, "Number of fresh interpreters to measure.")
+flags.DEFINE_bool("with_env", False, "Also build the WebShop environment.")
+flags.DEFINE_string("module", "personalized_shopping.agent", "Module to import.")
+
+# Runs in a fresh interpreter and prints its measurements as JSON
+MEASURE_SCRIPT = """
+import json
+import resource
+import sys
+import time
+
+
+def rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+result = {}
+start = time.perf_counter()
+__import__(sys.argv[1])
+result["import_s"] = time.perf_counter() - start
+result["import_rss_mb"] = rss_mb()
+if sys.argv[2] == "1":
+    from personalized_shopping.shared_libraries.init_env import get_webshop_env
+
+    start = time.perf_counter()
+    get_webshop_env()
+    result["env_s"] = time.perf_counter() - start
+    result["env_rss_mb"] = rss_mb()
+print(json.dumps(result))
+"""
+
+
+def measure():
+    """Measurements of one fresh interpreter."""
+    output = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            MEASURE_SCRIPT,
+            FLAGS.module,
+            "1" if FLAGS.with_env else "0",
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv: list[str]) -> None:  # pylint: disable=unused-argument
+    runs = [measure() for _ in range(FLAGS.num_runs)]
+    print(f"Module: {FLAGS.module}, runs: {FLAGS.num_runs}")
+    for key in runs[0]:
+        values = [run[key] for run in runs]
+        print(
+            f"{key:14s} median {statistics.median(values):10.2f}"
+            f"  min {min(values):10.2f}  max {max(values):10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    app.run(main)
@@ -12,10 +12,5 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import torch
-
-# Workaround to Resolve the PyTorch-Streamlit Incompatibility Issue
-torch.classes.__path__ = []
-
-from .shared_libraries.init_env import init_env, webshop_env
+from .shared_libraries.init_env import get_webshop_env, init_env
 from . import agent
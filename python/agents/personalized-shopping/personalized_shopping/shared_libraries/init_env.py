@@ -12,6 +12,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import threading
+import uuid
+
 import gym
 
 gym.envs.registration.register(
@@ -25,13 +28,101 @@ gym.envs.registration.register(
 def init_env(num_products):
     env = gym.make(
         "WebAgentTextEnv-v0",
-        observation_mode="text",
+        observation_mode="structured",
         num_products=num_products,
     )
     return env
 
 
+def init_env_pool(num_products):
+    # Imported here, as importing the environment loads the web stack
+    from .web_agent_site.envs.web_agent_env_pool import WebAgentEnvPool
+
+    return WebAgentEnvPool(observation_mode="structured", num_products=num_products)
+
+
 num_product_items = 50000
-webshop_env = init_env(num_product_items)
-webshop_env.reset()
-print(f"Finished initializing WebshopEnv with {num_product_items} items.")
+# Whether the search and click tools save each page's HTML as an artifact, for
+# the ADK web UI; in `structured` mode this renders HTML that the observations
+# do not need, so turning it off saves that rendering
+save_html_artifacts = True
+
+# Key of the environment returned by `get_webshop_env`
+DEFAULT_ENV_KEY = "default"
+# Session state key holding the pool key of an ADK session's environment
+WEBSHOP_SESSION_KEY = "webshop_session"
+
+# Built on first use by `get_webshop_env_pool`, not when the agent is imported
+_webshop_env_pool = None
+_webshop_env_pool_lock = threading.Lock()
+
+
+def get_webshop_env_pool():
+    """Returns the shared WebShop environment pool, building it on first use.
+
+    Safe to call from several threads; the pool and its server are built only
+    once.
+    """
+    global _webshop_env_pool
+    if _webshop_env_pool is None:
+        with _webshop_env_pool_lock:
+            if _webshop_env_pool is None:
+                pool = init_env_pool(num_product_items)
+                pool.get(DEFAULT_ENV_KEY)
+                print(
+                    f"Finished initializing WebshopEnv with {num_product_items} items."
+                )
+                _webshop_env_pool = pool
+    return _webshop_env_pool
+
+
+def get_webshop_env():
+    """Returns the default WebShop environment of the shared pool"""
+    return get_webshop_env_pool().get(DEFAULT_ENV_KEY)
+
+
+def get_session_key(state):
+    """Returns the pool key of an ADK session's environment, given its `state`.
+
+    The key is kept in the session state, so every tool call of the session
+    is routed to the same environment. Once more than `MAX_POOL_ENVS`
+    sessions are open, the least recently used environment is released; the
+    next tool call of its session gets a new environment, back on the search
+    page.
+    """
+    key = state.get(WEBSHOP_SESSION_KEY)
+    if key is None:
+        key = uuid.uuid4().hex
+        state[WEBSHOP_SESSION_KEY] = key
+    return key
+
+
+def get_session_env(state):
+    """Returns the WebShop environment of an ADK session, given its `state`"""
+    return get_webshop_env_pool().get(get_session_key(state))
+
+
+def step_session_env(state, action, instruction_text=None):
+    """Takes `action` in the environment of an ADK session, given its `state`.
+
+    The step goes through `WebAgentEnvPool.step`, so it holds the pool lock
+    and its search is run like those of `step_many`. If `instruction_text` is
+    given, it is set on the session under the same lock, so the environment
+    cannot be released between the two. Returns the environment with its
+    (observation, reward, done, info).
+    """
+    pool = get_webshop_env_pool()
+    key = get_session_key(state)
+    with pool.lock:
+        if instruction_text is not None:
+            env = pool.get(key)
+            env.server.set_instruction_text(env.session, instruction_text)
+        result = pool.step(key, action)
+        return pool.get(key), result
+
+
+def __getattr__(name):
+    # Keeps `init_env.webshop_env` working, building the environment on access
+    if name == "webshop_env":
+        return get_webshop_env()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,32 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sys
+
+sys.path.insert(0, "../")
+
+from web_agent_site.engine.catalog import load_catalog
+from web_agent_site.engine.search import BM25Backend, get_bm25_index_dir
+
+# Catalog sizes to index, e.g. `python build_bm25_index.py 1000 50000`
+sizes = [int(size) for size in sys.argv[1:]] or [50000]
+for num_products in sizes:
+    all_products, *_ = load_catalog(
+        filepath="../data/items_shuffle.json",
+        num_products=num_products,
+    )
+    index_dir = BM25Backend.from_products(all_products).save(
+        get_bm25_index_dir(num_products)
+    )
+    print(f"Saved BM25 index of {len(all_products)} products to {index_dir}.")
@@ -0,0 +1,38 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import argparse
+import sys
+
+sys.path.insert(0, "../")
+
+from web_agent_site.engine.catalog import compile_catalog
+
+parser = argparse.ArgumentParser(description="Compile the WebShop product catalog.")
+# Catalog sizes to compile, e.g. `python compile_catalog.py 1000 50000`
+parser.add_argument("sizes", nargs="*", type=int, default=[50000])
+# The server loads the catalog of its goal type; it uses synthetic goals unless
+# `human_goals` is set when creating the environment
+parser.add_argument(
+    "--human_goals",
+    action="store_true",
+    help="Compile the catalog with human goal instructions.",
+)
+args = parser.parse_args()
+for num_products in args.sizes:
+    compile_catalog(
+        filepath="../data/items_shuffle.json",
+        num_products=num_products,
+        human_goals=args.human_goals,
+    )
@@ -0,0 +1,264 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Precompiled, memory-mapped product catalog.
+
+`load_products` parses the full raw product file and normalizes every product
+on each start. `compile_catalog` runs it once and writes its outputs to a
+catalog directory:
+
+  products.bin -- normalized products, one compact JSON record after another
+  offsets.npy  -- int64 byte offsets of each record in `products.bin`
+  prices.npy   -- float64 price of each product, in catalog order
+  index.json   -- ASINs, `attribute_to_asins`, the category, query and
+                  attribute indexes of `build_product_indexes` and catalog
+                  metadata
+
+`load_compiled_products` maps these files read-only and decodes products on
+first access, so several workers on one host share the same pages. The
+catalog directory is keyed on `num_products` and `human_goals`, so it must be
+compiled with the settings the server is started with; `SimServer` uses
+synthetic goals unless `human_goals` is set. `load_catalog` falls back to
+`load_products` if the catalog is missing, was compiled by another version or
+is older than its source files.
+"""
+
+from collections import defaultdict
+from collections.abc import Mapping, Sequence
+import functools
+import json
+import mmap
+import os
+
+import numpy as np
+from rich import print
+
+from ..utils import CATALOG_DIR, DEFAULT_ATTR_PATH, HUMAN_ATTR_PATH
+from .engine import build_product_indexes, load_products
+
+CATALOG_VERSION = 2
+
+PRODUCTS_FILE = "products.bin"
+OFFSETS_FILE = "offsets.npy"
+PRICES_FILE = "prices.npy"
+INDEX_FILE = "index.json"
+
+# Number of decoded products kept per process
+PRODUCT_CACHE_SIZE = 4096
+
+
+def get_catalog_dir(num_products=None, human_goals=False):
+    """Default location of the compiled catalog for the given settings"""
+    size = "all" if num_products is None else str(num_products)
+    goals = "human" if human_goals else "synthetic"
+    return os.path.join(CATALOG_DIR, f"catalog_{size}_{goals}")
+
+
+def compile_catalog(filepath, catalog_dir=None, num_products=None, human_goals=False):
+    """Normalize products with `load_products` and write them to `catalog_dir`"""
+    if catalog_dir is None:
+        catalog_dir = get_catalog_dir(num_products, human_goals)
+    all_products, _, product_prices, attribute_to_asins = load_products(
+        filepath=filepath,
+        num_products=num_products,
+        human_goals=human_goals,
+    )
+    os.makedirs(catalog_dir, exist_ok=True)
+
+    # Remove a stale index first; it is written last and marks a complete catalog
+    index_path = os.path.join(catalog_dir, INDEX_FILE)
+    if os.path.exists(index_path):
+        os.remove(index_path)
+
+    offsets = [0]
+    with open(os.path.join(catalog_dir, PRODUCTS_FILE), "wb") as f:
+        for product in all_products:
+            record = json.dumps(product, separators=(",", ":")).encode("utf-8")
+            f.write(record)
+            offsets.append(offsets[-1] + len(record))
+    np.save(
+        os.path.join(catalog_dir, OFFSETS_FILE), np.asarray(offsets, dtype=np.int64)
+    )
+    np.save(
+        os.path.join(catalog_dir, PRICES_FILE),
+        np.asarray([product_prices[p["asin"]] for p in all_products], dtype=np.float64),
+    )
+
+    index = {
+        "version": CATALOG_VERSION,
+        "source": os.path.abspath(filepath),
+        "num_products": num_products,
+        "human_goals": bool(human_goals),
+        "asins": [p["asin"] for p in all_products],
+        "attribute_to_asins": {
+            attribute: sorted(asins) for attribute, asins in attribute_to_asins.items()
+        },
+        "product_indexes": build_product_indexes(all_products),
+    }
+    with open(index_path, "w") as f:
+        json.dump(index, f)
+    print(f"Compiled {len(all_products)} products into {catalog_dir}.")
+    return catalog_dir
+
+
+class CompiledCatalog:
+    """Read-only view over a catalog written by `compile_catalog`"""
+
+    def __init__(self, catalog_dir, cache_size=PRODUCT_CACHE_SIZE):
+        self.catalog_dir = catalog_dir
+        with open(os.path.join(catalog_dir, INDEX_FILE)) as f:
+            index = json.load(f)
+        if index["version"] != CATALOG_VERSION:
+            raise ValueError(
+                f"Catalog {catalog_dir} has version {index['version']}, expected"
+                f" {CATALOG_VERSION}. Please re-run the catalog compilation."
+            )
+        self.num_products = index["num_products"]
+        self.human_goals = index["human_goals"]
+        self.asins = index["asins"]
+        self.asin_to_idx = {asin: idx for idx, asin in enumerate(self.asins)}
+        self.attribute_to_asins = defaultdict(
+            set,
+            {
+                attribute: set(asins)
+                for attribute, asins in index["attribute_to_asins"].items()
+            },
+        )
+        self.product_indexes = index["product_indexes"]
+
+        self.offsets = np.load(os.path.join(catalog_dir, OFFSETS_FILE), mmap_mode="r")
+        self.prices = np.load(os.path.join(catalog_dir, PRICES_FILE), mmap_mode="r")
+        products_path = os.path.join(catalog_dir, PRODUCTS_FILE)
+        if os.path.getsize(products_path) > 0:
+            with open(products_path, "rb") as f:
+                self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self.buffer = b""
+        self.product = functools.lru_cache(maxsize=cache_size)(self._decode)
+
+    def __len__(self):
+        return len(self.asins)
+
+    def _decode(self, idx):
+        start, end = int(self.offsets[idx]), int(self.offsets[idx + 1])
+        return json.loads(self.buffer[start:end])
+
+
+class CatalogProducts(Sequence):
+    """Lazy, list-like `all_products` backed by a `CompiledCatalog`"""
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+
+    def __len__(self):
+        return len(self.catalog)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self.catalog.product(i) for i in range(*idx.indices(len(self)))]
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError("product index out of range")
+        return self.catalog.product(idx)
+
+
+class CatalogProductDict(Mapping):
+    """Lazy `product_item_dict` (ASIN -> product) backed by a `CompiledCatalog`"""
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+
+    def __getitem__(self, asin):
+        return self.catalog.product(self.catalog.asin_to_idx[asin])
+
+    def __contains__(self, asin):
+        return asin in self.catalog.asin_to_idx
+
+    def __iter__(self):
+        return iter(self.catalog.asins)
+
+    def __len__(self):
+        return len(self.catalog)
+
+
+class CatalogPrices(Mapping):
+    """Lazy `product_prices` (ASIN -> price) backed by a `CompiledCatalog`"""
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+
+    def __getitem__(self, asin):
+        return float(self.catalog.prices[self.catalog.asin_to_idx[asin]])
+
+    def __contains__(self, asin):
+        return asin in self.catalog.asin_to_idx
+
+    def __iter__(self):
+        return iter(self.catalog.asins)
+
+    def __len__(self):
+        return len(self.catalog)
+
+
+def load_compiled_products(catalog_dir):
+    """Open a compiled catalog with the same return values as `load_products`"""
+    catalog = CompiledCatalog(catalog_dir)
+    print(f"Opened compiled catalog with {len(catalog)} products.")
+    return (
+        CatalogProducts(catalog),
+        CatalogProductDict(catalog),
+        CatalogPrices(catalog),
+        catalog.attribute_to_asins,
+    )
+
+
+def get_product_indexes(all_products):
+    """Product indexes of `all_products`, read from its catalog if compiled"""
+    if isinstance(all_products, CatalogProducts):
+        return all_products.catalog.product_indexes
+    return build_product_indexes(all_products)
+
+
+def get_stale_source(catalog_dir, filepath, human_goals=False):
+    """First source file modified after the catalog was compiled, if any"""
+    compiled_at = os.path.getmtime(os.path.join(catalog_dir, INDEX_FILE))
+    sources = [filepath, DEFAULT_ATTR_PATH] + ([HUMAN_ATTR_PATH] if human_goals else [])
+    for source in sources:
+        if os.path.exists(source) and os.path.getmtime(source) > compiled_at:
+            return source
+    return None
+
+
+def load_catalog(filepath, num_products=None, human_goals=False, catalog_dir=None):
+    """Load products from a compiled catalog if one is usable, else from `filepath`"""
+    if catalog_dir is None:
+        catalog_dir = get_catalog_dir(num_products, human_goals)
+    if os.path.exists(os.path.join(catalog_dir, INDEX_FILE)):
+        stale_source = get_stale_source(catalog_dir, filepath, human_goals)
+        if stale_source is None:
+            try:
+                return load_compiled_products(catalog_dir)
+            except ValueError as e:
+                print(f"{e} Loading {filepath} instead.")
+        else:
+            print(
+                f"Catalog {catalog_dir} is older than {stale_source}. Loading"
+                f" {filepath} instead; please re-run the catalog compilation."
+            )
+    return load_products(
+        filepath=filepath,
+        num_products=num_products,
+        human_goals=human_goals,
+    )
@@ -15,15 +15,17 @@
 """ """
 
 from ast import literal_eval
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
 from decimal import Decimal
 import json
 import os
 import random
 import re
+import threading
+import time
 
 from flask import render_template_string
-from pyserini.search.lucene import LuceneSearcher
+from jinja2 import Environment, FileSystemLoader
 from rich import print
 from tqdm import tqdm
 
@@ -36,6 +38,7 @@ from ..utils import (
 TEMPLATE_DIR = os.path.join(BASE_DIR, "templates")
 
 SEARCH_RETURN_N = 50
+SEARCH_CACHE_SIZE = 1024
 PRODUCT_WINDOW = 10
 TOP_K_ATTR = 10
 
@@ -52,19 +55,60 @@ ACTION_TO_TEMPLATE = {
 }
 
 
-def map_action_to_html(action, **kwargs):
+class TemplateRenderer:
+    """Renders WebShop pages from templates that are compiled only once.
+
+    Every template in `template_dir` is loaded into a Jinja environment at
+    construction. Pages are rendered without a Flask request context; `url_for`
+    is resolved directly against `url_map`, which yields the same URLs as Flask.
+    Time spent rendering each template is accumulated in `render_time`.
+    """
+
+    def __init__(self, url_map, template_dir=TEMPLATE_DIR):
+        self.url_adapter = url_map.bind("localhost")
+        # Autoescaping matches Flask's `render_template_string`
+        self.jinja_env = Environment(
+            loader=FileSystemLoader(template_dir),
+            autoescape=True,
+        )
+        self.jinja_env.globals["url_for"] = self.url_for
+        self.templates = {
+            name: self.jinja_env.get_template(name)
+            for name in self.jinja_env.list_templates(extensions=["html"])
+        }
+        self.render_time = defaultdict(float)
+        self.render_count = defaultdict(int)
+
+    def url_for(self, endpoint, **values):
+        return self.url_adapter.build(endpoint, values)
+
+    def render(self, template_name, **context):
+        old_time = time.time()
+        html = self.templates[template_name].render(**context)
+        self.render_time[template_name] += time.time() - old_time
+        self.render_count[template_name] += 1
+        return html
+
+
+def render_template_file(template_name, **context):
+    """Read and render a template inside the active Flask request context"""
+    path = os.path.join(TEMPLATE_DIR, template_name)
+    return render_template_string(read_html_template(path), **context)
+
+
+def map_action_to_html(action, renderer=None, **kwargs):
+    """Render the page for `action`, with `renderer` if one is given"""
+    render = render_template_file if renderer is None else renderer.render
     action_name, action_arg = parse_action(action)
     if action_name == "start":
-        path = os.path.join(TEMPLATE_DIR, "search_page.html")
-        html = render_template_string(
-            read_html_template(path=path),
+        html = render(
+            "search_page.html",
             session_id=kwargs["session_id"],
             instruction_text=kwargs["instruction_text"],
         )
     elif action_name == "search":
-        path = os.path.join(TEMPLATE_DIR, "results_page.html")
-        html = render_template_string(
-            read_html_template(path=path),
+        html = render(
+            "results_page.html",
             session_id=kwargs["session_id"],
             products=kwargs["products"],
             keywords=kwargs["keywords"],
@@ -73,9 +117,8 @@ def map_action_to_html(action, **kwargs):
             instruction_text=kwargs["instruction_text"],
         )
     elif action_name == "click" and action_arg == END_BUTTON:
-        path = os.path.join(TEMPLATE_DIR, "done_page.html")
-        html = render_template_string(
-            read_html_template(path),
+        html = render(
+            "done_page.html",
             session_id=kwargs["session_id"],
             reward=kwargs["reward"],
             asin=kwargs["asin"],
@@ -90,9 +133,8 @@ def map_action_to_html(action, **kwargs):
             product_category=kwargs.get("product_category"),
         )
     elif action_name == "click" and action_arg in ACTION_TO_TEMPLATE:
-        path = os.path.join(TEMPLATE_DIR, ACTION_TO_TEMPLATE[action_arg])
-        html = render_template_string(
-            read_html_template(path),
+        html = render(
+            ACTION_TO_TEMPLATE[action_arg],
             session_id=kwargs["session_id"],
             product_info=kwargs["product_info"],
             keywords=kwargs["keywords"],
@@ -102,9 +144,8 @@ def map_action_to_html(action, **kwargs):
             instruction_text=kwargs.get("instruction_text"),
         )
     elif action_name == "click":
-        path = os.path.join(TEMPLATE_DIR, "item_page.html")
-        html = render_template_string(
-            read_html_template(path),
+        html = render(
+            "item_page.html",
             session_id=kwargs["session_id"],
             product_info=kwargs["product_info"],
             keywords=kwargs["keywords"],
@@ -160,30 +201,130 @@ def get_top_n_product_from_keywords(
     all_products,
     product_item_dict,
     attribute_to_asins=None,
+    product_indexes=None,
 ):
     if keywords[0] == "<r>":
         top_n_products = random.sample(all_products, k=SEARCH_RETURN_N)
     elif keywords[0] == "<a>":
         attribute = " ".join(keywords[1:]).strip()
-        asins = attribute_to_asins[attribute]
-        top_n_products = [p for p in all_products if p["asin"] in asins]
+        if product_indexes is not None:
+            top_n_products = get_indexed_products(
+                all_products, product_indexes["attribute"], attribute
+            )
+        else:
+            asins = attribute_to_asins[attribute]
+            top_n_products = [p for p in all_products if p["asin"] in asins]
     elif keywords[0] == "<c>":
         category = keywords[1].strip()
-        top_n_products = [p for p in all_products if p["category"] == category]
+        if product_indexes is not None:
+            top_n_products = get_indexed_products(
+                all_products, product_indexes["category"], category
+            )
+        else:
+            top_n_products = [p for p in all_products if p["category"] == category]
     elif keywords[0] == "<q>":
         query = " ".join(keywords[1:]).strip()
-        top_n_products = [p for p in all_products if p["query"] == query]
+        if product_indexes is not None:
+            top_n_products = get_indexed_products(
+                all_products, product_indexes["query"], query
+            )
+        else:
+            top_n_products = [p for p in all_products if p["query"] == query]
     else:
         keywords = " ".join(keywords)
         hits = search_engine.search(keywords, k=SEARCH_RETURN_N)
-        docs = [search_engine.doc(hit.docid) for hit in hits]
-        top_n_asins = [json.loads(doc.raw())["id"] for doc in docs]
+        # Documents are indexed with the product ASIN as their id, so the ASIN is
+        # read from the docid without fetching and decoding the stored document
+        top_n_asins = [hit.docid for hit in hits]
         top_n_products = [
             product_item_dict[asin] for asin in top_n_asins if asin in product_item_dict
         ]
     return top_n_products
 
 
+def build_product_indexes(all_products):
+    """Map each category, query and attribute to the indices of its products.
+
+    Indices are kept in catalog order, so a lookup returns the same products in
+    the same order as scanning `all_products`.
+    """
+    product_indexes = {
+        "category": defaultdict(list),
+        "query": defaultdict(list),
+        "attribute": defaultdict(list),
+    }
+    for idx, p in enumerate(all_products):
+        product_indexes["category"][p["category"]].append(idx)
+        product_indexes["query"][p["query"]].append(idx)
+        for a in set(p["Attributes"]):
+            product_indexes["attribute"][a].append(idx)
+    return {name: dict(index) for name, index in product_indexes.items()}
+
+
+def get_indexed_products(all_products, index, key):
+    """Products listed under `key` in one of the `build_product_indexes` maps"""
+    return [all_products[idx] for idx in index.get(key, [])]
+
+
+def get_search_key(keywords):
+    """Key of a search in `SearchResultCache`, or None if it is not cacheable.
+
+    Random (`<r>`) searches are not cached. Whitespace is collapsed for full
+    text searches, as it does not change their results.
+    """
+    if keywords[0] == "<r>":
+        return None
+    if keywords[0] in ("<a>", "<c>", "<q>"):
+        return tuple(keywords)
+    return " ".join(" ".join(keywords).split())
+
+
+class SearchResultCache:
+    """LRU cache of ranked search results, shared by all sessions of a server.
+
+    Maps a `get_search_key` key to the ranked ASINs of the search. Entries
+    older than `ttl` seconds are dropped on access; `ttl=None` keeps them
+    until evicted. A `maxsize` of 0 disables the cache.
+    """
+
+    def __init__(self, maxsize=SEARCH_CACHE_SIZE, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        """Returns the cached ASINs of `key`, or None if missing or expired"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            asins, expires_at = entry
+            if expires_at is not None and time.monotonic() >= expires_at:
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return asins
+
+    def put(self, key, asins):
+        """Caches the ranked `asins` of `key`, evicting the least recently used"""
+        if self.maxsize <= 0:
+            return
+        expires_at = None if self.ttl is None else time.monotonic() + self.ttl
+        with self.lock:
+            self.entries[key] = (tuple(asins), expires_at)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
 def get_product_per_page(top_n_products, page):
     return top_n_products[(page - 1) * PRODUCT_WINDOW : page * PRODUCT_WINDOW]
 
@@ -204,6 +345,9 @@ def generate_product_prices(all_products):
 
 
 def init_search_engine(num_products=None):
+    # Imported here so that other search backends do not need Pyserini and Java
+    from pyserini.search.lucene import LuceneSearcher
+
     if num_products == 100:
         indexes = "indexes_100"
     elif num_products == 1000:
@@ -264,8 +408,6 @@ def load_products(filepath, num_products=None, human_goals=True):
             human_attributes = json.load(f)
     with open(DEFAULT_ATTR_PATH) as f:
         attributes = json.load(f)
-    with open(HUMAN_ATTR_PATH) as f:
-        human_attributes = json.load(f)
     print("Attributes loaded.")
 
     asins = set()
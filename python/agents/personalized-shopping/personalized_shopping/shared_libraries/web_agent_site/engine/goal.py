@@ -14,17 +14,90 @@
 
 """Functions for specifying goals and reward calculations."""
 
-from collections import defaultdict
-import itertools
+from collections import OrderedDict, defaultdict, namedtuple
+from collections.abc import Sequence
+import copy
+import math
 import random
+import threading
+import numpy as np
+from rapidfuzz import fuzz as rapidfuzz_fuzz
+from rapidfuzz import process
 from rich import print
 import spacy
-from thefuzz import fuzz
+from thefuzz import utils as fuzz_utils
 from .normalize import normalize_color
 
-nlp = spacy.load("en_core_web_sm")
+# Loaded on first use by `get_nlp`, as loading the pipeline takes seconds
+nlp = None
+_nlp_lock = threading.Lock()
 
 PRICE_RANGE = [10.0 * i for i in range(1, 100)]
+# Price limit of goals whose product has no usable price
+NO_PRICE_UPPER = 1000000
+
+# Attributes and options match if their `fuzz.token_set_ratio` is above this
+FUZZ_MATCH_THRESHOLD = 85
+TYPE_POS_TAGS = ("PNOUN", "NOUN", "PROPN")
+
+# Number of product names whose type tokens are kept
+TYPE_TOKENS_CACHE_SIZE = 65536
+# Number of products whose reward features are kept; these hold the full
+# lower-cased texts of the products, so far fewer are kept than names
+PRODUCT_FEATURES_CACHE_SIZE = 4096
+
+# Text of a product that reward computation reads, keyed by ASIN
+ProductFeatures = namedtuple("ProductFeatures", ["texts", "attributes"])
+
+
+class FeatureCache:
+    """LRU cache of reward features, shared by all sessions of the process.
+
+    Keeps the `maxsize` most recently used entries, so the memory used by
+    reward computation does not grow with the number of products scored.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key, build):
+        """Returns the entry of `key`, caching `build()` if it is missing"""
+        # Hits take no lock, as single `OrderedDict` operations are atomic
+        try:
+            value = self.entries[key]
+            self.entries.move_to_end(key)
+            return value
+        except KeyError:
+            # Missing, or evicted by another thread since
+            pass
+        value = build()
+        self.put(key, value)
+        return value
+
+    def put(self, key, value):
+        """Caches `value` for `key`, evicting the least recently used entries"""
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+_product_features = FeatureCache(PRODUCT_FEATURES_CACHE_SIZE)
+# Lower-cased noun tokens of product names
+_type_tokens = FeatureCache(TYPE_TOKENS_CACHE_SIZE)
 
 
 def get_goals(all_products, product_prices, human_goals=True):
@@ -82,66 +155,235 @@ def get_human_goals(all_products, product_prices):
     return goals
 
 
+def get_price_upper(asin, product_prices):
+    """Samples the price limit of a goal; 1000000 if it has none"""
+    if product_prices is not None:
+        price = product_prices[asin]
+        price_range = [p for p in PRICE_RANGE if p > price][:4]
+        if len(price_range) >= 2:
+            _, price_upper = sorted(random.sample(price_range, 2))
+            return price_upper
+    return NO_PRICE_UPPER
+
+
 def get_synthetic_goals(all_products, product_prices):
-    goals = []
-    cnt_atts = defaultdict(int)
-    for product in all_products:
-        if "instruction_text" not in product or product["instruction_text"] is None:
-            continue
-        product_goals = []
-        asin = product["asin"]
-        attributes = product["instruction_attributes"]
-        assert len(attributes) > 0
-
-        if product_prices is not None:
-            price = product_prices[asin]
-            price_range = [p for p in PRICE_RANGE if p > price][:4]
-            if len(price_range) >= 2:
-                _, price_upper = sorted(random.sample(price_range, 2))
-                price_text = f", and price lower than {price_upper:.2f} dollars"
-            else:
-                price_upper = 1000000
-                price_text = ""
-        else:
-            price_upper = 1000000
-            price_text = ""
+    return SyntheticGoals(all_products, product_prices)
+
 
-        instruction_text = product["instruction_text"]
+class SyntheticGoals(Sequence):
+    """Compact, list-like table of the synthetic goals of `all_products`.
 
+    There is one goal per combination of a product's option values. Instead
+    of a dict per goal, the table keeps NumPy arrays indexing the products and
+    their first goals, and builds the goal dict of an index on access.
+    """
+
+    def __init__(self, all_products, product_prices):
+        self.all_products = all_products
+        product_idxs = []
+        num_goals = []
+        price_uppers = []
+        cnt_atts = defaultdict(int)
+        for idx, product in enumerate(all_products):
+            if "instruction_text" not in product or product["instruction_text"] is None:
+                continue
+            attributes = product["instruction_attributes"]
+            assert len(attributes) > 0
+            price_upper = get_price_upper(product["asin"], product_prices)
+            options = product["options"]
+            num_combinations = math.prod(len(values) for values in options.values())
+            if num_combinations == 0:
+                continue
+            product_idxs.append(idx)
+            num_goals.append(num_combinations)
+            price_uppers.append(price_upper)
+            for att in attributes:
+                cnt_atts[att] += num_combinations
+
+        self.product_idxs = np.array(product_idxs, dtype=np.int64)
+        self.price_uppers = np.array(price_uppers, dtype=np.float64)
+        # Goals of the i-th product are numbered from offsets[i] to offsets[i + 1]
+        self.offsets = np.zeros(len(num_goals) + 1, dtype=np.int64)
+        np.cumsum(num_goals, out=self.offsets[1:])
+        # All goals of a product have its attributes, hence the same weight
+        self.product_weights = np.array(
+            [
+                sum(1.0 / cnt_atts[att] for att in attributes) / len(attributes)
+                for attributes in (
+                    all_products[idx]["instruction_attributes"] for idx in product_idxs
+                )
+            ],
+            dtype=np.float64,
+        )
+        # Goal numbers of this view, all of them if None; see `take`
+        self.goal_idxs = None
+
+    def __len__(self):
+        if self.goal_idxs is not None:
+            return len(self.goal_idxs)
+        return int(self.offsets[-1])
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError("goal index out of range")
+        if self.goal_idxs is not None:
+            idx = int(self.goal_idxs[idx])
+        return self.decode(idx)
+
+    def decode(self, goal_idx):
+        """Builds the goal dict of the `goal_idx`-th goal of the full table"""
+        i = int(np.searchsorted(self.offsets, goal_idx, side="right")) - 1
+        product = self.all_products[int(self.product_idxs[i])]
+        price_upper = float(self.price_uppers[i])
+
+        # Combinations are numbered in `itertools.product` order
         options = product["options"]
         option_names = sorted(options)
-        combinations = list(
-            itertools.product(*(options[option_name] for option_name in option_names))
+        remainder = goal_idx - int(self.offsets[i])
+        goal_options = {}
+        for option_name in reversed(option_names):
+            values = options[option_name]
+            remainder, value_idx = divmod(remainder, len(values))
+            goal_options[option_name] = values[value_idx]
+        goal_options = {name: goal_options[name] for name in option_names}
+
+        option_text = ", and ".join([f"{k}: {v}" for k, v in goal_options.items()])
+        option_text = " with " + option_text if option_text else ""
+        price_text = (
+            f", and price lower than {price_upper:.2f} dollars"
+            if price_upper != NO_PRICE_UPPER
+            else ""
         )
-        for combination in combinations:
-            goal_options = dict()
-            for i, o in enumerate(combination):
-                #                option_text.append(f'{option_names[i]}: {o}')
-                goal_options[option_names[i]] = o
-            option_text = ", and ".join([f"{k}: {v}" for k, v in goal_options.items()])
-            option_text = " with " + option_text if option_text else ""
-            product_goals.append(
-                {
-                    "asin": asin,
-                    "category": product["category"],
-                    "query": product["query"],
-                    "name": product["name"],
-                    "product_category": product["product_category"],
-                    "instruction_text": f"{instruction_text}{option_text}{price_text}",
-                    "attributes": attributes,
-                    "price_upper": price_upper,
-                    "goal_options": goal_options,
-                    "title": product["Title"],
-                }
-            )
-            for att in attributes:
-                cnt_atts[att] += 1
-        goals += product_goals
-    for goal in goals:
-        goal["weight"] = sum(1.0 / cnt_atts[att] for att in goal["attributes"]) / len(
-            goal["attributes"]
-        )
-    return goals
+        return {
+            "asin": product["asin"],
+            "category": product["category"],
+            "query": product["query"],
+            "name": product["name"],
+            "product_category": product["product_category"],
+            "instruction_text": f"{product['instruction_text']}{option_text}{price_text}",
+            "attributes": product["instruction_attributes"],
+            "price_upper": price_upper,
+            "goal_options": goal_options,
+            "title": product["Title"],
+            "weight": float(self.product_weights[i]),
+        }
+
+    @property
+    def weights(self):
+        """Sampling weight of each goal, as a NumPy array"""
+        weights = np.repeat(self.product_weights, np.diff(self.offsets))
+        if self.goal_idxs is not None:
+            weights = weights[self.goal_idxs]
+        return weights
+
+    def take(self, idxs):
+        """Table of the goals at `idxs`, sharing the product arrays"""
+        goals = copy.copy(self)
+        idxs = np.asarray(idxs, dtype=np.int64)
+        goals.goal_idxs = idxs if self.goal_idxs is None else self.goal_idxs[idxs]
+        return goals
+
+
+def select_goals(goals, idxs):
+    """Goals at `idxs`, keeping a `SyntheticGoals` table compact"""
+    if isinstance(goals, SyntheticGoals):
+        return goals.take(idxs)
+    return [goals[i] for i in idxs]
+
+
+def get_goal_weights(goals):
+    """Sampling weight of each goal, as a NumPy array"""
+    if isinstance(goals, SyntheticGoals):
+        return goals.weights
+    return np.array([goal["weight"] for goal in goals], dtype=np.float64)
+
+
+def process_text(text):
+    """Text as `thefuzz` processes it before fuzzy matching, or None"""
+    if text is None:
+        return None
+    return fuzz_utils.full_process(text, force_ascii=True)
+
+
+def get_fuzzy_matches(queries, choices):
+    """Whether each of `queries` fuzzily matches any of `choices`.
+
+    Both are lists of `process_text` outputs. A pair matches if the rounded
+    `token_set_ratio` is above `FUZZ_MATCH_THRESHOLD`, as with `thefuzz`; all
+    pairs are scored in one batch.
+    """
+    matched = np.zeros(len(queries), dtype=bool)
+    query_idxs = [i for i, query in enumerate(queries) if query is not None]
+    choices = [choice for choice in choices if choice is not None]
+    if not query_idxs or not choices:
+        return matched
+    scores = process.cdist(
+        [queries[i] for i in query_idxs],
+        choices,
+        scorer=rapidfuzz_fuzz.token_set_ratio,
+        processor=None,
+        score_cutoff=FUZZ_MATCH_THRESHOLD,
+        dtype=np.float64,
+    )
+    matched[query_idxs] = (np.round(scores) > FUZZ_MATCH_THRESHOLD).any(axis=1)
+    return matched
+
+
+def parse_type_tokens(doc):
+    return tuple(t.text.lower() for t in doc if t.pos_ in TYPE_POS_TAGS)
+
+
+def get_nlp():
+    """Returns the spaCy pipeline, loading it on first use"""
+    global nlp
+    if nlp is None:
+        with _nlp_lock:
+            if nlp is None:
+                nlp = spacy.load("en_core_web_sm")
+    return nlp
+
+
+def get_type_tokens(name):
+    """Lower-cased noun tokens of a product name, cached per name"""
+    return _type_tokens.get(name, lambda: parse_type_tokens(get_nlp()(name)))
+
+
+def build_product_features(product):
+    return ProductFeatures(
+        texts=(
+            product["Title"].lower(),
+            " ".join(product["BulletPoints"]).lower(),
+            product["Description"].lower(),
+        ),
+        attributes=[process_text(a) for a in product["Attributes"]],
+    )
+
+
+def get_product_features(product):
+    """Lower-cased texts and processed attributes of a product, cached per ASIN"""
+    return _product_features.get(
+        product["asin"], lambda: build_product_features(product)
+    )
+
+
+def precompute_reward_features(products, goals=(), batch_size=256):
+    """Build the reward features of `products` and `goals` ahead of scoring.
+
+    Names are parsed with `nlp.pipe` in batches, which is much faster than one
+    at a time when many trajectories are scored offline. Only as many as the
+    caches hold are built, from the end of `products` and `goals`.
+    """
+    names = dict.fromkeys([p["name"] for p in products] + [g["name"] for g in goals])
+    names = [name for name in names if name not in _type_tokens]
+    names = names[-_type_tokens.maxsize :]
+    for name, doc in zip(names, get_nlp().pipe(names, batch_size=batch_size)):
+        _type_tokens.put(name, parse_type_tokens(doc))
+    for product in list(products)[-_product_features.maxsize :]:
+        get_product_features(product)
 
 
 def get_type_reward(purchased_product, goal):
@@ -158,22 +400,8 @@ def get_type_reward(purchased_product, goal):
     )
 
     # Determine whether types align based on product name similarity
-    purchased_type = purchased_product["name"]
-    desired_type = goal["name"]
-
-    purchased_type_parse = nlp(purchased_type)
-    desired_type_parse = nlp(desired_type)
-
-    purchased_type_parse = [
-        t.text.lower()
-        for t in purchased_type_parse
-        if t.pos_ in ("PNOUN", "NOUN", "PROPN")
-    ]
-    desired_type_parse = [
-        t.text.lower()
-        for t in desired_type_parse
-        if t.pos_ in ("PNOUN", "NOUN", "PROPN")
-    ]
+    purchased_type_parse = get_type_tokens(purchased_product["name"])
+    desired_type_parse = get_type_tokens(goal["name"])
 
     n_intersect_type = len(set(purchased_type_parse) & set(desired_type_parse))
     if len(desired_type_parse) == 0:
@@ -204,27 +432,18 @@ def get_type_reward(purchased_product, goal):
 
 def get_attribute_reward(purchased_product, goal):
     """Determines whether purchased products shares same attributes as goal"""
-    purchased_attrs = purchased_product["Attributes"]
+    features = get_product_features(purchased_product)
     goal_attrs = goal["attributes"]
 
+    # Check whether goal attribute found in purchased product attribute list
+    matched = get_fuzzy_matches(
+        [process_text(g_attr) for g_attr in goal_attrs], features.attributes
+    )
     num_attr_matches = 0
-    for g_attr in goal_attrs:
-        matched = False
-        # Check whether goal attribute found in purchased product attribute list
-        for p_attr in purchased_attrs:
-            score = fuzz.token_set_ratio(p_attr, g_attr)
-            if score > 85:
-                num_attr_matches += 1
-                matched = True
-                break
+    for g_attr, attr_matched in zip(goal_attrs, matched):
         # If not in purchased attrs, check Title, Bullet Points (Features), Desc
-        if not matched and (
-            g_attr in purchased_product["Title"].lower()
-            or g_attr in " ".join(purchased_product["BulletPoints"]).lower()
-            or g_attr in purchased_product["Description"].lower()
-        ):
+        if attr_matched or any(g_attr in text for text in features.texts):
             num_attr_matches += 1
-            matched = True
 
     r_attr = num_attr_matches / len(goal_attrs)
     return r_attr, num_attr_matches
@@ -232,17 +451,11 @@ def get_attribute_reward(purchased_product, goal):
 
 def get_option_reward(purchased_options, goal_options):
     """Calculate reward for purchased product's options w.r.t. goal options"""
-    purchased_options = [normalize_color(o) for o in purchased_options]
-    goal_options = [normalize_color(o) for o in goal_options]
+    purchased_options = [process_text(normalize_color(o)) for o in purchased_options]
+    goal_options = [process_text(normalize_color(o)) for o in goal_options]
 
     # Perform fuzzy matching of each purchased option against each goal option
-    num_option_matches = 0
-    for g_option in goal_options:
-        for p_option in purchased_options:
-            score = fuzz.token_set_ratio(p_option, g_option)
-            if score > 85:
-                num_option_matches += 1
-                break
+    num_option_matches = int(get_fuzzy_matches(goal_options, purchased_options).sum())
 
     # Calculate option reward as fraction of goal options hit
     r_option = num_option_matches / len(goal_options) if len(goal_options) > 0 else None
@@ -0,0 +1,90 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Memory-mapped image features for `WebAgentTextEnv.get_image`.
+
+`convert_image_features` converts the torch files `feat_conv.pt` and
+`feat_ids.pt` once into:
+
+  feat_conv.npy  -- float32 feature of each image, one row per image
+  feat_urls.json -- image URL of each row
+
+`get_image_features` maps them read-only, once per process, so every
+environment shares the same features and workers on one host share the same
+pages.
+"""
+
+import json
+import os
+import threading
+
+import numpy as np
+
+from ..utils import FEAT_CONV, FEAT_IDS, FEAT_NPY, FEAT_URLS
+
+# Size of the feature of an image
+FEAT_DIM = 512
+
+_image_features = None
+_image_features_lock = threading.Lock()
+
+
+def convert_image_features(
+    feat_path=FEAT_CONV, ids_path=FEAT_IDS, npy_path=FEAT_NPY, urls_path=FEAT_URLS
+):
+    """Convert the torch feature files to a NumPy array file and URL list"""
+    import torch
+
+    feats = torch.load(feat_path)
+    urls = list(torch.load(ids_path))
+    # Write to temporary files, as other processes may open the outputs
+    tmp_npy_path = f"{npy_path}.{os.getpid()}.tmp.npy"
+    tmp_urls_path = f"{urls_path}.{os.getpid()}.tmp"
+    np.save(tmp_npy_path, np.asarray(feats.cpu().numpy(), dtype=np.float32))
+    with open(tmp_urls_path, "w") as f:
+        json.dump(urls, f)
+    os.replace(tmp_npy_path, npy_path)
+    os.replace(tmp_urls_path, urls_path)
+
+
+class ImageFeatures:
+    """Read-only image features, looked up by image URL"""
+
+    def __init__(self, npy_path=FEAT_NPY, urls_path=FEAT_URLS):
+        self.feats = np.load(npy_path, mmap_mode="r")
+        with open(urls_path) as f:
+            self.url_to_row = {url: row for row, url in enumerate(json.load(f))}
+
+    def __len__(self):
+        return len(self.url_to_row)
+
+    def __contains__(self, url):
+        return url in self.url_to_row
+
+    def get(self, url):
+        """Returns the feature of the image at `url`, or None if it has none"""
+        row = self.url_to_row.get(url)
+        return None if row is None else self.feats[row]
+
+
+def get_image_features():
+    """Returns the `ImageFeatures` of this process, converting them if needed"""
+    global _image_features
+    if _image_features is None:
+        with _image_features_lock:
+            if _image_features is None:
+                if not (os.path.exists(FEAT_NPY) and os.path.exists(FEAT_URLS)):
+                    convert_image_features()
+                _image_features = ImageFeatures()
+    return _image_features
@@ -0,0 +1,230 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Structured pages built from the context that WebShop templates render.
+
+A `Page` holds the same data as the rendered HTML (instruction, buttons,
+products and options), so clickables and the `text` observation can be read
+from it directly instead of being parsed back out of the HTML.
+"""
+
+from dataclasses import dataclass, field
+
+from .engine import (
+    ACTION_TO_TEMPLATE,
+    END_BUTTON,
+    NEXT_PAGE,
+    PREV_PAGE,
+    BACK_TO_SEARCH,
+    map_action_to_html,
+    parse_action,
+)
+
+SEARCH_PAGE = "search_page.html"
+RESULTS_PAGE = "results_page.html"
+ITEM_PAGE = "item_page.html"
+DONE_PAGE = "done_page.html"
+
+# Characters that BeautifulSoup treats as whitespace when collapsing strings
+ASCII_SPACES = "\x20\x0a\x09\x0c\x0d"
+
+
+def get_template_name(action):
+    """Name of the template that `map_action_to_html` renders for `action`"""
+    action_name, action_arg = parse_action(action)
+    if action_name == "start":
+        return SEARCH_PAGE
+    elif action_name == "search":
+        return RESULTS_PAGE
+    elif action_name == "click" and action_arg == END_BUTTON:
+        return DONE_PAGE
+    elif action_name == "click" and action_arg in ACTION_TO_TEMPLATE:
+        return ACTION_TO_TEMPLATE[action_arg]
+    elif action_name == "click":
+        return ITEM_PAGE
+    raise ValueError("Action name not recognized.")
+
+
+def parsed_text(text):
+    """Text node as stored by BeautifulSoup after parsing with `html.parser`.
+
+    Whitespace-only strings collapse to a newline if they contain one and to a
+    single space otherwise. Empty strings produce no text node (None).
+    """
+    text = str(text)
+    if not text:
+        return None
+    if not text.strip(ASCII_SPACES):
+        return "\n" if "\n" in text else " "
+    return text
+
+
+def visible_text(text):
+    """Text node as it appears in the `text` observation, or None if dropped"""
+    text = parsed_text(text)
+    if text is None or text == "\n":
+        return None
+    return text.strip()
+
+
+@dataclass
+class Page:
+    """A WebShop page, with the data its template is rendered from.
+
+    Attributes:
+      action: The action passed to `map_action_to_html` for this page.
+      template_name: The template the page is rendered with.
+      instruction_text: Instruction shown at the top of the page.
+      buttons: Labels of the buttons on the page, in document order.
+      products: Products listed on a search results page.
+      product: The product shown on an item page or item sub page.
+      options: Option name to option values of `product`.
+      context: All keyword arguments for rendering the page.
+    """
+
+    action: str
+    template_name: str
+    instruction_text: str | None
+    buttons: list[str] = field(default_factory=list)
+    products: list[dict] = field(default_factory=list)
+    product: dict | None = None
+    options: dict[str, list[str]] = field(default_factory=dict)
+    context: dict = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def from_action(cls, action, **kwargs):
+        """Build the page that `map_action_to_html(action, **kwargs)` renders"""
+        template_name = get_template_name(action)
+        page = cls(
+            action=action,
+            template_name=template_name,
+            instruction_text=kwargs.get("instruction_text"),
+            context=kwargs,
+        )
+        if template_name == SEARCH_PAGE:
+            page.buttons = ["Search"]
+        elif template_name == RESULTS_PAGE:
+            page.buttons = [BACK_TO_SEARCH]
+            if kwargs["page"] > 1:
+                page.buttons.append(PREV_PAGE)
+            page.buttons.append(NEXT_PAGE)
+            page.products = kwargs["products"]
+        elif template_name == ITEM_PAGE:
+            page.buttons = [BACK_TO_SEARCH, PREV_PAGE, "Description", "Features"]
+            page.buttons.append("Reviews")
+            if kwargs["show_attrs"]:
+                page.buttons.append("Attributes")
+            page.buttons.append(END_BUTTON)
+            page.product = kwargs["product_info"]
+            page.options = page.product["options"]
+        elif template_name != DONE_PAGE:
+            page.buttons = [BACK_TO_SEARCH, PREV_PAGE]
+            page.product = kwargs["product_info"]
+        return page
+
+    @property
+    def has_search_bar(self):
+        return self.template_name == SEARCH_PAGE
+
+    def render(self, renderer=None):
+        """Render the HTML of this page"""
+        return map_action_to_html(self.action, renderer=renderer, **self.context)
+
+    def get_clickables(self):
+        """Clickable text to element mapping, as scraped from the page HTML.
+
+        Elements are dicts carrying the HTML attributes that `SimServer` reads.
+        """
+        clickables = {
+            button.lower(): {"class": ["btn"], "type": "submit"}
+            for button in self.buttons
+        }
+        for product in self.products:
+            clickables[str(product["asin"]).lower()] = {"class": ["product-link"]}
+        for option_name, option_values in self.options.items():
+            for option_value in option_values:
+                clickables[str(option_value)] = {
+                    "type": "radio",
+                    "name": str(option_name),
+                    "value": str(option_value),
+                }
+        return clickables
+
+    def get_instruction_text(self):
+        """Text of the instruction header, as scraped from the page HTML"""
+        if self.template_name == DONE_PAGE:
+            return None
+        prefix = (
+            "Instruction: " if self.template_name == SEARCH_PAGE else "Instruction:"
+        )
+        return prefix + (parsed_text(self.instruction_text) or "")
+
+    def get_texts(self):
+        """Visible text nodes of the page HTML, in document order.
+
+        Returns None for pages whose text is not reproduced from the context.
+        """
+        if self.template_name == DONE_PAGE:
+            return None
+        if self.template_name == SEARCH_PAGE:
+            texts = ["WebShop", "Instruction: ", self.instruction_text, "Search"]
+            return texts
+        texts = ["Instruction:", self.instruction_text, BACK_TO_SEARCH]
+        context = self.context
+        if self.template_name == RESULTS_PAGE:
+            texts.append(f"Page {context['page']} (Total results: {context['total']})")
+            texts += self.buttons[1:]
+            for product in self.products:
+                texts += [product["asin"], product["Title"], product["Price"]]
+            return texts
+
+        product = self.product
+        texts.append(PREV_PAGE)
+        if self.template_name == ITEM_PAGE:
+            for option_name, option_values in self.options.items():
+                texts.append(option_name)
+                texts += option_values
+            texts += [
+                product["Title"],
+                f"Price: {product['Price']}",
+                f"Rating: {product['Rating']}",
+            ]
+            texts += self.buttons[2:]
+        elif self.template_name == ACTION_TO_TEMPLATE["Description"]:
+            texts.append(product["Description"])
+        elif self.template_name == ACTION_TO_TEMPLATE["Features"]:
+            texts += [f" {bullet_point}" for bullet_point in product["BulletPoints"]]
+        elif self.template_name == ACTION_TO_TEMPLATE["Reviews"]:
+            for review in product["Reviews"]:
+                texts += [
+                    f'"{review.get("title", "")}"',
+                    review.get("score", ""),
+                    review.get("body", ""),
+                ]
+        elif self.template_name == ACTION_TO_TEMPLATE["Attributes"]:
+            texts += [f" {attribute}" for attribute in product["Attributes"]]
+            texts += [
+                product["category"],
+                product["query"],
+                product["product_category"],
+            ]
+        return texts
+
+    def to_text(self):
+        """The `text` observation of the page, or None if not supported"""
+        texts = self.get_texts()
+        if texts is None:
+            return None
+        texts = (visible_text(t) for t in texts)
+        return " [SEP] ".join(t for t in texts if t is not None)
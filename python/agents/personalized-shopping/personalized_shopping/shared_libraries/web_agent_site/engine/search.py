@@ -0,0 +1,289 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Search backends that rank products for keyword searches in `SimServer`.
+
+  lucene -- Pyserini `LuceneSearcher` over the prebuilt `indexes_*` directories
+  bm25   -- In-process BM25 over a sparse document-term matrix, built from the
+            same `contents` that `convert_product_file_format.py` indexes
+
+Both return hits whose `docid` is the ASIN of the product.
+"""
+
+import abc
+from collections import Counter, namedtuple
+import json
+import os
+import re
+
+import numpy as np
+from rich import print
+from scipy import sparse
+
+from ..utils import BASE_DIR
+from .engine import init_search_engine
+
+SEARCH_BACKENDS = ("lucene", "bm25")
+
+BM25_INDEX_VERSION = 1
+BM25_WEIGHTS_FILE = "weights.npz"
+BM25_INDEX_FILE = "index.json"
+
+# Pyserini defaults
+BM25_K1 = 0.9
+BM25_B = 0.4
+
+# Lucene's default English stop words
+STOP_WORDS = frozenset(
+    [
+        "a", "an", "and", "are", "as", "at", "be", "but", "by", "for", "if",
+        "in", "into", "is", "it", "no", "not", "of", "on", "or", "such",
+        "that", "the", "their", "then", "there", "these", "they", "this",
+        "to", "was", "will", "with",
+    ]
+)  # fmt: skip
+TOKEN_PATTERN = re.compile(r"\w+(?:'\w+)*")
+
+SearchHit = namedtuple("SearchHit", ["docid", "score"])
+
+
+def get_document_contents(product):
+    """Text of a product that is indexed for keyword search"""
+    option_texts = []
+    options = product.get("options", {})
+    for option_name, option_contents in options.items():
+        option_contents_text = ", ".join(option_contents)
+        option_texts.append(f"{option_name}: {option_contents_text}")
+    option_text = ", and ".join(option_texts)
+    return " ".join(
+        [
+            product["Title"],
+            product["Description"],
+            product["BulletPoints"][0],
+            option_text,
+        ]
+    ).lower()
+
+
+def tokenize(text):
+    """Lowercased terms of `text`, without stop words and possessive 's"""
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if token.endswith("'s"):
+            token = token[:-2]
+        if token and token not in STOP_WORDS:
+            tokens.append(token)
+    return tokens
+
+
+def get_bm25_index_dir(num_products=None):
+    """Default location of the BM25 index for `num_products` products"""
+    size = "all" if num_products is None else str(num_products)
+    return os.path.join(BASE_DIR, f"../search_engine/bm25_{size}")
+
+
+class SearchBackend(abc.ABC):
+    """Ranks indexed products for keyword queries"""
+
+    @abc.abstractmethod
+    def search(self, query, k=10):
+        """Returns the top `k` hits for `query`, best first"""
+
+    def batch_search(self, queries, k=10):
+        """Returns the top `k` hits for each of `queries`"""
+        return [self.search(query, k=k) for query in queries]
+
+
+class LuceneBackend(SearchBackend):
+    """Pyserini `LuceneSearcher` over a prebuilt Lucene index"""
+
+    def __init__(self, searcher, threads=1):
+        self.searcher = searcher
+        self.threads = threads
+
+    @classmethod
+    def from_num_products(cls, num_products=None):
+        return cls(init_search_engine(num_products=num_products))
+
+    def search(self, query, k=10):
+        return self.searcher.search(query, k=k)
+
+    def batch_search(self, queries, k=10):
+        qids = [str(i) for i in range(len(queries))]
+        results = self.searcher.batch_search(
+            list(queries), qids, k=k, threads=self.threads
+        )
+        return [results[qid] for qid in qids]
+
+
+class BM25Backend(SearchBackend):
+    """BM25 over a sparse document-term matrix of precomputed term weights.
+
+    Each entry of `weights` is the BM25 score a document gets for one
+    occurrence of the term in a query, so scoring a batch of queries is a
+    single sparse matrix product. The matrix is stored by term column, so a
+    query only reads the columns of its own terms. Terms are split on word characters and stop
+    words are dropped as in Lucene, but not stemmed, so rankings are close to,
+    not identical to, the Lucene index.
+    """
+
+    def __init__(self, docids, vocabulary, weights, k1=BM25_K1, b=BM25_B):
+        self.docids = list(docids)
+        self.vocabulary = list(vocabulary)
+        self.term_to_idx = {term: idx for idx, term in enumerate(self.vocabulary)}
+        self.weights = sparse.csc_matrix(weights, dtype=np.float32)
+        self.k1 = k1
+        self.b = b
+
+    @classmethod
+    def from_documents(cls, documents, k1=BM25_K1, b=BM25_B):
+        """Build the index from (docid, contents) pairs"""
+        docids = []
+        term_to_idx = {}
+        rows, cols, counts, lengths = [], [], [], []
+        for row, (docid, contents) in enumerate(documents):
+            docids.append(docid)
+            tokens = tokenize(contents)
+            lengths.append(len(tokens))
+            for term, count in Counter(tokens).items():
+                rows.append(row)
+                cols.append(term_to_idx.setdefault(term, len(term_to_idx)))
+                counts.append(count)
+
+        num_docs, num_terms = len(docids), len(term_to_idx)
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        counts = np.asarray(counts, dtype=np.float64)
+        lengths = np.asarray(lengths, dtype=np.float64)
+
+        doc_freqs = np.bincount(cols, minlength=num_terms)
+        idf = np.log(1 + (num_docs - doc_freqs + 0.5) / (doc_freqs + 0.5))
+        avg_length = lengths.mean() if num_docs else 0.0
+        length_norm = k1 * (1 - b + b * lengths / max(avg_length, 1e-9))
+        tf = counts * (k1 + 1) / (counts + length_norm[rows])
+        weights = sparse.csr_matrix(
+            (idf[cols] * tf, (rows, cols)), shape=(num_docs, num_terms)
+        )
+        vocabulary = sorted(term_to_idx, key=term_to_idx.get)
+        print(f"Built BM25 index of {num_docs} documents and {num_terms} terms.")
+        return cls(docids, vocabulary, weights, k1=k1, b=b)
+
+    @classmethod
+    def from_products(cls, products, k1=BM25_K1, b=BM25_B):
+        """Build the index from catalog products, keyed by ASIN"""
+        documents = ((p["asin"], get_document_contents(p)) for p in products)
+        return cls.from_documents(documents, k1=k1, b=b)
+
+    @classmethod
+    def from_jsonl(cls, filepath, k1=BM25_K1, b=BM25_B):
+        """Build the index from a `documents.jsonl` file of the Lucene indexing"""
+
+        def read_documents():
+            with open(filepath) as f:
+                for line in f:
+                    doc = json.loads(line)
+                    yield doc["id"], doc["contents"]
+
+        return cls.from_documents(read_documents(), k1=k1, b=b)
+
+    def save(self, index_dir):
+        os.makedirs(index_dir, exist_ok=True)
+        sparse.save_npz(os.path.join(index_dir, BM25_WEIGHTS_FILE), self.weights)
+        index = {
+            "version": BM25_INDEX_VERSION,
+            "k1": self.k1,
+            "b": self.b,
+            "docids": self.docids,
+            "vocabulary": self.vocabulary,
+        }
+        with open(os.path.join(index_dir, BM25_INDEX_FILE), "w") as f:
+            json.dump(index, f)
+        return index_dir
+
+    @classmethod
+    def load(cls, index_dir):
+        with open(os.path.join(index_dir, BM25_INDEX_FILE)) as f:
+            index = json.load(f)
+        if index["version"] != BM25_INDEX_VERSION:
+            raise ValueError(
+                f"BM25 index {index_dir} has version {index['version']}, expected"
+                f" {BM25_INDEX_VERSION}. Please rebuild the index."
+            )
+        weights = sparse.load_npz(os.path.join(index_dir, BM25_WEIGHTS_FILE))
+        return cls(
+            index["docids"], index["vocabulary"], weights, k1=index["k1"], b=index["b"]
+        )
+
+    def get_query_matrix(self, queries):
+        """Term-query matrix holding how often each term occurs in each query"""
+        rows, cols, counts = [], [], []
+        for col, query in enumerate(queries):
+            for term, count in Counter(tokenize(query)).items():
+                if term in self.term_to_idx:
+                    rows.append(self.term_to_idx[term])
+                    cols.append(col)
+                    counts.append(count)
+        return sparse.csc_matrix(
+            (np.asarray(counts, dtype=np.float32), (rows, cols)),
+            shape=(len(self.vocabulary), len(queries)),
+        )
+
+    def search(self, query, k=10):
+        return self.batch_search([query], k=k)[0]
+
+    def batch_search(self, queries, k=10):
+        """Score all `queries` with one sparse matrix product.
+
+        Only documents containing a query term are returned; ties are broken
+        by document order, as in Lucene.
+        """
+        scores = (self.weights @ self.get_query_matrix(queries)).tocsc()
+        results = []
+        for col in range(len(queries)):
+            start, end = scores.indptr[col], scores.indptr[col + 1]
+            doc_idxs = scores.indices[start:end]
+            doc_scores = scores.data[start:end]
+            order = np.lexsort((doc_idxs, -doc_scores))[:k]
+            results.append(
+                [
+                    SearchHit(self.docids[doc_idxs[i]], float(doc_scores[i]))
+                    for i in order
+                ]
+            )
+        return results
+
+
+def init_search_backend(backend="lucene", num_products=None, all_products=None):
+    """Search backend for `SimServer`.
+
+    Arguments:
+
+    backend (`str` | `SearchBackend`) -- One of `SEARCH_BACKENDS`, or a backend
+      that is returned as is
+    num_products (`int`) -- Number of products of the catalog
+    all_products (`list`) -- Catalog products; the `bm25` backend is built from
+      them if no index was saved for `num_products`
+    """
+    if isinstance(backend, SearchBackend):
+        return backend
+    if backend == "lucene":
+        return LuceneBackend.from_num_products(num_products)
+    elif backend == "bm25":
+        index_dir = get_bm25_index_dir(num_products)
+        if os.path.exists(os.path.join(index_dir, BM25_INDEX_FILE)):
+            return BM25Backend.load(index_dir)
+        return BM25Backend.from_products(all_products)
+    raise ValueError(
+        f"Search backend {backend} not supported, expected one of {SEARCH_BACKENDS}."
+    )
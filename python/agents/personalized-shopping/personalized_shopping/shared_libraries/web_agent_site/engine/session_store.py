@@ -0,0 +1,157 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Bounded store for the user sessions of `SimServer`.
+
+Sessions are evicted least recently used first once the store is full, and
+dropped once they have not been used for `ttl` seconds. Finished sessions can
+be spilled to a JSON lines file as they leave the store, so their outcome is
+kept without holding them in memory.
+"""
+
+from collections import OrderedDict
+from collections.abc import MutableMapping
+import json
+import sys
+import threading
+import time
+
+# Default number of sessions kept in memory
+MAX_SESSIONS = 10000
+
+# Session values that are not written when a session is spilled
+UNSPILLED_KEYS = ("page_context",)
+
+
+def serialize_session(session_id, session):
+    """JSON record of a session, as written to the spill file"""
+    record = {"session_id": session_id, "spilled_at": time.time()}
+    for key, value in session.items():
+        if key in UNSPILLED_KEYS:
+            continue
+        if isinstance(value, set):
+            value = sorted(value)
+        elif isinstance(value, dict):
+            value = dict(value)
+        record[key] = value
+    return json.dumps(record, default=str)
+
+
+class SessionStore(MutableMapping):
+    """`user_sessions` mapping with LRU and TTL eviction.
+
+    Arguments:
+
+    max_size (`int`) -- Number of sessions kept; None keeps all of them
+    ttl (`float`) -- Seconds after its last use that a session is dropped;
+      None keeps sessions until they are evicted
+    spill_path (`str`) -- JSON lines file that finished sessions are appended
+      to when they leave the store; None drops them
+    """
+
+    def __init__(self, max_size=MAX_SESSIONS, ttl=None, spill_path=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.spill_path = spill_path
+        self.sessions = OrderedDict()
+        self.last_used = {}
+        self.lock = threading.RLock()
+        self.evictions = 0
+        self.expirations = 0
+        self.spills = 0
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def __iter__(self):
+        return iter(list(self.sessions))
+
+    def __contains__(self, session_id):
+        with self.lock:
+            return session_id in self.sessions and not self.is_expired(session_id)
+
+    def __getitem__(self, session_id):
+        with self.lock:
+            if session_id in self.sessions and self.is_expired(session_id):
+                self.remove(session_id)
+                self.expirations += 1
+            session = self.sessions[session_id]
+            self.touch(session_id)
+            return session
+
+    def __setitem__(self, session_id, session):
+        with self.lock:
+            self.sessions[session_id] = session
+            self.touch(session_id)
+            self.evict()
+
+    def __delitem__(self, session_id):
+        with self.lock:
+            if session_id not in self.sessions:
+                raise KeyError(session_id)
+            self.remove(session_id)
+
+    def touch(self, session_id):
+        self.sessions.move_to_end(session_id)
+        self.last_used[session_id] = time.monotonic()
+
+    def is_expired(self, session_id, now=None):
+        if self.ttl is None:
+            return False
+        now = time.monotonic() if now is None else now
+        return now - self.last_used[session_id] >= self.ttl
+
+    def remove(self, session_id):
+        """Drop a session, spilling it first if it is finished"""
+        session = self.sessions.pop(session_id)
+        del self.last_used[session_id]
+        if self.spill_path is not None and session.get("done"):
+            with open(self.spill_path, "a") as f:
+                f.write(serialize_session(session_id, session) + "\n")
+            self.spills += 1
+
+    def evict(self):
+        """Drop expired sessions, then the least recently used over `max_size`"""
+        now = time.monotonic()
+        while self.sessions:
+            session_id = next(iter(self.sessions))
+            if not self.is_expired(session_id, now):
+                break
+            self.remove(session_id)
+            self.expirations += 1
+        while self.max_size is not None and len(self.sessions) > self.max_size:
+            self.remove(next(iter(self.sessions)))
+            self.evictions += 1
+
+    def get_metrics(self):
+        """Counts of the store, with the approximate memory of its sessions.
+
+        `approx_bytes` covers the session dicts and the containers they hold,
+        not the goals and products they share with the server.
+        """
+        with self.lock:
+            approx_bytes = sys.getsizeof(self.sessions) + sys.getsizeof(self.last_used)
+            for session in self.sessions.values():
+                approx_bytes += sys.getsizeof(session)
+                for key, value in session.items():
+                    if key != "goal" and isinstance(value, (dict, set, list)):
+                        approx_bytes += sys.getsizeof(value)
+            return dict(
+                num_sessions=len(self.sessions),
+                max_size=self.max_size,
+                evictions=self.evictions,
+                expirations=self.expirations,
+                spills=self.spills,
+                approx_bytes=approx_bytes,
+            )
@@ -0,0 +1,118 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Pool of WebShop environments that share one `SimServer`.
+
+The server holds everything that is expensive and read-only: the product
+catalog, the search index and the goals. Each environment in the pool only
+holds a `SimBrowser` and the state of its own session, so a single host can
+run many shopping conversations or rollouts at once.
+"""
+
+from collections import OrderedDict
+import threading
+
+from ..engine.engine import parse_action
+from .web_agent_text_env import WebAgentTextEnv
+
+# Number of environments kept before the least recently used one is released
+MAX_POOL_ENVS = 1024
+
+
+class WebAgentEnvPool:
+    """Environments keyed by an arbitrary session key, e.g. an ADK session.
+
+    Arguments:
+
+    observation_mode (`str`) -- Observation mode of every environment
+    server (`SimServer`) -- Server to share; built by the first environment
+      from `kwargs` if not given
+    max_envs (`int`) -- Number of environments kept; the least recently used
+      one is released when a new one would exceed it, and its key gets a new
+      environment and session the next time it is used
+    kwargs -- Further `WebAgentTextEnv` arguments
+    """
+
+    def __init__(
+        self,
+        observation_mode="structured",
+        server=None,
+        max_envs=MAX_POOL_ENVS,
+        **kwargs,
+    ):
+        self.observation_mode = observation_mode
+        self.server = server
+        self.max_envs = max_envs
+        self.kwargs = kwargs
+        self.envs = OrderedDict()
+        self.lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.envs)
+
+    def __contains__(self, key):
+        return key in self.envs
+
+    def get(self, key):
+        """Returns the environment of `key`, creating and resetting it if new"""
+        with self.lock:
+            env = self.envs.get(key)
+            if env is None:
+                env = WebAgentTextEnv(
+                    observation_mode=self.observation_mode,
+                    server=self.server,
+                    **self.kwargs,
+                )
+                self.server = env.server
+                self.envs[key] = env
+                while len(self.envs) > self.max_envs:
+                    self.release(next(iter(self.envs)))
+            self.envs.move_to_end(key)
+            return env
+
+    def release(self, key):
+        """Drop the environment of `key` and its session on the server"""
+        with self.lock:
+            env = self.envs.pop(key, None)
+            if env is not None:
+                self.server.user_sessions.pop(env.session, None)
+
+    def reset(self, key, session=None, instruction_text=None):
+        """Start a new session for `key`; see `WebAgentTextEnv.reset`"""
+        return self.get(key).reset(session=session, instruction_text=instruction_text)
+
+    def step(self, key, action):
+        """Take `action` in the environment of `key`; see `WebAgentTextEnv.step`"""
+        return self.step_many({key: action})[key]
+
+    def step_many(self, actions):
+        """Take one action in each of several environments.
+
+        Arguments:
+
+        actions (`dict`) -- Maps session keys to actions
+
+        Returns a dict mapping each key to its (observation, reward, done,
+        info). The full-text searches of all actions are run as one batch on
+        the search backend before the environments are stepped.
+        """
+        with self.lock:
+            envs = {key: self.get(key) for key in actions}
+            all_keywords = []
+            for action in actions.values():
+                action_name, action_arg = parse_action(action)
+                if action_name == "search" and action_arg:
+                    all_keywords.append(action_arg.lower().split(" "))
+            self.server.prefetch_searches(all_keywords)
+            return {key: envs[key].step(action) for key, action in actions.items()}
@@ -12,7 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from collections import defaultdict
+from collections import defaultdict, deque
 import json
 import random
 import string
@@ -23,26 +23,31 @@ from flask import Flask
 import gym
 from gym.envs.registration import register
 import numpy as np
-import torch
 from ..engine.engine import (
     ACTION_TO_TEMPLATE,
     BACK_TO_SEARCH,
     END_BUTTON,
     NEXT_PAGE,
     PREV_PAGE,
+    SEARCH_CACHE_SIZE,
+    SEARCH_RETURN_N,
+    SearchResultCache,
+    TemplateRenderer,
     get_product_per_page,
+    get_search_key,
     get_top_n_product_from_keywords,
-    init_search_engine,
-    load_products,
-    map_action_to_html,
     parse_action,
 )
-from ..engine.goal import get_goals, get_reward
+from ..engine.catalog import get_product_indexes, load_catalog
+from ..engine.goal import get_goal_weights, get_goals, get_reward, select_goals
+from ..engine.image_features import FEAT_DIM, get_image_features
+from ..engine.page import ITEM_PAGE, Page
+from ..engine.search import init_search_backend
+from ..engine.session_store import MAX_SESSIONS, SessionStore
 from ..utils import (
     DEFAULT_FILE_PATH,
-    FEAT_CONV,
-    FEAT_IDS,
     random_idx,
+    weighted_sample,
 )
 
 
@@ -63,7 +68,11 @@ class WebAgentTextEnv(gym.Env):
 
         Arguments:
 
-        observation_mode (`str`) -- ['html' | 'text'] (default 'html')
+        observation_mode (`str`) -- ['html' | 'text' | 'text_rich' | 'url' |
+          'structured'] (default 'html'). 'structured' yields the same text as
+          'text', serialized from the page's `Page` without rendering or parsing
+          HTML; the HTML is only rendered if `state['html']` is read
+        catalog_dir (`str`) -- Directory of a compiled product catalog
         get_image
         filter_goals
         limit_goals
@@ -72,6 +81,8 @@ class WebAgentTextEnv(gym.Env):
         session
         session_prefix
         show_attrs
+        use_page_context (`bool`) -- If true, read clickables and the `text`
+          observation from the page's render context instead of parsing HTML
         """
         super(WebAgentTextEnv, self).__init__()
         self.observation_mode = observation_mode
@@ -89,6 +100,17 @@ class WebAgentTextEnv(gym.Env):
                 self.kwargs.get("num_products"),
                 self.kwargs.get("human_goals"),
                 self.kwargs.get("show_attrs", False),
+                self.kwargs.get("catalog_dir"),
+                render_html=self.observation_mode != "structured",
+                search_cache_size=self.kwargs.get(
+                    "search_cache_size", SEARCH_CACHE_SIZE
+                ),
+                search_cache_ttl=self.kwargs.get("search_cache_ttl"),
+                search_backend=self.kwargs.get("search_backend", "lucene"),
+                max_sessions=self.kwargs.get("max_sessions", MAX_SESSIONS),
+                session_ttl=self.kwargs.get("session_ttl"),
+                session_spill_path=self.kwargs.get("session_spill_path"),
+                unique_session_goals=self.kwargs.get("unique_session_goals", False),
             )
             if server is None
             else server
@@ -97,10 +119,16 @@ class WebAgentTextEnv(gym.Env):
 
         self.session = self.kwargs.get("session")
         self.session_prefix = self.kwargs.get("session_prefix")
+        self.use_page_context = (
+            self.kwargs.get("use_page_context", False)
+            or self.observation_mode == "structured"
+        )
+        self._parsed_html = None
+        self._text_observation = None
+        # Seconds spent parsing HTML with BeautifulSoup
+        self.parse_time = 0
         if self.kwargs.get("get_image", 0):
-            self.feats = torch.load(FEAT_CONV)
-            self.ids = torch.load(FEAT_IDS)
-            self.ids = {url: idx for idx, url in enumerate(self.ids)}
+            self.image_features = get_image_features()
         self.prev_obs = []
         self.prev_actions = []
         self.num_prev_obs = self.kwargs.get("num_prev_obs", 0)
@@ -150,6 +178,14 @@ class WebAgentTextEnv(gym.Env):
 
     def get_available_actions(self):
         """Returns list of available actions at the current step"""
+        page = self.browser.page if self.use_page_context else None
+        if page is not None:
+            self.text_to_clickable = page.get_clickables()
+            return dict(
+                has_search_bar=page.has_search_bar,
+                clickables=list(self.text_to_clickable.keys()),
+            )
+
         html_obj = self._parse_html()
 
         # Collect search bar, buttons, links, and options as clickables
@@ -171,19 +207,20 @@ class WebAgentTextEnv(gym.Env):
         )
 
     def get_image(self):
-        """Scrape image from page HTML and return as a list of pixel values"""
-        html_obj = self._parse_html(self.browser.page_source)
-        image_url = html_obj.find(id="product-image")
-        if image_url is not None:
-            image_url = image_url["src"]
-            if image_url in self.ids:
-                image_idx = self.ids[image_url]
-                image = self.feats[image_idx]
-                return image
-        return torch.zeros(512)
+        """Returns the image feature of the product on the current item page"""
+        torch = import_torch()
+        page = self.browser.page
+        if page is not None and page.template_name == ITEM_PAGE:
+            features = self.image_features.get(page.product["MainImage"])
+            if features is not None:
+                return torch.from_numpy(np.array(features))
+        return torch.zeros(FEAT_DIM)
 
     def get_instruction_text(self):
         """Get corresponding instruction text for current environment session"""
+        page = self.browser.page if self.use_page_context else None
+        if page is not None:
+            return page.get_instruction_text()
         html_obj = self._parse_html(self.browser.page_source)
         instruction_text = html_obj.find(id="instruction-text").h4.text
         return instruction_text
@@ -191,26 +228,31 @@ class WebAgentTextEnv(gym.Env):
     def _parse_html(self, html=None):
         """Returns web request result wrapped in BeautifulSoup object
 
+        The parsed object of the last page is cached and reused for as long as
+        the page source does not change; callers must not modify it.
+
         Arguments:
 
         url (`str`): If no url or html is provided, use the current
             observation (HTML) for parsing.
         """
         if html is None:
-            html = self.state["html"]
-        html_obj = BeautifulSoup(html, "html.parser")
-        return html_obj
+            html = self.browser.page_source
+        if self._parsed_html is None or self._parsed_html[0] != html:
+            old_time = time.time()
+            self._parsed_html = (html, BeautifulSoup(html, "html.parser"))
+            self.parse_time += time.time() - old_time
+        return self._parsed_html[1]
 
     @property
     def observation(self):
         """Compiles state into either the `html` or `text` observation mode"""
-        html = self.state["html"]
         if self.observation_mode == "html":
-            return html
-        elif self.observation_mode == "text":
-            return self.convert_html_to_text(html, simple=True)
+            return self.state["html"]
+        elif self.observation_mode in ("text", "structured"):
+            return self.get_text_observation()
         elif self.observation_mode == "text_rich":
-            return self.convert_html_to_text(html, simple=False)
+            return self.convert_html_to_text(self.state["html"], simple=False)
         elif self.observation_mode == "url":
             return self.state["url"]
         else:
@@ -229,6 +271,19 @@ class WebAgentTextEnv(gym.Env):
             instruction_text=self.instruction_text,
         )
 
+    def get_text_observation(self):
+        """Returns the `text` observation of the page, computed once per page"""
+        page = self.browser.page if self.use_page_context else None
+        key = self.browser.page_source if page is None else page
+        if self._text_observation is None or self._text_observation[0] is not key:
+            observation = page.to_text() if page is not None else None
+            if observation is None:
+                observation = self.convert_html_to_text(
+                    self.browser.page_source, simple=True
+                )
+            self._text_observation = (key, observation)
+        return self._text_observation[1]
+
     def convert_html_to_text(self, html, simple=False):
         """Strip HTML of tags and add separators to convert observation into simple mode"""
         texts = self._parse_html(html).findAll(text=True)
@@ -238,6 +293,10 @@ class WebAgentTextEnv(gym.Env):
             return " [SEP] ".join(t.strip() for t in visible_texts if t != "\n")
         else:
             # Otherwise, return an observation with tags mapped to specific, unique separators
+            url = self.browser.current_url
+            # The session may have been evicted since the last step
+            session = self.server.user_sessions.get(self.session, {})
+            clicked_asins = session.get("asins", set())
             observation = ""
             for t in visible_texts:
                 if t == "\n":
@@ -245,13 +304,13 @@ class WebAgentTextEnv(gym.Env):
                 if t.parent.name == "button":  # button
                     processed_t = f"[button] {t} [button_]"
                 elif t.parent.name == "label":  # options
-                    if f'"{t}"' in self.state["url"]:
+                    if f'"{t}"' in url:
                         processed_t = f"  [clicked button] {t} [clicked button_]"
                         observation = f"You have clicked {t}.\n" + observation
                     else:
                         processed_t = f"  [button] {t} [button_]"
                 elif t.parent.get("class") == ["product-link"]:  # product asins
-                    if f"{t}" in self.server.user_sessions[self.session]["asins"]:
+                    if f"{t}" in clicked_asins:
                         processed_t = f"\n[clicked button] {t} [clicked button_]"
                     else:
                         processed_t = f"\n[button] {t} [button_]"
@@ -293,6 +352,15 @@ class WebAgentTextEnv(gym.Env):
         pass
 
 
+def import_torch():
+    """Imports torch, which is only needed for image features"""
+    import torch
+
+    # Workaround to Resolve the PyTorch-Streamlit Incompatibility Issue
+    torch.classes.__path__ = []
+    return torch
+
+
 def tag_visible(element):
     ignore = {"style", "script", "head", "title", "meta", "[document]"}
     return element.parent.name not in ignore and not isinstance(element, Comment)
@@ -310,6 +378,15 @@ class SimServer:
         num_products=None,
         human_goals=0,
         show_attrs=False,
+        catalog_dir=None,
+        render_html=True,
+        search_cache_size=SEARCH_CACHE_SIZE,
+        search_cache_ttl=None,
+        search_backend="lucene",
+        max_sessions=MAX_SESSIONS,
+        session_ttl=None,
+        session_spill_path=None,
+        unique_session_goals=False,
     ):
         """Constructor for simulated server serving WebShop application
 
@@ -321,55 +398,154 @@ class SimServer:
         num_products (`int`) -- Number of products to search across
         human_goals (`bool`) -- If true, load human goals; otherwise, load synthetic
           goals
+        catalog_dir (`str`) -- Directory of a compiled product catalog; defaults to
+          the catalog compiled for `num_products` and `human_goals`, and falls back
+          to parsing `file_path` if none was compiled
+        render_html (`bool`) -- If false, handlers return no HTML and only keep
+          each page's `Page`; `SimBrowser` renders the HTML when it is read
+        search_cache_size (`int`) -- Number of searches whose ranked results are
+          cached across sessions, so paging and going back reuse them; 0
+          disables the cache
+        search_cache_ttl (`float`) -- Seconds a cached search stays valid; None
+          keeps it until evicted
+        search_backend (`str` | `SearchBackend`) -- Backend that ranks products
+          for keyword searches, 'lucene' (default) or 'bm25'; see
+          `engine.search`
+        max_sessions (`int`) -- Number of user sessions kept; the least recently
+          used one is evicted when a new one would exceed it, and an action on
+          an evicted session starts it over; None keeps all of them
+        session_ttl (`float`) -- Seconds after its last action that a session is
+          evicted; None keeps it until evicted for `max_sessions`
+        session_spill_path (`str`) -- JSON lines file that finished sessions are
+          appended to when evicted; see `engine.session_store`
+        unique_session_goals (`bool`) -- If true, sessions without a given goal
+          index draw goals by weight without replacement, so no goal repeats
+          until every goal has been assigned
         """
         # Load all products, goals, and search engine
         self.base_url = base_url
-        self.all_products, self.product_item_dict, self.product_prices, _ = (
-            load_products(
-                filepath=file_path,
-                num_products=num_products,
-                human_goals=human_goals,
-            )
+        (
+            self.all_products,
+            self.product_item_dict,
+            self.product_prices,
+            self.attribute_to_asins,
+        ) = load_catalog(
+            filepath=file_path,
+            num_products=num_products,
+            human_goals=human_goals,
+            catalog_dir=catalog_dir,
+        )
+        self.product_indexes = get_product_indexes(self.all_products)
+        self.search_engine = init_search_backend(
+            search_backend, num_products=num_products, all_products=self.all_products
         )
-        self.search_engine = init_search_engine(num_products=num_products)
         self.goals = get_goals(self.all_products, self.product_prices, human_goals)
         self.show_attrs = show_attrs
 
         # Fix outcome for random shuffling of goals
         random.seed(233)
-        random.shuffle(self.goals)
+        order = list(range(len(self.goals)))
+        random.shuffle(order)
+        self.goals = select_goals(self.goals, order)
 
         # Apply `filter_goals` parameter if exists to select speific goal(s)
         if filter_goals is not None:
-            self.goals = [
-                goal for (i, goal) in enumerate(self.goals) if filter_goals(i, goal)
-            ]
+            self.goals = select_goals(
+                self.goals,
+                [i for (i, goal) in enumerate(self.goals) if filter_goals(i, goal)],
+            )
 
         # Imposes `limit` on goals via random selection
         if limit_goals != -1 and limit_goals < len(self.goals):
-            self.weights = [goal["weight"] for goal in self.goals]
-            self.cum_weights = [0] + np.cumsum(self.weights).tolist()
-            idxs = []
-            while len(idxs) < limit_goals:
-                idx = random_idx(self.cum_weights)
-                if idx not in idxs:
-                    idxs.append(idx)
-            self.goals = [self.goals[i] for i in idxs]
+            idxs = weighted_sample(
+                get_goal_weights(self.goals), limit_goals, seed=random.getrandbits(32)
+            )
+            self.goals = select_goals(self.goals, idxs.tolist())
         print(f"Loaded {len(self.goals)} goals.")
 
         # Set extraneous housekeeping variables
-        self.weights = [goal["weight"] for goal in self.goals]
-        self.cum_weights = [0] + np.cumsum(self.weights).tolist()
-        self.user_sessions = dict()
+        self.weights = get_goal_weights(self.goals)
+        self.cum_weights = np.concatenate([[0.0], np.cumsum(self.weights)])
+        self.unique_session_goals = unique_session_goals
+        self.goal_queue = deque()
+        self.user_sessions = SessionStore(max_sessions, session_ttl, session_spill_path)
+        self.renderer = TemplateRenderer(app.url_map)
+        self.render_html = render_html
+        self.search_cache = SearchResultCache(search_cache_size, search_cache_ttl)
         self.search_time = 0
+        self.search_cache_hits = 0
+        self.search_cache_misses = 0
         self.render_time = 0
+        self.reward_time = 0
         self.sample_time = 0
         self.assigned_instruction_text = None  # TODO: very hacky, should remove
 
+    def sample_goal_idx(self):
+        """Index of the goal of a new session, drawn by goal weight"""
+        if not self.unique_session_goals:
+            return random_idx(self.cum_weights)
+        if not self.goal_queue:
+            self.goal_queue.extend(
+                weighted_sample(
+                    self.weights, len(self.weights), seed=random.getrandbits(32)
+                ).tolist()
+            )
+        return self.goal_queue.popleft()
+
+    def set_instruction_text(self, session_id, instruction_text):
+        """Show `instruction_text` instead of the goal instruction in one session.
+
+        Unlike `assigned_instruction_text`, which applies to all sessions, this
+        lets concurrent sessions on a shared server keep their own instruction.
+        An evicted session is started over, as in `receive`.
+        """
+        session = self.user_sessions.get(session_id)
+        if session is None:
+            session = self.start_session(session_id)
+        session["assigned_instruction_text"] = instruction_text
+
+    def get_assigned_instruction_text(self, session_id):
+        """Instruction text assigned to the session, else the server-wide one"""
+        session = self.user_sessions.get(session_id, {})
+        return session.get("assigned_instruction_text", self.assigned_instruction_text)
+
+    def start_session(self, session_id, session_int=None):
+        """Create a session with the goal at index `session_int`, else a sampled one"""
+        idx = (
+            session_int
+            if (session_int is not None and isinstance(session_int, int))
+            else self.sample_goal_idx()
+        )
+        session = {"goal": self.goals[idx], "done": False}
+        self.user_sessions[session_id] = session
+        return session
+
+    def render(self, action, **kwargs):
+        """Keep the session's `Page` for `action` and render its HTML.
+
+        Returns None without rendering if `render_html` is false.
+        """
+        page = Page.from_action(action, **kwargs)
+        self.user_sessions[kwargs["session_id"]]["page_context"] = page
+        if not self.render_html:
+            return None
+        return self.render_page(page)
+
+    def render_page(self, page):
+        """Render the HTML of a `Page` and record the time it takes.
+
+        The total is kept in `render_time`; `renderer.render_time` breaks it
+        down per template.
+        """
+        old_time = time.time()
+        html = page.render(renderer=self.renderer)
+        self.render_time += time.time() - old_time
+        return html
+
     @app.route("/", methods=["GET", "POST"])
     def index(self, session_id, **kwargs):
         """Redirect to the search page with the given session ID"""
-        html = map_action_to_html(
+        html = self.render(
             "start",
             session_id=session_id,
             instruction_text=kwargs["instruction_text"],
@@ -394,16 +570,14 @@ class SimServer:
 
         # Perform search on keywords from items and record amount of time it takes
         old_time = time.time()
-        top_n_products = get_top_n_product_from_keywords(
-            keywords,
-            self.search_engine,
-            self.all_products,
-            self.product_item_dict,
-        )
+        top_n_asins = self.search_products(keywords)
         self.search_time += time.time() - old_time
 
         # Get product list from search result asins and get list of corresponding URLs
-        products = get_product_per_page(top_n_products, page)
+        products = [
+            self.product_item_dict[asin]
+            for asin in get_product_per_page(top_n_asins, page)
+        ]
 
         keywords_url_string = "+".join(keywords)
         url = (
@@ -411,23 +585,73 @@ class SimServer:
             f"{keywords_url_string}/{page}"
         )
 
-        # Render HTML search page and record amount of time taken
-        old_time = time.time()
-        html = map_action_to_html(
+        # Render HTML search page
+        html = self.render(
             "search",
             session_id=session_id,
             products=products,
             keywords=session["keywords"],
             page=page,
-            total=len(top_n_products),
+            total=len(top_n_asins),
             # This is used for reward computation
             # instruction_text=session['goal']['instruction_text'],
             # This is used for rendering the page
-            instruction_text=self.assigned_instruction_text,
+            instruction_text=self.get_assigned_instruction_text(session_id),
         )
-        self.render_time += time.time() - old_time
         return html, url
 
+    def prefetch_searches(self, all_keywords):
+        """Run the uncached full-text searches of `all_keywords` as one batch.
+
+        Results go into `search_cache`, so the sessions that issue these
+        searches next do not search one at a time.
+        """
+        if self.search_cache.maxsize <= 0:
+            return
+        queries = {}
+        for keywords in all_keywords:
+            key = get_search_key(keywords)
+            if (
+                isinstance(key, str)
+                and key not in queries
+                and self.search_cache.get(key) is None
+            ):
+                queries[key] = " ".join(keywords)
+        if not queries:
+            return
+        old_time = time.time()
+        all_hits = self.search_engine.batch_search(
+            list(queries.values()), k=SEARCH_RETURN_N
+        )
+        for key, hits in zip(queries, all_hits):
+            top_n_asins = [
+                hit.docid for hit in hits if hit.docid in self.product_item_dict
+            ]
+            self.search_cache.put(key, top_n_asins)
+        self.search_time += time.time() - old_time
+
+    def search_products(self, keywords):
+        """Returns the ranked ASINs for `keywords`, cached across sessions"""
+        key = get_search_key(keywords)
+        if key is not None:
+            top_n_asins = self.search_cache.get(key)
+            if top_n_asins is not None:
+                self.search_cache_hits += 1
+                return top_n_asins
+            self.search_cache_misses += 1
+        top_n_products = get_top_n_product_from_keywords(
+            keywords,
+            self.search_engine,
+            self.all_products,
+            self.product_item_dict,
+            self.attribute_to_asins,
+            self.product_indexes,
+        )
+        top_n_asins = [p["asin"] for p in top_n_products]
+        if key is not None:
+            self.search_cache.put(key, top_n_asins)
+        return top_n_asins
+
     @app.route("/", methods=["GET", "POST"])
     def item_page(self, session_id, **kwargs):
         """Render and return the HTML for a product item page"""
@@ -460,7 +684,7 @@ class SimServer:
             f'{session["page"]}/{option_string}'
         )
 
-        html = map_action_to_html(
+        html = self.render(
             "click",
             session_id=session_id,
             product_info=product_info,
@@ -471,7 +695,7 @@ class SimServer:
             # This is used for reward computation
             # instruction_text=session['goal']['instruction_text'],
             # This is used for rendering the page
-            instruction_text=self.assigned_instruction_text,
+            instruction_text=self.get_assigned_instruction_text(session_id),
             show_attrs=self.show_attrs,
         )
         return html, url
@@ -498,7 +722,7 @@ class SimServer:
             f'{session["asin"]}/{keywords_url_string}/{session["page"]}/'
             f'{clickable_name}/{session["options"]}'
         )
-        html = map_action_to_html(
+        html = self.render(
             f"click[{clickable_name}]",
             session_id=session_id,
             product_info=product_info,
@@ -509,7 +733,7 @@ class SimServer:
             # This is used for reward computation
             # instruction_text=session['goal']['instruction_text'],
             # This is used for rendering the page
-            instruction_text=self.assigned_instruction_text,
+            instruction_text=self.get_assigned_instruction_text(session_id),
         )
         return html, url
 
@@ -523,6 +747,7 @@ class SimServer:
         price = self.product_prices.get(session["asin"])
 
         # Calculate reward for selected product and set variables for page details
+        old_time = time.time()
         reward, info = get_reward(
             purchased_product,
             goal,
@@ -530,6 +755,7 @@ class SimServer:
             options=session["options"],
             verbose=True,
         )
+        self.reward_time += time.time() - old_time
 
         self.user_sessions[session_id]["verbose_info"] = info
         self.user_sessions[session_id]["done"] = True
@@ -539,7 +765,7 @@ class SimServer:
             f"{self.base_url}/done/{session_id}/"
             f'{session["asin"]}/{session["options"]}'
         )
-        html = map_action_to_html(
+        html = self.render(
             f"click[{END_BUTTON}]",
             session_id=session_id,
             reward=reward,
@@ -548,7 +774,7 @@ class SimServer:
             # This is used for reward computation
             # instruction_text=session['goal']['instruction_text'],
             # This is used for rendering the page
-            instruction_text=self.assigned_instruction_text,
+            instruction_text=self.get_assigned_instruction_text(session_id),
         )
         return html, url, reward
 
@@ -556,103 +782,103 @@ class SimServer:
         """Map action to the corresponding page"""
         status = dict(reward=0.0, done=False)
 
-        with app.app_context(), app.test_request_context():
-            # Create/determine goal, instruction_text from current session
-            if session_id not in self.user_sessions:
-                idx = (
-                    session_int
-                    if (session_int is not None and isinstance(session_int, int))
-                    else random_idx(self.cum_weights)
+        # Create/determine goal, instruction_text from current session
+        session = self.user_sessions.get(session_id)
+        if session is None:
+            session = self.start_session(session_id, session_int)
+        if "asins" not in session:
+            # An action on a new or evicted session starts it over
+            kwargs = {}
+        instruction_text = session["goal"]["instruction_text"]
+        assigned_instruction_text = self.get_assigned_instruction_text(session_id)
+        if assigned_instruction_text is not None:
+            # TODO: very hacky, should remove
+            instruction_text = assigned_instruction_text
+            # Copy the goal, as goals are shared by all sessions of the server
+            self.user_sessions[session_id]["goal"] = dict(
+                self.user_sessions[session_id]["goal"],
+                instruction_text=instruction_text,
+            )
+        session = self.user_sessions[session_id]
+
+        if not kwargs:
+            # If no action, reset the session variables
+            kwargs["instruction_text"] = instruction_text
+            html, url = self.index(session_id, **kwargs)
+            self.user_sessions[session_id].update(
+                {
+                    "keywords": None,
+                    "page": None,
+                    "asin": None,
+                    "asins": set(),
+                    "options": dict(),
+                    "actions": defaultdict(int),
+                }
+            )
+        elif "keywords" in kwargs:
+            # If search keywords are available, run a search
+            html, url = self.search_results(session_id, **kwargs)
+        elif "clickable_name" in kwargs:
+            clickable_name = kwargs["clickable_name"].lower()
+            if clickable_name == END_BUTTON.lower():
+                # If "buy now" clicked, calculate reward and flag session as terminated
+                html, url, reward = self.done(session_id, **kwargs)
+                status["reward"] = reward
+                status["done"] = True
+            elif clickable_name == BACK_TO_SEARCH.lower():
+                # If "back to search" clicked, recursively reset the session back to search page
+                html, url, status = self.receive(session_id, current_url)
+            elif (
+                clickable_name == NEXT_PAGE.lower()
+                and self.get_page_name(current_url) == "search_results"
+            ):
+                # If "next page" clicked from search results, re-render with `page` enumerated
+                html, url, status = self.receive(
+                    session_id,
+                    current_url,
+                    keywords=session["keywords"],
+                    page=session["page"] + 1,
                 )
-                goal = self.goals[idx]
-                instruction_text = goal["instruction_text"]
-                self.user_sessions[session_id] = {"goal": goal, "done": False}
-            else:
-                instruction_text = self.user_sessions[session_id]["goal"][
-                    "instruction_text"
-                ]
-            if self.assigned_instruction_text is not None:
-                instruction_text = (
-                    self.assigned_instruction_text
-                )  # TODO: very hacky, should remove
-                self.user_sessions[session_id]["goal"][
-                    "instruction_text"
-                ] = instruction_text
-            session = self.user_sessions[session_id]
-
-            if not kwargs:
-                # If no action, reset the session variables
-                kwargs["instruction_text"] = instruction_text
-                html, url = self.index(session_id, **kwargs)
-                self.user_sessions[session_id].update(
-                    {
-                        "keywords": None,
-                        "page": None,
-                        "asin": None,
-                        "asins": set(),
-                        "options": dict(),
-                        "actions": defaultdict(int),
-                    }
+            elif (
+                clickable_name == PREV_PAGE.lower()
+                and self.get_page_name(current_url) == "search_results"
+            ):
+                # If "prev page" clicked from search results, re-render with `page` denumerated
+                html, url, status = self.receive(
+                    session_id,
+                    current_url,
+                    keywords=session["keywords"],
+                    page=session["page"] - 1,
+                )
+            elif (
+                clickable_name == PREV_PAGE.lower()
+                and self.get_page_name(current_url) == "item_sub_page"
+            ):
+                # If "prev page" clicked from sub page, return to corresponding item page
+                html, url = self.item_page(session_id, **kwargs)
+            elif (
+                clickable_name == PREV_PAGE.lower()
+                and self.get_page_name(current_url) == "item_page"
+            ):
+                # If "prev page" clicked from item page, return to search results page
+                html, url = self.search_results(
+                    session_id,
+                    keywords=session["keywords"],
+                    page=session["page"],
+                    **kwargs,
                 )
-            elif "keywords" in kwargs:
-                # If search keywords are available, run a search
-                html, url = self.search_results(session_id, **kwargs)
-            elif "clickable_name" in kwargs:
-                clickable_name = kwargs["clickable_name"].lower()
-                if clickable_name == END_BUTTON.lower():
-                    # If "buy now" clicked, calculate reward and flag session as terminated
-                    html, url, reward = self.done(session_id, **kwargs)
-                    status["reward"] = reward
-                    status["done"] = True
-                elif clickable_name == BACK_TO_SEARCH.lower():
-                    # If "back to search" clicked, recursively reset the session back to search page
-                    html, url, status = self.receive(session_id, current_url)
-                elif (
-                    clickable_name == NEXT_PAGE.lower()
-                    and self.get_page_name(current_url) == "search_results"
-                ):
-                    # If "next page" clicked from search results, re-render with `page` enumerated
-                    html, url, status = self.receive(
-                        session_id,
-                        current_url,
-                        keywords=session["keywords"],
-                        page=session["page"] + 1,
-                    )
-                elif (
-                    clickable_name == PREV_PAGE.lower()
-                    and self.get_page_name(current_url) == "search_results"
-                ):
-                    # If "prev page" clicked from search results, re-render with `page` denumerated
-                    html, url, status = self.receive(
-                        session_id,
-                        current_url,
-                        keywords=session["keywords"],
-                        page=session["page"] - 1,
-                    )
-                elif (
-                    clickable_name == PREV_PAGE.lower()
-                    and self.get_page_name(current_url) == "item_sub_page"
-                ):
-                    # If "prev page" clicked from sub page, return to corresponding item page
-                    html, url = self.item_page(session_id, **kwargs)
-                elif (
-                    clickable_name == PREV_PAGE.lower()
-                    and self.get_page_name(current_url) == "item_page"
-                ):
-                    # If "prev page" clicked from item page, return to search results page
-                    html, url = self.search_results(
-                        session_id,
-                        keywords=session["keywords"],
-                        page=session["page"],
-                        **kwargs,
-                    )
-                elif clickable_name in [k.lower() for k in ACTION_TO_TEMPLATE]:
-                    # Render item_sub_page if clickable is description, features, or reviews
-                    html, url = self.item_sub_page(session_id, **kwargs)
-                else:
-                    # Otherwise, render current item page
-                    html, url = self.item_page(session_id, **kwargs)
-            return html, url, status
+            elif clickable_name in [k.lower() for k in ACTION_TO_TEMPLATE]:
+                # Render item_sub_page if clickable is description, features, or reviews
+                html, url = self.item_sub_page(session_id, **kwargs)
+            else:
+                # Otherwise, render current item page
+                html, url = self.item_page(session_id, **kwargs)
+        return html, url, status
+
+    def get_page(self, session_id):
+        """Returns the `Page` last rendered for the session"""
+        session = self.user_sessions.get(session_id)
+        return None if session is None else session.get("page_context")
 
     def get_page_name(self, url):
         """Determine which page (i.e.
@@ -674,15 +900,31 @@ class SimBrowser:
     def __init__(self, server):
         self.server = server
         self.current_url = None
-        self.page_source = None
+        self._page_source = None
+        self.page = None
         self.session_id = None
 
+    @property
+    def page_source(self):
+        """HTML of the current page, rendered on first read if the server skipped it"""
+        if self._page_source is None:
+            page = self.page
+            if page is not None:
+                self._page_source = self.server.render_page(page)
+        return self._page_source
+
+    @page_source.setter
+    def page_source(self, html):
+        self._page_source = html
+
     def get(self, url, session_id=None, session_int=None):
         """Set browser variables to corresponding link, page HTML for URL"""
         self.session_id = url.split("/")[-1] if session_id is None else session_id
         self.page_source, _, _ = self.server.receive(
             self.session_id, self.current_url, session_int=session_int
         )
+        # Kept by the browser, as the server may evict the session
+        self.page = self.server.get_page(self.session_id)
         self.current_url = url
 
     def click(self, clickable_name, text_to_clickable):
@@ -693,6 +935,7 @@ class SimBrowser:
             clickable_name=clickable_name,
             text_to_clickable=text_to_clickable,
         )
+        self.page = self.server.get_page(self.session_id)
         return status
 
     def search(self, keywords):
@@ -704,6 +947,7 @@ class SimBrowser:
             current_url=self.current_url,
             keywords=keywords,
         )
+        self.page = self.server.get_page(self.session_id)
         return status
 
 
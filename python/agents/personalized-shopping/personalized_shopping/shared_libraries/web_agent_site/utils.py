@@ -12,11 +12,11 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import bisect
 import hashlib
 import logging
 from os.path import abspath, dirname, join
 import random
+import numpy as np
 
 BASE_DIR = dirname(abspath(__file__))
 DEBUG_PROD_SIZE = None  # set to `None` to disable
@@ -26,8 +26,14 @@ DEFAULT_FILE_PATH = join(BASE_DIR, "../data/items_shuffle.json")
 
 DEFAULT_REVIEW_PATH = join(BASE_DIR, "../data/reviews.json")
 
+# Parent directory of catalogs written by `engine.catalog.compile_catalog`
+CATALOG_DIR = join(BASE_DIR, "../data")
+
 FEAT_CONV = join(BASE_DIR, "../data/feat_conv.pt")
 FEAT_IDS = join(BASE_DIR, "../data/feat_ids.pt")
+# Written from FEAT_CONV and FEAT_IDS by `engine.image_features`
+FEAT_NPY = join(BASE_DIR, "../data/feat_conv.npy")
+FEAT_URLS = join(BASE_DIR, "../data/feat_urls.json")
 
 HUMAN_ATTR_PATH = join(BASE_DIR, "../data/items_human_ins.json")
 HUMAN_ATTR_PATH = join(BASE_DIR, "../data/items_human_ins.json")
@@ -36,15 +42,35 @@ HUMAN_ATTR_PATH = join(BASE_DIR, "../data/items_human_ins.json")
 def random_idx(cum_weights):
     """Generate random index by sampling uniformly from sum of all weights, then
 
-    selecting the `min` between the position to keep the list sorted (via bisect)
+    selecting the `min` between the position to keep the list sorted (via searchsorted)
     and the value of the second to last index
     """
     pos = random.uniform(0, cum_weights[-1])
-    idx = bisect.bisect(cum_weights, pos)
+    idx = int(np.searchsorted(cum_weights, pos, side="right"))
     idx = min(idx, len(cum_weights) - 2)
     return idx
 
 
+def weighted_sample(weights, k, seed=None):
+    """Sample `k` distinct indices with probability proportional to `weights`
+
+    Uses the keys of Efraimidis and Spirakis: every index draws u ~ U(0, 1) and
+    the `k` indices with the largest u ** (1 / weight) are returned, largest
+    first, which matches drawing indices one at a time without replacement.
+    Takes O(n + k log k) time and is deterministic for a given `seed`.
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    k = min(k, len(weights))
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    rng = np.random.default_rng(seed)
+    # log(u) / weight orders indices like u ** (1 / weight) without underflow
+    with np.errstate(divide="ignore"):
+        keys = np.log(rng.random(len(weights))) / weights
+    top = np.argpartition(-keys, k - 1)[:k]
+    return top[np.argsort(-keys[top], kind="stable")]
+
+
 def setup_logger(session_id, user_log_dir):
     """Creates a log file and logging object for the corresponding session ID"""
     logger = logging.getLogger(session_id)
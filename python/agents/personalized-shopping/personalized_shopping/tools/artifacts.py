@@ -0,0 +1,39 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from google.adk.tools import ToolContext
+from google.genai import types
+
+from ..shared_libraries import init_env
+
+
+async def save_html_artifact(webshop_env, tool_context: ToolContext):
+    """Show the current page in the UI as an `html` artifact.
+
+    In `structured` mode the page HTML is not rendered for the observation, so
+    it is only rendered for the artifact, and skipped if
+    `init_env.save_html_artifacts` is off.
+    """
+    structured = webshop_env.observation_mode == "structured"
+    if structured and not init_env.save_html_artifacts:
+        return
+    try:
+        await tool_context.save_artifact(
+            "html",
+            types.Part.from_uri(
+                file_uri=webshop_env.state["html"], mime_type="text/html"
+            ),
+        )
+    except ValueError as e:
+        print(f"Error saving artifact: {e}")
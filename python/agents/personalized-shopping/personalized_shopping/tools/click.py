@@ -13,9 +13,9 @@
 # limitations under the License.
 
 from google.adk.tools import ToolContext
-from google.genai import types
 
-from ..shared_libraries.init_env import webshop_env
+from ..shared_libraries.init_env import step_session_env
+from .artifacts import save_html_artifact
 
 
 async def click(button_name: str, tool_context: ToolContext) -> str:
@@ -30,7 +30,9 @@ async def click(button_name: str, tool_context: ToolContext) -> str:
     """
     status = {"reward": None, "done": False}
     action_string = f"click[{button_name}]"
-    _, status["reward"], status["done"], _ = webshop_env.step(action_string)
+    webshop_env, (_, status["reward"], status["done"], _) = step_session_env(
+        tool_context.state, action_string
+    )
 
     ob = webshop_env.observation
     index = ob.find("Back to Search")
@@ -44,16 +46,7 @@ async def click(button_name: str, tool_context: ToolContext) -> str:
     print("#" * 50)
 
     if button_name == "Back to Search":
-        webshop_env.server.assigned_instruction_text = "Back to Search"
-
-    # Show artifact in the UI.
-    try:
-        await tool_context.save_artifact(
-            "html",
-            types.Part.from_uri(
-                file_uri=webshop_env.state["html"], mime_type="text/html"
-            ),
-        )
-    except ValueError as e:
-        print(f"Error saving artifact: {e}")
+        webshop_env.server.set_instruction_text(webshop_env.session, "Back to Search")
+
+    await save_html_artifact(webshop_env, tool_context)
     return ob
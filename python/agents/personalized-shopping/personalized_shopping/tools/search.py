@@ -13,9 +13,9 @@
 # limitations under the License.
 
 from google.adk.tools import ToolContext
-from google.genai import types
 
-from ..shared_libraries.init_env import webshop_env
+from ..shared_libraries.init_env import step_session_env
+from .artifacts import save_html_artifact
 
 
 async def search(keywords: str, tool_context: ToolContext) -> str:
@@ -30,9 +30,10 @@ async def search(keywords: str, tool_context: ToolContext) -> str:
     """
     status = {"reward": None, "done": False}
     action_string = f"search[{keywords}]"
-    webshop_env.server.assigned_instruction_text = f"Find me {keywords}."
+    webshop_env, (_, status["reward"], status["done"], _) = step_session_env(
+        tool_context.state, action_string, instruction_text=f"Find me {keywords}."
+    )
     print(f"env instruction_text: {webshop_env.instruction_text}")
-    _, status["reward"], status["done"], _ = webshop_env.step(action_string)
 
     ob = webshop_env.observation
     index = ob.find("Back to Search")
@@ -45,15 +46,6 @@ async def search(keywords: str, tool_context: ToolContext) -> str:
     print(f"observation: {ob}")
     print("#" * 50)
 
-    # Show artifact in the UI.
-    try:
-        await tool_context.save_artifact(
-            "html",
-            types.Part.from_uri(
-                file_uri=webshop_env.state["html"], mime_type="text/html"
-            ),
-        )
-    except ValueError as e:
-        print(f"Error saving artifact: {e}")
+    await save_html_artifact(webshop_env, tool_context)
 
     return ob
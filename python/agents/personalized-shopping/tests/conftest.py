@@ -0,0 +1,135 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Small product catalog for tests that do not need the full WebShop data."""
+
+import json
+import random
+
+import pytest
+
+from personalized_shopping.shared_libraries.web_agent_site.engine import (
+    catalog,
+    engine,
+)
+from personalized_shopping.shared_libraries.web_agent_site.engine.search import (
+    BM25Backend,
+)
+from personalized_shopping.shared_libraries.web_agent_site.envs.web_agent_text_env import (
+    SimServer,
+)
+
+NUM_FIXTURE_PRODUCTS = 60
+BASE_URL = "http://127.0.0.1:3000"
+
+WORDS = "red blue floral dress summer shirt cotton sleeve skirt denim leather".split()
+ATTRIBUTES = ["long sleeve", "machine wash", "cotton", "slim fit"]
+
+
+def write_fixture_data(data_dir, num_products=NUM_FIXTURE_PRODUCTS):
+    """Writes products and their goal attributes in the format of `data/`"""
+    rng = random.Random(0)
+    products, attributes, human_attributes = [], {}, {}
+    for i in range(num_products):
+        asin = f"B{i:09d}"
+        name = " ".join(rng.choices(WORDS, k=6)).title()
+        products.append(
+            {
+                "asin": asin,
+                "name": name,
+                "full_description": f"Description of {name}",
+                "small_description": [f"About {name}"],
+                "category": rng.choice(["fashion", "beauty"]),
+                "query": rng.choice(["dress", "shirt"]),
+                "product_category": "Clothing › Women › "
+                + rng.choice(["Dresses", "Tops", "Skirts"]),
+                "pricing": rng.choice(["", "$12.99", "$3.10$7.25"]),
+                "images": [f"http://images/{i}.jpg"],
+                "customization_options": (
+                    {
+                        "Color": [{"value": "Red", "image": None}, {"value": "Blue"}],
+                        "Size": [{"value": "S"}, {"value": "M"}],
+                    }
+                    if i % 3
+                    else None
+                ),
+            }
+        )
+        attributes[asin] = {
+            "attributes": rng.sample(ATTRIBUTES, 2),
+            "instruction": f"i want {name.lower()}",
+            "instruction_attributes": rng.sample(ATTRIBUTES, 1),
+        }
+        if i % 2 == 0:
+            human_attributes[asin] = [
+                {
+                    "instruction": f"find me {name.lower()}.",
+                    "instruction_attributes": rng.sample(ATTRIBUTES, 1),
+                    "instruction_options": ["red"],
+                }
+            ]
+    paths = {
+        "file_path": data_dir / "items_shuffle.json",
+        "attr_path": data_dir / "items_ins_v2.json",
+        "human_attr_path": data_dir / "items_human_ins.json",
+    }
+    for key, data in zip(paths, (products, attributes, human_attributes)):
+        with open(paths[key], "w") as f:
+            json.dump(data, f)
+    return {key: str(path) for key, path in paths.items()}
+
+
+@pytest.fixture(scope="session")
+def fixture_data(tmp_path_factory):
+    """Paths of the fixture products and goal attributes"""
+    data_dir = tmp_path_factory.mktemp("data")
+    paths = write_fixture_data(data_dir)
+    paths["catalog_dir"] = str(data_dir)
+    return paths
+
+
+def patch_data_paths(monkeypatch, fixture_data):
+    """Points product loading and compiled catalogs at the fixture data"""
+    for module in (engine, catalog):
+        monkeypatch.setattr(module, "DEFAULT_ATTR_PATH", fixture_data["attr_path"])
+        monkeypatch.setattr(module, "HUMAN_ATTR_PATH", fixture_data["human_attr_path"])
+    monkeypatch.setattr(catalog, "CATALOG_DIR", fixture_data["catalog_dir"])
+
+
+@pytest.fixture
+def use_fixture_data(monkeypatch, fixture_data):
+    """Loads products from the fixture data for the duration of a test"""
+    patch_data_paths(monkeypatch, fixture_data)
+    return fixture_data
+
+
+@pytest.fixture(scope="session")
+def make_fixture_server(fixture_data):
+    """Builds `SimServer`s over the fixture products, searched with BM25"""
+
+    def make_server(**kwargs):
+        with pytest.MonkeyPatch.context() as monkeypatch:
+            patch_data_paths(monkeypatch, fixture_data)
+            all_products, *_ = engine.load_products(fixture_data["file_path"])
+            kwargs.setdefault("search_backend", BM25Backend.from_products(all_products))
+            # The attribute files are only read while the server is built
+            return SimServer(BASE_URL, fixture_data["file_path"], **kwargs)
+
+    return make_server
+
+
+@pytest.fixture(scope="session")
+def fixture_server(make_fixture_server):
+    """`SimServer` over the fixture products, shared by the tests"""
+    return make_fixture_server()
@@ -0,0 +1,77 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import time
+
+import pytest
+
+from personalized_shopping.shared_libraries.web_agent_site.engine import catalog
+from personalized_shopping.shared_libraries.web_agent_site.engine.catalog import (
+    INDEX_FILE,
+    CatalogProducts,
+    compile_catalog,
+    load_catalog,
+)
+from personalized_shopping.shared_libraries.web_agent_site.engine.search import (
+    BM25Backend,
+)
+from personalized_shopping.shared_libraries.web_agent_site.envs.web_agent_text_env import (
+    SimServer,
+)
+
+
+@pytest.fixture
+def catalog_dir(use_fixture_data, monkeypatch, tmp_path):
+    """Catalog compiled with the default settings into a fresh directory"""
+    monkeypatch.setattr(catalog, "CATALOG_DIR", str(tmp_path))
+    return compile_catalog(use_fixture_data["file_path"])
+
+
+def test_server_loads_compiled_catalog(use_fixture_data, catalog_dir):
+    """A server with default settings opens the catalog compiled by default."""
+    file_path = use_fixture_data["file_path"]
+    all_products, *_ = load_catalog(file_path)
+    assert isinstance(all_products, CatalogProducts)
+    server = SimServer(
+        "http://127.0.0.1:3000",
+        file_path,
+        search_backend=BM25Backend.from_products(all_products),
+    )
+    assert isinstance(server.all_products, CatalogProducts)
+    assert server.all_products.catalog.catalog_dir == catalog_dir
+
+
+def test_falls_back_on_version_mismatch(use_fixture_data, catalog_dir):
+    index_path = os.path.join(catalog_dir, INDEX_FILE)
+    with open(index_path) as f:
+        index = json.load(f)
+    index["version"] = -1
+    with open(index_path, "w") as f:
+        json.dump(index, f)
+    all_products, *_ = load_catalog(use_fixture_data["file_path"])
+    assert isinstance(all_products, list)
+    assert len(all_products) == len(index["asins"])
+
+
+def test_falls_back_on_newer_source(use_fixture_data, catalog_dir):
+    file_path = use_fixture_data["file_path"]
+    modified = time.time() + 60
+    os.utime(file_path, (modified, modified))
+    try:
+        all_products, *_ = load_catalog(file_path)
+    finally:
+        os.utime(file_path, None)
+    assert isinstance(all_products, list)
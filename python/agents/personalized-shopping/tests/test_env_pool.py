@@ -0,0 +1,87 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import random
+
+from personalized_shopping.shared_libraries.web_agent_site.envs.web_agent_env_pool import (
+    WebAgentEnvPool,
+)
+from personalized_shopping.shared_libraries.web_agent_site.envs.web_agent_text_env import (
+    WebAgentTextEnv,
+)
+
+NUM_SESSIONS = 16
+NUM_STEPS = 10
+
+
+def sample_action(env, rng):
+    """Search for words of the instruction or click a random clickable."""
+    available_actions = env.get_available_actions()
+    if available_actions["has_search_bar"]:
+        words = env.instruction_text.split()
+        return f"search[{' '.join(rng.sample(words, min(3, len(words))))}]"
+    return f"click[{rng.choice(available_actions['clickables'])}]"
+
+
+def test_step_many_matches_single_envs(fixture_server):
+    """Batched steps give the same results as stepping each env on its own."""
+    server = fixture_server
+    pool = WebAgentEnvPool(server=server, session_prefix="pool_")
+    envs = {
+        key: WebAgentTextEnv(
+            observation_mode="structured", server=server, session_prefix="single_"
+        )
+        for key in range(NUM_SESSIONS)
+    }
+    for key, env in envs.items():
+        assert pool.reset(key, session=key) == env.reset(session=key)
+    rngs = {key: random.Random(key) for key in envs}
+
+    for _ in range(NUM_STEPS):
+        actions = {key: sample_action(env, rngs[key]) for key, env in envs.items()}
+        results = pool.step_many(actions)
+        for key, action in actions.items():
+            assert results[key] == envs[key].step(action)
+        for key, result in results.items():
+            if result[2]:
+                envs.pop(key)
+        if not envs:
+            break
+
+
+def test_instruction_text_is_per_session(fixture_server):
+    pool = WebAgentEnvPool(server=fixture_server)
+    first, second = pool.get("first"), pool.get("second")
+    first.server.set_instruction_text(first.session, "Find me socks.")
+    assert "Find me socks." in pool.step("first", "search[socks]")[0]
+    assert "Find me socks." not in pool.step("second", "search[socks]")[0]
+    pool.release("first")
+    assert first.session not in first.server.user_sessions
+    assert "second" in pool and "first" not in pool
+
+
+def test_releases_least_recently_used(fixture_server):
+    pool = WebAgentEnvPool(server=fixture_server, max_envs=2)
+    first = pool.get("first")
+    pool.step("first", "search[dress]")
+    pool.get("second")
+    pool.get("first")
+    pool.get("third")
+    assert "second" not in pool and len(pool) == 2
+    pool.get("fourth")
+    assert "first" not in pool
+    assert first.session not in fixture_server.user_sessions
+    # A released key starts over with a new environment
+    assert pool.get("first") is not first
+    assert pool.get("first").get_available_actions()["has_search_bar"]
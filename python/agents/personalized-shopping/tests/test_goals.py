@@ -0,0 +1,121 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from collections import defaultdict
+import itertools
+import random
+
+import numpy as np
+import pytest
+
+from personalized_shopping.shared_libraries.init_env import get_webshop_env
+from personalized_shopping.shared_libraries.web_agent_site.engine import goal
+from personalized_shopping.shared_libraries.web_agent_site.utils import weighted_sample
+
+NUM_PRODUCTS = 1000
+
+
+def reference_synthetic_goals(all_products, product_prices):
+    """`get_synthetic_goals` building a dict for every option combination."""
+    goals = []
+    cnt_atts = defaultdict(int)
+    for product in all_products:
+        if "instruction_text" not in product or product["instruction_text"] is None:
+            continue
+        asin = product["asin"]
+        attributes = product["instruction_attributes"]
+        price = product_prices[asin]
+        price_range = [p for p in goal.PRICE_RANGE if p > price][:4]
+        if len(price_range) >= 2:
+            _, price_upper = sorted(random.sample(price_range, 2))
+            price_text = f", and price lower than {price_upper:.2f} dollars"
+        else:
+            price_upper = 1000000
+            price_text = ""
+        options = product["options"]
+        option_names = sorted(options)
+        for combination in itertools.product(*(options[n] for n in option_names)):
+            goal_options = dict(zip(option_names, combination))
+            option_text = ", and ".join([f"{k}: {v}" for k, v in goal_options.items()])
+            option_text = " with " + option_text if option_text else ""
+            goals.append(
+                {
+                    "asin": asin,
+                    "category": product["category"],
+                    "query": product["query"],
+                    "name": product["name"],
+                    "product_category": product["product_category"],
+                    "instruction_text": f"{product['instruction_text']}"
+                    f"{option_text}{price_text}",
+                    "attributes": attributes,
+                    "price_upper": price_upper,
+                    "goal_options": goal_options,
+                    "title": product["Title"],
+                }
+            )
+            for att in attributes:
+                cnt_atts[att] += 1
+    for goal_ in goals:
+        goal_["weight"] = sum(1.0 / cnt_atts[att] for att in goal_["attributes"]) / len(
+            goal_["attributes"]
+        )
+    return goals
+
+
+@pytest.fixture(scope="module")
+def products():
+    server = get_webshop_env().unwrapped.server
+    return server.all_products[:NUM_PRODUCTS], server.product_prices
+
+
+def test_synthetic_goals_parity(products):
+    all_products, product_prices = products
+    random.seed(0)
+    expected = reference_synthetic_goals(all_products, product_prices)
+    random.seed(0)
+    goals = goal.get_synthetic_goals(all_products, product_prices)
+    assert len(goals) == len(expected)
+    for goal_, expected_goal in zip(goals, expected):
+        assert goal_ == expected_goal
+    np.testing.assert_allclose(
+        goal.get_goal_weights(goals), [g["weight"] for g in expected]
+    )
+
+
+def test_select_goals(products):
+    goals = goal.get_synthetic_goals(*products)
+    idxs = list(range(len(goals)))[::-7]
+    selected = goal.select_goals(goals, idxs)
+    assert list(selected) == [goals[i] for i in idxs]
+    assert list(goal.select_goals(selected, [2, 0])) == [selected[2], selected[0]]
+    np.testing.assert_allclose(
+        goal.get_goal_weights(selected), [goals[i]["weight"] for i in idxs]
+    )
+
+
+def test_weighted_sample_is_deterministic():
+    weights = np.random.default_rng(0).random(1000)
+    idxs = weighted_sample(weights, 300, seed=1)
+    assert len(set(idxs.tolist())) == 300
+    assert (weighted_sample(weights, 300, seed=1) == idxs).all()
+    assert (weighted_sample(weights, 300, seed=2) != idxs).any()
+    assert sorted(weighted_sample(weights, 2000, seed=1)) == list(range(1000))
+
+
+def test_weighted_sample_follows_weights():
+    weights = np.array([1.0, 2.0, 3.0, 4.0])
+    firsts = [weighted_sample(weights, 2, seed=seed)[0] for seed in range(20000)]
+    np.testing.assert_allclose(
+        np.bincount(firsts) / len(firsts), weights / weights.sum(), atol=0.02
+    )
@@ -0,0 +1,36 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+
+import numpy as np
+
+from personalized_shopping.shared_libraries.web_agent_site.engine.image_features import (
+    ImageFeatures,
+)
+
+
+def test_image_features_are_memory_mapped(tmp_path):
+    feats = np.random.default_rng(0).random((3, 512), dtype=np.float32)
+    np.save(tmp_path / "feat_conv.npy", feats)
+    urls = ["http://img/0.jpg", "http://img/1.jpg", "http://img/2.jpg"]
+    (tmp_path / "feat_urls.json").write_text(json.dumps(urls))
+
+    image_features = ImageFeatures(
+        str(tmp_path / "feat_conv.npy"), str(tmp_path / "feat_urls.json")
+    )
+    assert isinstance(image_features.feats, np.memmap)
+    assert len(image_features) == 3 and "http://img/1.jpg" in image_features
+    np.testing.assert_array_equal(image_features.get("http://img/1.jpg"), feats[1])
+    assert image_features.get("http://img/3.jpg") is None
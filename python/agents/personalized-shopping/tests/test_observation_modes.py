@@ -0,0 +1,69 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import random
+
+import pytest
+
+from personalized_shopping.shared_libraries.init_env import get_webshop_env
+from personalized_shopping.shared_libraries.web_agent_site.envs.web_agent_text_env import (
+    WebAgentTextEnv,
+)
+
+NUM_EPISODES = 20
+NUM_STEPS = 15
+
+
+@pytest.fixture(scope="module")
+def envs():
+    """A `text` and a `structured` env sharing the same server."""
+    server = get_webshop_env().unwrapped.server
+    text_env = WebAgentTextEnv(
+        observation_mode="text", server=server, session_prefix="text_"
+    )
+    structured_env = WebAgentTextEnv(
+        observation_mode="structured", server=server, session_prefix="structured_"
+    )
+    return text_env, structured_env
+
+
+def sample_action(env, rng):
+    """Search for words of the instruction or click a random clickable."""
+    available_actions = env.get_available_actions()
+    if available_actions["has_search_bar"]:
+        words = env.instruction_text.split()
+        return f"search[{' '.join(rng.sample(words, min(3, len(words))))}]"
+    return f"click[{rng.choice(available_actions['clickables'])}]"
+
+
+@pytest.mark.parametrize("episode", range(NUM_EPISODES))
+def test_structured_matches_text(envs, episode):
+    """The structured fast path produces the same observations as `text`."""
+    text_env, structured_env = envs
+    rng = random.Random(episode)
+    text_ob, _ = text_env.reset(session=episode)
+    structured_ob, _ = structured_env.reset(session=episode)
+    assert structured_ob == text_ob
+    assert structured_env.instruction_text == text_env.instruction_text
+
+    for _ in range(NUM_STEPS):
+        assert (
+            structured_env.get_available_actions() == text_env.get_available_actions()
+        )
+        action = sample_action(text_env, rng)
+        text_step = text_env.step(action)
+        structured_step = structured_env.step(action)
+        assert structured_step == text_step
+        if text_step[2]:
+            break
@@ -0,0 +1,168 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import random
+
+import pytest
+from thefuzz import fuzz
+
+from personalized_shopping.shared_libraries.init_env import get_webshop_env
+from personalized_shopping.shared_libraries.web_agent_site.engine import goal
+from personalized_shopping.shared_libraries.web_agent_site.engine.normalize import (
+    normalize_color,
+)
+
+NUM_PAIRS = 500
+
+
+def reference_type_reward(purchased_product, goal_):
+    """`get_type_reward` parsing both names with spaCy on every call."""
+    query_match = purchased_product["query"] == goal_["query"]
+    purchased_category = [
+        x.strip() for x in purchased_product["product_category"].split("›")
+    ]
+    goal_category = [x.strip() for x in goal_["product_category"].split("›")]
+    category_match = len(set(purchased_category) & set(goal_category)) >= 2
+
+    purchased_type_parse = [
+        t.text.lower()
+        for t in goal.get_nlp()(purchased_product["name"])
+        if t.pos_ in ("PNOUN", "NOUN", "PROPN")
+    ]
+    desired_type_parse = [
+        t.text.lower()
+        for t in goal.get_nlp()(goal_["name"])
+        if t.pos_ in ("PNOUN", "NOUN", "PROPN")
+    ]
+    n_intersect_type = len(set(purchased_type_parse) & set(desired_type_parse))
+    if len(desired_type_parse) == 0:
+        title_score = 0.2
+    else:
+        title_score = n_intersect_type / len(desired_type_parse)
+
+    r_type = 1.0
+    if not (query_match or category_match or title_score > 0.2):
+        r_type = 0.5
+    if title_score < 0.1:
+        r_type = 0.1
+    if title_score == 0.0:
+        r_type = 0.0
+    return dict(
+        r_type=r_type,
+        query_match=query_match,
+        category_match=category_match,
+        title_score=title_score,
+    )
+
+
+def reference_attribute_reward(purchased_product, goal_):
+    """`get_attribute_reward` matching one attribute pair at a time."""
+    num_attr_matches = 0
+    for g_attr in goal_["attributes"]:
+        matched = False
+        for p_attr in purchased_product["Attributes"]:
+            if fuzz.token_set_ratio(p_attr, g_attr) > 85:
+                num_attr_matches += 1
+                matched = True
+                break
+        if not matched and (
+            g_attr in purchased_product["Title"].lower()
+            or g_attr in " ".join(purchased_product["BulletPoints"]).lower()
+            or g_attr in purchased_product["Description"].lower()
+        ):
+            num_attr_matches += 1
+    return num_attr_matches / len(goal_["attributes"]), num_attr_matches
+
+
+def reference_option_reward(purchased_options, goal_options):
+    """`get_option_reward` matching one option pair at a time."""
+    purchased_options = [normalize_color(o) for o in purchased_options]
+    goal_options = [normalize_color(o) for o in goal_options]
+    num_option_matches = 0
+    for g_option in goal_options:
+        for p_option in purchased_options:
+            if fuzz.token_set_ratio(p_option, g_option) > 85:
+                num_option_matches += 1
+                break
+    r_option = num_option_matches / len(goal_options) if goal_options else None
+    return r_option, num_option_matches
+
+
+@pytest.fixture(scope="module")
+def pairs():
+    """Goals paired with their target product and with random products."""
+    server = get_webshop_env().unwrapped.server
+    rng = random.Random(0)
+    pairs = []
+    for goal_ in rng.sample(server.goals, min(NUM_PAIRS, len(server.goals))):
+        if rng.random() < 0.5:
+            product = server.product_item_dict[goal_["asin"]]
+        else:
+            product = rng.choice(server.all_products)
+        options = {
+            name: rng.choice(values) for name, values in product["options"].items()
+        }
+        pairs.append((product, goal_, options))
+    return pairs
+
+
+def test_type_reward_parity(pairs):
+    for product, goal_, _ in pairs:
+        assert goal.get_type_reward(product, goal_) == reference_type_reward(
+            product, goal_
+        )
+
+
+def test_attribute_reward_parity(pairs):
+    for product, goal_, _ in pairs:
+        assert goal.get_attribute_reward(product, goal_) == reference_attribute_reward(
+            product, goal_
+        )
+
+
+def test_option_reward_parity(pairs):
+    for _, goal_, options in pairs:
+        goal_options = goal_["goal_options"]
+        if isinstance(goal_options, dict):
+            goal_options = goal_options.items()
+        goal_options = list(goal_options)
+        assert goal.get_option_reward(
+            list(options.values()), goal_options
+        ) == reference_option_reward(list(options.values()), goal_options)
+
+
+def test_precomputed_features_parity(pairs):
+    goal._type_tokens.clear()  # pylint: disable=protected-access
+    goal.precompute_reward_features(
+        [product for product, _, _ in pairs], [goal_ for _, goal_, _ in pairs]
+    )
+    for product, goal_, _ in pairs:
+        assert goal.get_type_reward(product, goal_) == reference_type_reward(
+            product, goal_
+        )
+
+
+def test_feature_caches_are_bounded(fixture_server, monkeypatch):
+    monkeypatch.setattr(goal, "_type_tokens", goal.FeatureCache(8))
+    monkeypatch.setattr(goal, "_product_features", goal.FeatureCache(4))
+    goal_ = fixture_server.goals[0]
+    for product in fixture_server.all_products:
+        goal.get_reward(product, goal_, price=1.0, options={})
+    assert len(goal._type_tokens) == 8  # pylint: disable=protected-access
+    assert len(goal._product_features) == 4  # pylint: disable=protected-access
+    last = fixture_server.all_products[-1]
+    assert goal.get_product_features(last) is goal.get_product_features(last)
+
+    goal.precompute_reward_features(fixture_server.all_products)
+    assert len(goal._product_features) == 4  # pylint: disable=protected-access
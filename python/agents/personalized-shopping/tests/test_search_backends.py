@@ -0,0 +1,62 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from personalized_shopping.shared_libraries.web_agent_site.engine.search import (
+    BM25Backend,
+    init_search_backend,
+)
+
+DOCUMENTS = [
+    ("B000000001", "red cotton summer dress with floral print"),
+    ("B000000002", "blue denim jacket for men"),
+    ("B000000003", "red leather women's shoes, red sole"),
+    ("B000000004", "the cotton shirt is blue and red"),
+    ("B000000005", "stainless steel water bottle"),
+]
+
+QUERIES = ["red dress", "blue cotton", "women shoes", "the", "unknown words"]
+
+
+@pytest.fixture(scope="module")
+def backend():
+    return BM25Backend.from_documents(DOCUMENTS)
+
+
+def test_bm25_ranking(backend):
+    """Documents matching more, rarer query terms rank first."""
+    hits = backend.search("red dress", k=10)
+    assert [hit.docid for hit in hits] == ["B000000001", "B000000003", "B000000004"]
+    assert hits[0].score > hits[1].score > hits[2].score
+    assert backend.search("women shoes", k=1)[0].docid == "B000000003"
+    assert backend.search("the", k=10) == []
+    assert backend.search("unknown words", k=10) == []
+
+
+def test_bm25_batch_search_matches_search(backend):
+    assert backend.batch_search(QUERIES, k=2) == [
+        backend.search(query, k=2) for query in QUERIES
+    ]
+
+
+def test_bm25_save_and_load(backend, tmp_path):
+    loaded = BM25Backend.load(backend.save(str(tmp_path / "bm25")))
+    assert loaded.batch_search(QUERIES, k=5) == backend.batch_search(QUERIES, k=5)
+
+
+def test_init_search_backend(backend):
+    assert init_search_backend(backend) is backend
+    with pytest.raises(ValueError):
+        init_search_backend("unknown")
@@ -0,0 +1,66 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import time
+
+from personalized_shopping.shared_libraries.web_agent_site.engine.session_store import (
+    SessionStore,
+)
+from personalized_shopping.shared_libraries.web_agent_site.envs.web_agent_text_env import (
+    WebAgentTextEnv,
+)
+
+
+def test_evicts_least_recently_used():
+    store = SessionStore(max_size=2)
+    store["a"] = {"done": False}
+    store["b"] = {"done": False}
+    store["a"]["done"] = True
+    store["c"] = {"done": False}
+    assert "a" in store and "c" in store and "b" not in store
+    assert store.get_metrics()["evictions"] == 1
+
+
+def test_expires_unused_sessions():
+    store = SessionStore(ttl=0.05)
+    store["a"] = {"done": False}
+    time.sleep(0.1)
+    assert "a" not in store
+    assert store.get("a") is None
+    assert store.get_metrics()["expirations"] == 1
+
+
+def test_spills_finished_sessions(tmp_path):
+    spill_path = tmp_path / "sessions.jsonl"
+    store = SessionStore(max_size=1, spill_path=str(spill_path))
+    store["a"] = {"done": True, "reward": 1.0, "asins": {"B1"}, "page_context": 0}
+    store["b"] = {"done": False}
+    store["c"] = {"done": False}
+    (record,) = [json.loads(line) for line in spill_path.read_text().splitlines()]
+    assert record["session_id"] == "a" and record["reward"] == 1.0
+    assert record["asins"] == ["B1"] and "page_context" not in record
+    metrics = store.get_metrics()
+    assert metrics["num_sessions"] == 1 and metrics["spills"] == 1
+    assert metrics["approx_bytes"] > 0
+
+
+def test_evicted_session_starts_over(make_fixture_server):
+    server = make_fixture_server(max_sessions=1)
+    first = WebAgentTextEnv(observation_mode="text_rich", server=server)
+    WebAgentTextEnv(observation_mode="text_rich", server=server)
+    assert first.session not in server.user_sessions
+    assert "Search" in first.observation
+    server.set_instruction_text(first.session, "Find me socks.")
+    assert "Find me socks." in first.step("search[dress]")[0]
@@ -0,0 +1,124 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import threading
+
+import pytest
+
+from personalized_shopping.shared_libraries import init_env
+from personalized_shopping.shared_libraries.web_agent_site.envs.web_agent_env_pool import (
+    WebAgentEnvPool,
+)
+from personalized_shopping.shared_libraries.web_agent_site.envs.web_agent_text_env import (
+    SimServer,
+)
+from personalized_shopping.tools.click import click
+from personalized_shopping.tools.search import search
+
+
+class FakeToolContext:
+    """Tool context of one ADK session, keeping its artifacts in memory."""
+
+    def __init__(self):
+        self.state = {}
+        self.artifacts = {}
+
+    async def save_artifact(self, filename, artifact):
+        self.artifacts[filename] = artifact
+
+
+@pytest.fixture
+def env_pool(make_fixture_server, monkeypatch):
+    """Pool used by the tools, over a server set up like `init_env_pool`'s"""
+    pool = WebAgentEnvPool(server=make_fixture_server(render_html=False))
+    monkeypatch.setattr(init_env, "_webshop_env_pool", pool)
+    return pool
+
+
+def click_first_product(tool_context):
+    env = init_env.get_session_env(tool_context.state)
+    clickables = env.get_available_actions()["clickables"]
+    asin = next(c for c in clickables if c.startswith("b0"))
+    return asyncio.run(click(asin, tool_context))
+
+
+def test_tools_save_html_artifacts(env_pool):
+    tool_context = FakeToolContext()
+    asyncio.run(search("floral dress", tool_context))
+    assert "html" in tool_context.artifacts
+
+
+def test_structured_tool_steps_do_not_render_html(env_pool, monkeypatch):
+    def render_page(self, page):
+        raise AssertionError("HTML was rendered during a structured step.")
+
+    monkeypatch.setattr(SimServer, "render_page", render_page)
+    monkeypatch.setattr(init_env, "save_html_artifacts", False)
+    tool_context = FakeToolContext()
+    assert "Back to Search" in asyncio.run(search("floral dress", tool_context))
+    assert "Buy Now" in click_first_product(tool_context)
+    assert not tool_context.artifacts
+
+
+def test_tools_step_through_the_pool(env_pool, monkeypatch):
+    steps = []
+    step_many = env_pool.step_many
+
+    def record_step_many(actions):
+        steps.append(actions)
+        return step_many(actions)
+
+    monkeypatch.setattr(env_pool, "step_many", record_step_many)
+    tool_context = FakeToolContext()
+    asyncio.run(search("floral dress", tool_context))
+    click_first_product(tool_context)
+    key = tool_context.state[init_env.WEBSHOP_SESSION_KEY]
+    assert [list(actions) for actions in steps] == [[key], [key]]
+
+
+def test_html_artifacts_when_enabled(env_pool, monkeypatch):
+    monkeypatch.setattr(init_env, "save_html_artifacts", True)
+    tool_context = FakeToolContext()
+    asyncio.run(search("floral dress", tool_context))
+    assert "html" in tool_context.artifacts
+
+
+def test_search_sets_instruction_with_its_step(env_pool, monkeypatch):
+    tool_context = FakeToolContext()
+    key = init_env.get_session_key(tool_context.state)
+    set_instruction_text = SimServer.set_instruction_text
+    releases = []
+
+    def set_instruction_then_release(self, session_id, instruction_text):
+        # Another session's tool call releases this environment meanwhile
+        set_instruction_text(self, session_id, instruction_text)
+        release = threading.Thread(target=env_pool.release, args=(key,))
+        release.start()
+        release.join(timeout=0.1)
+        releases.append(release)
+
+    observations = []
+    step_many = env_pool.step_many
+
+    def record_step_many(actions):
+        results = step_many(actions)
+        observations.extend(observation for observation, *_ in results.values())
+        return results
+
+    monkeypatch.setattr(SimServer, "set_instruction_text", set_instruction_then_release)
+    monkeypatch.setattr(env_pool, "step_many", record_step_many)
+    asyncio.run(search("floral dress", tool_context))
+    releases[0].join()
+    assert "Find me floral dress." in observations[0]